@@ -10,11 +10,7 @@ from scipy.signal import resample
 from pydub import AudioSegment
 import io
 
-from config import (
-    SAMPLE_RATE,
-    ENABLE_AUDIO_ENHANCEMENT,
-    AUDIO_VOLUME_BOOST_DB
-)
+from config import CONFIG
 
 
 class AudioProcessor:
@@ -22,13 +18,13 @@ class AudioProcessor:
 
     def __init__(self):
         # Audio enhancement settings from configuration
-        self.enable_enhancement = ENABLE_AUDIO_ENHANCEMENT
-        self.volume_boost_db = AUDIO_VOLUME_BOOST_DB  # dB increase for louder audio
-        self.target_sample_rate = SAMPLE_RATE  # 16kHz for Whisper
+        self.enable_enhancement = CONFIG.enable_audio_enhancement
+        self.volume_boost_db = CONFIG.audio_volume_boost_db  # dB increase for louder audio
+        self.target_sample_rate = CONFIG.sample_rate  # 16kHz for Whisper
         self.target_channels = 1  # Mono
 
     @staticmethod
-    def decode_and_resample(audio_data: bytes, original_sample_rate: int, target_sample_rate: int = SAMPLE_RATE) -> bytes:
+    def decode_and_resample(audio_data: bytes, original_sample_rate: int, target_sample_rate: int = CONFIG.sample_rate) -> bytes:
         """Basic resampling without enhancement"""
         if original_sample_rate == target_sample_rate:
             return audio_data
@@ -3,50 +3,139 @@ config.py - Configuration constants and settings for the Gateway service
 
 Centralized configuration management for the realtime speech gateway service.
 Contains all environment variables, constants, and language mappings.
+
+Environment variables are parsed once into the immutable CONFIG instance;
+modules read plain attributes from it instead of module-level globals.
 """
 
 import os
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    # === Redis Configuration ===
+    redis_url: str
+    # Idle pooled connections are PINGed before reuse at most this often (seconds); 0 disables
+    redis_health_check_interval: int
+
+    # === Gateway Configuration ===
+    gateway_port: int
+    health_port: int
+    # Bind the health port with SO_REUSEPORT so several gateway processes on one host can share it
+    health_reuse_port: bool
+
+    # === VAD Configuration (Dual VAD system) ===
+    silence_threshold_seconds: float
+    sample_rate: int
+    # Dual VAD parameters (matching audio_recorder.py)
+    webrtc_sensitivity: int  # 0-3, 3=most aggressive
+    silero_sensitivity: float  # 0.0-1.0, higher=more sensitive
+    int16_max_abs_value: float
+    # Chunks whose RMS (int16 scale) is below this are treated as silence without running the VADs; 0 disables
+    vad_silence_rms_floor: float
+
+    # === Redis Streams/Queues ===
+    audio_jobs_stream: str
+    # Audio job schema: "2" carries raw PCM in `audio_bytes` (v1 used base64 in `audio_bytes_b64`)
+    audio_job_schema_version: str
+    results_channel_prefix: str
+    session_prefix: str
+
+    # === Batch and timing configuration ===
+    pre_speech_buffer_seconds: float  # Include N seconds of audio before speech detection
+    minimum_new_audio_seconds: float  # Minimum new audio seconds required before sending a job #lower = more realtime
+    max_queue_depth: int
+    queue_depth_sample_interval_ms: float  # How often the backpressure check's XLEN is refreshed
+    # audio_jobs entries older than this are trimmed (XTRIM MINID ~); stale audio is useless for live captions. 0 disables
+    audio_jobs_max_age_seconds: float
+    # Concurrent job publishes are coalesced into one pipelined XADD round-trip
+    publish_batch_max_jobs: int
+    publish_batch_window_ms: float  # 0 = only batch jobs already queued
+    # Max audio buffer duration in seconds (hard limit). The longer the buffer, the more latency.
+    max_audio_buffer_seconds: float
+    # Whether to send a final job when max audio buffer is exceeded
+    send_final_job_on_max_buffer: bool
+
+    # === Language configuration ===
+    default_source_language: str
+    default_target_language: str
+
+    # === Session configuration ===
+    session_expiration_seconds: int
+    # Buffer-only session changes are written to Redis at most this often; state transitions flush immediately
+    session_flush_interval_seconds: float
+    max_cached_sessions: int  # Upper bound on sessions held in the gateway's local cache
+
+    # === Console output ===
+    debug_tty: bool  # Live buffer/silence progress line on an interactive terminal
+
+    # === Audio enhancement configuration ===
+    enable_audio_enhancement: bool
+    audio_volume_boost_db: float  # dB increase for louder audio
+
+    # === Derived values (computed once from the settings above) ===
+    bytes_per_second: int = field(init=False)  # 16-bit mono PCM
+    inv_bytes_per_second: float = field(init=False)  # Multiply byte counts by this to get seconds
+    pre_speech_buffer_samples: int = field(init=False)
+    max_audio_buffer_bytes: int = field(init=False)
+    # Hard cap on audio_jobs stream length (XADD MAXLEN ~), well above the MAX_QUEUE_DEPTH backpressure point
+    audio_jobs_stream_maxlen: int = field(init=False)
+
+    def __post_init__(self):
+        # Frozen dataclass: derived fields have to be set through object.__setattr__
+        bytes_per_second = self.sample_rate * 2
+        object.__setattr__(self, "bytes_per_second", bytes_per_second)
+        object.__setattr__(self, "inv_bytes_per_second", 1.0 / bytes_per_second)
+        object.__setattr__(self, "pre_speech_buffer_samples", int(self.pre_speech_buffer_seconds * self.sample_rate))
+        object.__setattr__(self, "max_audio_buffer_bytes", int(self.max_audio_buffer_seconds * bytes_per_second))
+        object.__setattr__(self, "audio_jobs_stream_maxlen", self.max_queue_depth * 10)
 
-# === Redis Configuration ===
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Build the configuration from environment variables (with defaults)"""
+        return cls(
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
+            redis_health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
 
-# === Gateway Configuration ===
-GATEWAY_PORT = int(os.getenv("GATEWAY_PORT", "5026"))
-HEALTH_PORT = int(os.getenv("HEALTH_PORT", "8080"))
+            gateway_port=int(os.getenv("GATEWAY_PORT", "5026")),
+            health_port=int(os.getenv("HEALTH_PORT", "8080")),
+            health_reuse_port=os.getenv("HEALTH_REUSE_PORT", "false").lower() == "true",
 
-# === VAD Configuration (Dual VAD system) ===
-SILENCE_THRESHOLD_SECONDS = float(os.getenv("SILENCE_THRESHOLD_SECONDS", "1.0"))
-SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "16000"))
-# Removed unused SILENCE_RATIO_THRESHOLD
+            silence_threshold_seconds=float(os.getenv("SILENCE_THRESHOLD_SECONDS", "1.0")),
+            sample_rate=int(os.getenv("SAMPLE_RATE", "16000")),
+            webrtc_sensitivity=int(os.getenv("WEBRTC_SENSITIVITY", "3")),
+            silero_sensitivity=float(os.getenv("SILERO_SENSITIVITY", "0.7")),
+            int16_max_abs_value=32768.0,
+            vad_silence_rms_floor=float(os.getenv("VAD_SILENCE_RMS_FLOOR", "50")),
 
-# Dual VAD parameters (matching audio_recorder.py)
-WEBRTC_SENSITIVITY = int(os.getenv("WEBRTC_SENSITIVITY", "3"))  # 0-3, 3=most aggressive
-SILERO_SENSITIVITY = float(os.getenv("SILERO_SENSITIVITY", "0.7"))  # 0.0-1.0, higher=more sensitive
-INT16_MAX_ABS_VALUE = 32768.0
+            audio_jobs_stream="audio_jobs",
+            audio_job_schema_version="2",
+            results_channel_prefix="results:",
+            session_prefix="session:",
 
-# === Redis Streams/Queues ===
-AUDIO_JOBS_STREAM = "audio_jobs"
-RESULTS_CHANNEL_PREFIX = "results:"
-SESSION_PREFIX = "session:"
+            pre_speech_buffer_seconds=float(os.getenv("PRE_SPEECH_BUFFER_SECONDS", "2.0")),
+            minimum_new_audio_seconds=float(os.getenv("MINIMUM_NEW_AUDIO_SECONDS", "1.0")),
+            max_queue_depth=int(os.getenv("MAX_QUEUE_DEPTH", "100")),
+            queue_depth_sample_interval_ms=float(os.getenv("QUEUE_DEPTH_SAMPLE_INTERVAL_MS", "100")),
+            audio_jobs_max_age_seconds=float(os.getenv("AUDIO_JOBS_MAX_AGE_SECONDS", "300")),
+            publish_batch_max_jobs=int(os.getenv("PUBLISH_BATCH_MAX_JOBS", "64")),
+            publish_batch_window_ms=float(os.getenv("PUBLISH_BATCH_WINDOW_MS", "5")),
+            max_audio_buffer_seconds=float(os.getenv("MAX_AUDIO_BUFFER_SECONDS", "10.0")),
+            send_final_job_on_max_buffer=True,  # Set to True (recommended) (this means including the last audio chunk (silent chunks (possibly having some more speech though))) and send as a final job
 
-# === Batch and timing configuration ===
-PRE_SPEECH_BUFFER_SECONDS = float(os.getenv("PRE_SPEECH_BUFFER_SECONDS", "2.0"))  # Include N seconds of audio before speech detection
-MINIMUM_NEW_AUDIO_SECONDS = float(os.getenv("MINIMUM_NEW_AUDIO_SECONDS", "1.0"))  # Minimum new audio seconds required before sending a job #lower = more realtime
-MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "100"))
-# Max audio buffer duration in seconds (hard limit). The longer the buffer, the more latency.
-MAX_AUDIO_BUFFER_SECONDS = float(os.getenv("MAX_AUDIO_BUFFER_SECONDS", "10.0"))
-# Whether to send a final job when max audio buffer is exceeded
-SEND_FINAL_JOB_ON_MAX_BUFFER = True  # Set to True (recommended) (this means including the last audio chunk (silent chunks (possibly having some more speech though))) and send as a final job
+            default_source_language=os.getenv("DEFAULT_SOURCE_LANGUAGE", "en"),
+            default_target_language=os.getenv("DEFAULT_TARGET_LANGUAGE", "vi"),
 
-# === Language configuration ===
-DEFAULT_SOURCE_LANGUAGE = os.getenv("DEFAULT_SOURCE_LANGUAGE", "en")
-DEFAULT_TARGET_LANGUAGE = os.getenv("DEFAULT_TARGET_LANGUAGE", "vi")
+            session_expiration_seconds=int(os.getenv("SESSION_EXPIRATION_SECONDS", "900")),  # 15 minutes default
+            session_flush_interval_seconds=float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "0.5")),
+            max_cached_sessions=int(os.getenv("MAX_CACHED_SESSIONS", "1000")),
 
-# === Session configuration ===
-SESSION_EXPIRATION_SECONDS = int(os.getenv("SESSION_EXPIRATION_SECONDS", "900"))  # 15 minutes default
+            debug_tty=os.getenv("DEBUG_TTY", "false").lower() == "true",
 
-# === Audio enhancement configuration ===
-ENABLE_AUDIO_ENHANCEMENT = os.getenv("ENABLE_AUDIO_ENHANCEMENT", "true").lower() == "true"
-AUDIO_VOLUME_BOOST_DB = float(os.getenv("AUDIO_VOLUME_BOOST_DB", "7.0"))  # dB increase for louder audio
+            enable_audio_enhancement=os.getenv("ENABLE_AUDIO_ENHANCEMENT", "true").lower() == "true",
+            audio_volume_boost_db=float(os.getenv("AUDIO_VOLUME_BOOST_DB", "7.0")),
+        )
 
 
+CONFIG = Config.from_env()
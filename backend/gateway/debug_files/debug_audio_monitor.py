@@ -19,10 +19,9 @@ Requirements:
 """
 
 import redis
-import base64
 import os
+import struct
 import time
-import wave
 
 # Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -31,61 +30,66 @@ DEBUG_AUDIO_DIR = "debug_audio"
 SAMPLE_RATE = 16000
 CHANNELS = 1
 SAMPLE_WIDTH = 2  # 2 bytes for 16-bit audio
+READ_BATCH_SIZE = 100  # Max jobs fetched per XREAD round-trip
+
+# Canonical 44-byte PCM WAV header, packed into a reused scratch buffer
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+_wav_header_scratch = bytearray(WAV_HEADER.size)
 
 def save_audio_chunk(client_id, audio_bytes, segment_id):
     """Saves an audio chunk to a WAV file."""
-    if not os.path.exists(DEBUG_AUDIO_DIR):
-        os.makedirs(DEBUG_AUDIO_DIR)
-
     timestamp = int(time.time() * 1000)
     filename = f"{timestamp}_{segment_id}_{client_id}.wav"
     filepath = os.path.join(DEBUG_AUDIO_DIR, filename)
 
     try:
-        with wave.open(filepath, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(SAMPLE_WIDTH)
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(audio_bytes)
+        # Sizes are known up front, so the header is written once with no seek-back patching
+        data_size = len(audio_bytes)
+        WAV_HEADER.pack_into(
+            _wav_header_scratch, 0,
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, CHANNELS, SAMPLE_RATE,
+            SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH, CHANNELS * SAMPLE_WIDTH, SAMPLE_WIDTH * 8,
+            b'data', data_size
+        )
+        with open(filepath, 'wb', buffering=1 << 16) as f:
+            f.write(_wav_header_scratch)
+            f.write(audio_bytes)
         print(f"Saved audio chunk to {filepath}")
     except Exception as e:
         print(f"Error saving audio chunk: {e}")
 
 def listen_for_audio_jobs():
     """Listens to the Redis stream for audio jobs and saves the audio."""
+    os.makedirs(DEBUG_AUDIO_DIR, exist_ok=True)
     print(f"Connecting to Redis at {REDIS_URL}...")
-    r = redis.from_url(REDIS_URL)
+    r = redis.from_url(REDIS_URL, decode_responses=False)
     print("Connected to Redis.")
     print(f"Listening for audio jobs on stream '{AUDIO_JOBS_STREAM}'...")
 
     last_id = '$'  # Start listening for new messages
     while True:
         try:
-            # Block and wait for new messages
-            response = r.xread({AUDIO_JOBS_STREAM: last_id}, block=0, count=1)
-            if response:
-                stream, messages = response[0]
-                last_id, job_data = messages[0]
-                
-                # Decode job data from bytes
-                decoded_job_data = {k.decode('utf-8'): v.decode('utf-8') for k, v in job_data.items()}
+            # Wait for new messages and take everything queued (up to the batch size) in one round-trip
+            response = r.xread({AUDIO_JOBS_STREAM: last_id}, block=5000, count=READ_BATCH_SIZE)
+            if not response:
+                continue
+            stream, messages = response[0]
+            for message_id, job_data in messages:
+                last_id = message_id
 
-                if 'audio_bytes_b64' in decoded_job_data:
-                    client_id = decoded_job_data.get('client_id', 'unknown_client')
-                    segment_id = decoded_job_data.get('segment_id', 'unknown_segment')
-                    audio_b64 = decoded_job_data['audio_bytes_b64']
-                    
-                    try:
-                        audio_bytes = base64.b64decode(audio_b64)
-                        save_audio_chunk(client_id, audio_bytes, segment_id)
-                    except (base64.binascii.Error, ValueError) as e:
-                        print(f"Error decoding base64 audio data: {e}")
+                # Fields stay as bytes; only the two used for the filename are decoded
+                audio_bytes = job_data.get(b'audio_bytes')
+                if audio_bytes:
+                    client_id = job_data.get(b'client_id', b'unknown_client').decode('utf-8')
+                    segment_id = job_data.get(b'segment_id', b'unknown_segment').decode('utf-8')
+                    save_audio_chunk(client_id, audio_bytes, segment_id)
                 
         except redis.exceptions.ConnectionError as e:
             print(f"Redis connection error: {e}. Reconnecting in 5 seconds...")
             time.sleep(5)
             # Re-initialize connection
-            r = redis.from_url(REDIS_URL)
+            r = redis.from_url(REDIS_URL, decode_responses=False)
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             time.sleep(5)
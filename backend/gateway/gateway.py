@@ -44,11 +44,10 @@ Utterance_end sent to client X - Utterance end signal sent
 import asyncio
 import json
 import struct
-import threading
 import time
-import base64
 import uuid
 import websockets
+from collections import OrderedDict
 from typing import Optional, Dict, Any, Set, Tuple
 import logging
 import os
@@ -60,14 +59,11 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import from our modular components
-from config import (
-    REDIS_URL, GATEWAY_PORT, HEALTH_PORT, SILENCE_THRESHOLD_SECONDS, SAMPLE_RATE,
-    WEBRTC_SENSITIVITY, SILERO_SENSITIVITY, INT16_MAX_ABS_VALUE, AUDIO_JOBS_STREAM,
-    RESULTS_CHANNEL_PREFIX, SESSION_PREFIX, PRE_SPEECH_BUFFER_SECONDS, MINIMUM_NEW_AUDIO_SECONDS, MAX_QUEUE_DEPTH,
-    MAX_AUDIO_BUFFER_SECONDS, SEND_FINAL_JOB_ON_MAX_BUFFER,
-    ENABLE_AUDIO_ENHANCEMENT, AUDIO_VOLUME_BOOST_DB, SESSION_EXPIRATION_SECONDS
+from config import CONFIG
+from session import (
+    SpeechState, SpeechSession, STEP_SPEECH_STARTED, STEP_SPEECH_RESUMED, STEP_SILENCE_STARTED,
+    STEP_BUFFERED, STEP_MAX_BUFFER, STEP_SILENCE_TIMEOUT, STEP_PUBLISH
 )
-from session import SpeechState, SpeechSession
 from vad import VoiceActivityDetector
 from audio_processor import AudioProcessor
 from redis_service import RedisService
@@ -87,14 +83,17 @@ class GatewayService:
         self.websocket_handler = WebSocketHandler(self, self.redis_client, self.audio_processor)
         self.health_monitor = HealthMonitor(self.instance_id, self.logger, self.redis_client, self)
 
-        # WebSocket client management
+        # WebSocket client management (only touched from the event loop, so no locking needed)
         self.connected_clients: Dict[str, websockets.WebSocketServerProtocol] = {}
-        self.client_lock = threading.Lock()
 
-        # Session caching for performance
-        self.session_cache: Dict[str, Tuple[SpeechSession, float]] = {}  # client_id -> (session, cache_time)
+        # Session caching for performance: LRU order (oldest first), bounded and swept periodically
+        self.session_cache: "OrderedDict[str, Tuple[SpeechSession, float]]" = OrderedDict()  # client_id -> (session, cache_time)
         self.session_cache_ttl = 30.0  # 30 seconds TTL
-        self.cache_lock = threading.Lock()
+
+        # Live progress line only on an interactive terminal, throttled to 10 Hz;
+        # otherwise progress goes to debug logging
+        self.tty_progress = CONFIG.debug_tty and sys.stdout.isatty()
+        self.last_progress_print = 0.0
 
         # Metrics
         self.metrics = {
@@ -120,52 +119,92 @@ class GatewayService:
             self.logger.error(f"Error initializing VAD models: {e}")
             raise
 
-    def detect_speech_activity(self, audio_chunk: bytes) -> bool:
+    async def detect_speech_activity(self, audio_chunk: bytes) -> bool:
         """Detect speech activity using the VoiceActivityDetector"""
-        return self.vad_detector.detect_speech_activity(audio_chunk)
+        return await self.vad_detector.detect_speech_activity(audio_chunk)
     async def load_session(self, client_id: str) -> SpeechSession:
         """Load session state from cache or Redis using RedisClient"""
-        current_time = time.time()
+        current_time = time.monotonic()
 
         # Check cache first
-        with self.cache_lock:
-            if client_id in self.session_cache:
-                session, cache_time = self.session_cache[client_id]
-                if current_time - cache_time < self.session_cache_ttl:
-                    return session
-                else:
-                    # Cache expired, remove it
-                    del self.session_cache[client_id]
+        session, cache_time = self.session_cache.get(client_id, (None, 0.0))
+        if session is not None and current_time - cache_time >= self.session_cache_ttl and not session.dirty:
+            # Cache expired, remove it
+            del self.session_cache[client_id]
+            session = None
+        if session is not None:
+            if session.dirty and current_time - cache_time >= self.session_cache_ttl:
+                # Never drop unsaved changes: write them back and keep serving the cached copy
+                await self.save_session(client_id, session)
+            else:
+                self.session_cache.move_to_end(client_id)
+            return session
 
         # Load from Redis
         session = await self.redis_client.load_session(client_id)
+        session.last_flush_ts = current_time
 
         # Cache the session
-        with self.cache_lock:
-            self.session_cache[client_id] = (session, current_time)
+        await self._cache_session(client_id, session, current_time)
 
         return session
 
+    async def _cache_session(self, client_id: str, session: SpeechSession, cache_time: float):
+        """Insert/refresh a cache entry as most recently used and evict the oldest beyond the cap"""
+        self.session_cache[client_id] = (session, cache_time)
+        self.session_cache.move_to_end(client_id)
+        while len(self.session_cache) > CONFIG.max_cached_sessions:
+            evicted_id, (evicted, _) = self.session_cache.popitem(last=False)
+            if evicted.dirty:
+                await self.redis_client.save_session(evicted_id, evicted)
+                evicted.dirty = False
+
+    async def session_cache_sweeper(self):
+        """Periodically drop cache entries older than the TTL, writing back unsaved changes first"""
+        while True:
+            await asyncio.sleep(self.session_cache_ttl)
+            now = time.monotonic()
+            expired = [(client_id, session) for client_id, (session, cache_time) in self.session_cache.items()
+                       if now - cache_time >= self.session_cache_ttl]
+            for client_id, session in expired:
+                try:
+                    if session.dirty:
+                        await self.redis_client.save_session(client_id, session)
+                        session.dirty = False
+                except Exception as e:
+                    self.logger.error(f"Failed to flush session for client {client_id} before cache eviction: {e}")
+                    continue
+                # Only drop the entry if it wasn't refreshed while we were flushing
+                entry = self.session_cache.get(client_id)
+                if entry is not None and entry[0] is session and now - entry[1] >= self.session_cache_ttl:
+                    del self.session_cache[client_id]
+
     async def save_session(self, client_id: str, session: SpeechSession):
         """Save session state to Redis using RedisClient and update cache"""
         await self.redis_client.save_session(client_id, session)
+        session.dirty = False
+        session.last_flush_ts = time.monotonic()
 
         # Update cache with fresh data
-        with self.cache_lock:
-            self.session_cache[client_id] = (session, time.time())
+        await self._cache_session(client_id, session, session.last_flush_ts)
+
+    async def save_session_debounced(self, client_id: str, session: SpeechSession, force: bool = False):
+        """Mark the session dirty and write it to Redis only if forced or the flush interval has elapsed.
+        The cached session stays authoritative for this gateway in between."""
+        session.dirty = True
+        if force or time.monotonic() - session.last_flush_ts >= CONFIG.session_flush_interval_seconds:
+            await self.save_session(client_id, session)
 
     async def delete_session(self, client_id: str):
         """Delete session from Redis using RedisClient and clear cache"""
         await self.redis_client.delete_session(client_id)
 
         # Remove from cache
-        with self.cache_lock:
-            self.session_cache.pop(client_id, None)
+        self.session_cache.pop(client_id, None)
 
     def invalidate_session_cache(self, client_id: str):
         """Invalidate session cache for a specific client"""
-        with self.cache_lock:
-            self.session_cache.pop(client_id, None)
+        self.session_cache.pop(client_id, None)
 
     async def publish_audio_job(self, client_id: str, session: SpeechSession, is_final: bool = False):
         """Publish audio segment to Redis Stream using RedisClient"""
@@ -179,25 +218,26 @@ class GatewayService:
         job_in_flight = self.redis_client.job_in_flight.get(client_id, False)
         buffer_has_new_data = len(session.audio_buffer) > session.last_published_len
         new_audio_bytes = len(session.audio_buffer) - session.last_published_len
-        new_audio_seconds = new_audio_bytes / (SAMPLE_RATE * 2)
+        new_audio_seconds = new_audio_bytes * CONFIG.inv_bytes_per_second
         
         # Calculate speech-only bytes for threshold checking
         # If we have a silence marker, only count audio AFTER the silence marker as "new speech"
         if session.silence_buffer_start_len > 0 and session.silence_buffer_start_len > session.last_published_len:
             # We resumed speech after silence - only count audio after silence_buffer_start_len
             new_speech_bytes = max(0, len(session.audio_buffer) - session.silence_buffer_start_len)
-            new_speech_seconds = new_speech_bytes / (SAMPLE_RATE * 2)
-            self.logger.debug(f"[THRESHOLD_CALC] Client {client_id} resumed after silence: new_speech={new_speech_seconds:.2f}s (excluding {(session.silence_buffer_start_len - session.last_published_len) / (SAMPLE_RATE * 2):.2f}s silence)")
+            new_speech_seconds = new_speech_bytes * CONFIG.inv_bytes_per_second
+            self.logger.debug("[THRESHOLD_CALC] Client %s resumed after silence: new_speech=%.2fs (excluding %.2fs silence)",
+                              client_id, new_speech_seconds, (session.silence_buffer_start_len - session.last_published_len) * CONFIG.inv_bytes_per_second)
         else:
             # Normal case - no silence period to exclude
             new_speech_bytes = new_audio_bytes
             new_speech_seconds = new_audio_seconds
         
-        new_audio_meets_minimum = new_speech_seconds >= MINIMUM_NEW_AUDIO_SECONDS
+        new_audio_meets_minimum = new_speech_seconds >= CONFIG.minimum_new_audio_seconds
 
         if (force_publish or not job_in_flight) and buffer_has_new_data and (force_publish or new_audio_meets_minimum):
             job_buffer_size = len(session.audio_buffer) - session.last_published_len
-            job_seconds = job_buffer_size / (SAMPLE_RATE * 2)
+            job_seconds = job_buffer_size * CONFIG.inv_bytes_per_second
             self.logger.info(f"Sent {'final ' if is_final else ''}job ({job_seconds:.2f}s new audio, {new_speech_seconds:.2f}s new speech) to STT_WORKER for client {client_id}")
             await self.publish_audio_job(client_id, session, is_final)
             session.last_published_len = len(session.audio_buffer)
@@ -207,137 +247,107 @@ class GatewayService:
                 self.redis_client.job_in_flight[client_id] = True
             return True
         elif not new_audio_meets_minimum and not force_publish:
-            self.logger.debug(f"[JOB_WAIT_MINIMUM] Client {client_id} waiting for minimum new speech ({new_speech_seconds:.2f}/{MINIMUM_NEW_AUDIO_SECONDS:.2f}s)")
+            self.logger.debug("[JOB_WAIT_MINIMUM] Client %s waiting for minimum new speech (%.2f/%.2fs)", client_id, new_speech_seconds, CONFIG.minimum_new_audio_seconds)
         elif job_in_flight and not force_publish:
-            self.logger.debug(f"[JOB_WAIT] Client {client_id} waiting for previous job to complete before sending new job")
+            self.logger.debug("[JOB_WAIT] Client %s waiting for previous job to complete before sending new job", client_id)
         else:
-            self.logger.debug(f"[JOB_SKIP] Client {client_id} no new audio data to send")
+            self.logger.debug("[JOB_SKIP] Client %s no new audio data to send", client_id)
         return False
 
-    async def subscribe_to_results(self):
-        """Subscribe to results channel using RedisClient"""
-        await self.redis_client.subscribe_to_results()
-
-
-    def decode_and_resample(self, audio_data: bytes, original_sample_rate: int, target_sample_rate: int = SAMPLE_RATE) -> bytes:
+    def decode_and_resample(self, audio_data: bytes, original_sample_rate: int, target_sample_rate: int = CONFIG.sample_rate) -> bytes:
         """Resample audio using the AudioProcessor"""
         return self.audio_processor.decode_and_resample(audio_data, original_sample_rate, target_sample_rate)
 
+    def show_progress(self, msg: str, *args):
+        """Render the single-line progress display, or log it at debug level (formatted lazily)"""
+        if not self.tty_progress:
+            self.logger.debug(msg, *args)
+            return
+        now = time.monotonic()
+        if now - self.last_progress_print >= 0.1:
+            self.last_progress_print = now
+            print("\r" + (msg % args), end="", flush=True)
+
     async def process_audio_chunk(self, client_id: str, audio_chunk: bytes) -> bool:
         """Process audio chunk and send job only if no job is in flight for this client. When silence is detected, always send a final job before clearing the buffer."""
-        self.logger.debug(f"[PROCESS_CHUNK] Client {client_id} processing audio chunk: {len(audio_chunk)} bytes")
+        self.logger.debug("[PROCESS_CHUNK] Client %s processing audio chunk: %d bytes", client_id, len(audio_chunk))
 
-        session = await self.load_session(client_id)
-
-        self.logger.debug(f"[SESSION_STATE] Client {client_id} session state: {session.state.value}, buffer: {len(session.audio_buffer)} bytes, pre-speech: {len(session.pre_speech_buffer)} bytes")
+        # One clock read per chunk (monotonic, so wall-clock adjustments can't break the silence timer)
+        now = time.monotonic()
 
-        # Always maintain rolling pre-speech buffer for potential future speech detection
-        pre_speech_max_bytes = int(PRE_SPEECH_BUFFER_SECONDS * SAMPLE_RATE * 2)
-        original_pre_speech_len = len(session.pre_speech_buffer)
-        session.pre_speech_buffer.extend(audio_chunk)
-        if len(session.pre_speech_buffer) > pre_speech_max_bytes:
-            excess_bytes = len(session.pre_speech_buffer) - pre_speech_max_bytes
-            session.pre_speech_buffer = session.pre_speech_buffer[excess_bytes:]
-            self.logger.debug(f"[PRE_SPEECH_TRIMMED] Client {client_id} pre-speech buffer trimmed by {excess_bytes} bytes")
+        session = await self.load_session(client_id)
+        state_before = session.state
 
-        self.logger.debug(f"[BUFFER_UPDATED] Client {client_id} pre-speech buffer: {original_pre_speech_len} -> {len(session.pre_speech_buffer)} bytes")
+        self.logger.debug("[SESSION_STATE] Client %s session state: %s, buffer: %d bytes, pre-speech: %d bytes",
+                          client_id, session.state.value, len(session.audio_buffer), len(session.pre_speech_buffer))
 
         # Detect speech activity
-        has_speech = self.detect_speech_activity(audio_chunk)
-        self.logger.debug(f"[SPEECH_DETECTED] Client {client_id} speech detected: {has_speech}")
-
-        # Max buffer enforcement
-        max_audio_buffer_bytes = int(MAX_AUDIO_BUFFER_SECONDS * SAMPLE_RATE * 2)
-        buffer_exceeded = False
-
-        if has_speech:
-            if session.state == SpeechState.INACTIVE:
-                original_buffer_len = len(session.audio_buffer)
-                session.audio_buffer.extend(session.pre_speech_buffer)
-                session.accumulated_audio_bytes += len(session.pre_speech_buffer)
-                session.start_speech()
-                # Start silence timer when recording begins
-                session.silence_start_time = time.time()
-                self.logger.info(f"Voice detected, activating buffer for client {client_id}.")
-            elif session.state == SpeechState.SILENCE:
-                # Mark where silence buffer started before resuming speech
-                session.silence_buffer_start_len = len(session.audio_buffer)
-                session.start_speech()
-                # Reset silence timer when resuming from silence
-                session.silence_start_time = time.time()
-                self.logger.debug(f"[SPEECH_RESUME] Client {client_id} speech resumed from silence, timer reset, silence buffer marked at {session.silence_buffer_start_len} bytes")
-            elif session.state == SpeechState.ACTIVE:
-                # Reset silence timer when speech is detected during active recording
-                session.silence_start_time = time.time()
-                self.logger.debug(f"[SPEECH_DETECTED_ACTIVE] Client {client_id} speech detected, resetting silence timer")
-
-        # Detect when we're transitioning from speech to silence
-        if session.state == SpeechState.ACTIVE and not has_speech:
-            # No speech detected during active recording - entering silence period
-            if session.silence_start_time is None:
-                session.silence_start_time = time.time()
-                session.silence_buffer_start_len = len(session.audio_buffer)
-                self.logger.debug(f"[SILENCE_START] Client {client_id} entering silence period, marking buffer at {session.silence_buffer_start_len} bytes")
-
-        # Once buffer is activated (ACTIVE state), accumulate ALL audio chunks regardless of speech detection
-        if session.state == SpeechState.ACTIVE:
-            original_buffer_len = len(session.audio_buffer)
-            session.audio_buffer.extend(audio_chunk)
-            session.accumulated_audio_bytes += len(audio_chunk)
-            # Dynamic buffer size display
-            print(f"\rBuffer's current size: {session.buffer_seconds:.2f}", end="", flush=True)
-
-            # Enforce max buffer size
-            if len(session.audio_buffer) > max_audio_buffer_bytes:
-                self.logger.warning(f"Exceeded MAX_AUDIO_BUFFER_SECONDS, resetting buffer for client {client_id}")
-                if SEND_FINAL_JOB_ON_MAX_BUFFER:
-                    # Send a final job before clearing buffer and resetting session
-                    await self.publish_job_if_needed(client_id, session, is_final=True, force_publish=True)
-                else:
-                    self.logger.debug(f"[FINAL_JOB_DISABLED] Client {client_id} final job sending disabled by config")
-                # Clear buffer and reset session
-                session.end_speech_session()
-                await self.save_session(client_id, session)
-                return True
-        else:
-            self.logger.debug(f"[NO_SPEECH] Client {client_id} no speech detected in audio chunk")
+        has_speech = await self.detect_speech_activity(audio_chunk)
+        self.logger.debug("[SPEECH_DETECTED] Client %s speech detected: %s", client_id, has_speech)
+
+        # State machine and buffer accounting (no I/O); the returned actions drive publishing below
+        action = session.step(audio_chunk, has_speech, now)
+
+        if action & STEP_SPEECH_STARTED:
+            self.logger.info(f"Voice detected, activating buffer for client {client_id}.")
+        elif action & STEP_SPEECH_RESUMED:
+            self.logger.debug("[SPEECH_RESUME] Client %s speech resumed from silence, timer reset, silence buffer marked at %d bytes", client_id, session.silence_buffer_start_len)
+        elif action & STEP_SILENCE_STARTED:
+            self.logger.debug("[SILENCE_START] Client %s entering silence period, marking buffer at %d bytes", client_id, session.silence_buffer_start_len)
+
+        if not action & STEP_BUFFERED:
+            self.logger.debug("[NO_SPEECH] Client %s no speech detected in audio chunk", client_id)
+            await self.save_session_debounced(client_id, session, force=session.state is not state_before)
+            self.metrics["audio_chunks_processed"] += 1
+            return False
+
+        # Dynamic buffer size display
+        self.show_progress("Buffer's current size: %.2f", session.buffer_seconds)
+
+        if action & STEP_MAX_BUFFER:
+            self.logger.warning(f"Exceeded MAX_AUDIO_BUFFER_SECONDS, resetting buffer for client {client_id}")
+            if CONFIG.send_final_job_on_max_buffer:
+                # Send a final job before clearing buffer and resetting session
+                await self.publish_job_if_needed(client_id, session, is_final=True, force_publish=True)
+            else:
+                self.logger.debug("[FINAL_JOB_DISABLED] Client %s final job sending disabled by config", client_id)
+            # Clear buffer and reset session
+            session.end_speech_session()
+            await self.save_session(client_id, session)
+            return True
 
         # Continuous silence detection during ACTIVE recording
-        if session.state == SpeechState.ACTIVE and session.silence_start_time is not None:
-            silence_duration = time.time() - session.silence_start_time
+        if session.silence_start_time is not None:
+            silence_threshold_seconds = CONFIG.silence_threshold_seconds
+            silence_duration = now - session.silence_start_time
             # Create progress bar for silence
-            progress = min(silence_duration / SILENCE_THRESHOLD_SECONDS, 1.0)
+            progress = min(silence_duration / silence_threshold_seconds, 1.0)
             filled = int(progress * 10)
             bar = "=" * filled + "-" * (10 - filled)
-            print(f"\rSilence during recording: [{bar}] {silence_duration:.1f} / {SILENCE_THRESHOLD_SECONDS:.1f}s", end="", flush=True)
-
-            if silence_duration >= SILENCE_THRESHOLD_SECONDS:
-                self.logger.info(f"Exceeded SILENCE_THRESHOLD_SECONDS, resetting buffer for client {client_id}")
-                buffer_len = len(session.audio_buffer)
-                # Always send a final job if there is any audio left, even if a job is in flight
-                # Mark job as not in flight so final job can be sent
-                self.redis_client.job_in_flight[client_id] = False
-                await self.publish_job_if_needed(client_id, session, is_final=True, force_publish=True)
-                # Only clear buffer after final job is sent
-                session.end_speech_session()
-                await self.save_session(client_id, session)
-                return True
+            self.show_progress("Silence during recording: [%s] %.1f / %.1fs", bar, silence_duration, silence_threshold_seconds)
+
+        if action & STEP_SILENCE_TIMEOUT:
+            self.logger.info(f"Exceeded SILENCE_THRESHOLD_SECONDS, resetting buffer for client {client_id}")
+            # Always send a final job if there is any audio left, even if a job is in flight
+            # Mark job as not in flight so final job can be sent
+            self.redis_client.job_in_flight[client_id] = False
+            await self.publish_job_if_needed(client_id, session, is_final=True, force_publish=True)
+            # Only clear buffer after final job is sent
+            session.end_speech_session()
+            await self.save_session(client_id, session)
+            return True
 
         # Only send a job if no job is in flight for this client and there is audio to send
-        # BUT: During silence periods, don't send any jobs (wait for either speech resume or silence timeout)
-        if session.state == SpeechState.ACTIVE:
-            # Check if we're currently in a silence period
-            in_silence_period = (session.silence_start_time is not None and 
-                                 session.silence_buffer_start_len > 0 and 
-                                 len(session.audio_buffer) > session.silence_buffer_start_len)
-            
-            if in_silence_period:
-                self.logger.debug(f"[JOB_SKIP_SILENCE] Client {client_id} in silence period, not sending job")
-            else:
-                self.logger.debug(f"[JOB_CHECK] Client {client_id} job in flight: {self.redis_client.job_in_flight.get(client_id, False)}, buffer has new data: {len(session.audio_buffer) > session.last_published_len} ({len(session.audio_buffer)} > {session.last_published_len})")
-                await self.publish_job_if_needed(client_id, session, is_final=False)
+        if action & STEP_PUBLISH:
+            self.logger.debug("[JOB_CHECK] Client %s job in flight: %s, buffer has new data: %s (%d > %d)",
+                              client_id, self.redis_client.job_in_flight.get(client_id, False),
+                              len(session.audio_buffer) > session.last_published_len, len(session.audio_buffer), session.last_published_len)
+            await self.publish_job_if_needed(client_id, session, is_final=False)
+        else:
+            self.logger.debug("[JOB_SKIP_SILENCE] Client %s in silence period, not sending job", client_id)
 
-        await self.save_session(client_id, session)
+        # Buffer growth alone is deferred; state transitions are written through immediately
+        await self.save_session_debounced(client_id, session, force=session.state is not state_before)
         self.metrics["audio_chunks_processed"] += 1
         return False
 
@@ -369,32 +379,34 @@ async def main():
         # Start health server
         await service.start_health_server()
 
-        # Start results subscription
-        service.logger.debug("Gateway starting results subscription task")
-        asyncio.create_task(service.subscribe_to_results())
-        service.logger.debug("Gateway results subscription task started")
-
-        service.logger.info(f"Starting Gateway Service on port {GATEWAY_PORT}")
-        service.logger.info(f"Health server on port {HEALTH_PORT}")
-        service.logger.info(f"Redis: {REDIS_URL}")
-        service.logger.info(f"Silence threshold: {SILENCE_THRESHOLD_SECONDS}s")
-        service.logger.info(f"Pre-speech buffer: {PRE_SPEECH_BUFFER_SECONDS}s")
-        service.logger.info(f"Minimum new audio: {MINIMUM_NEW_AUDIO_SECONDS}s")
-        service.logger.info(f"Session expiration: {SESSION_EXPIRATION_SECONDS}s")
+        # Start the results dispatcher and cache sweeper (referenced here so they can't be garbage collected)
+        background_tasks = [
+            asyncio.create_task(service.redis_client.subscribe_to_results()),
+            asyncio.create_task(service.session_cache_sweeper()),
+        ]
+        service.logger.debug("Gateway started %d background tasks", len(background_tasks))
+
+        service.logger.info(f"Starting Gateway Service on port {CONFIG.gateway_port}")
+        service.logger.info(f"Health server on port {CONFIG.health_port}")
+        service.logger.info(f"Redis: {CONFIG.redis_url}")
+        service.logger.info(f"Silence threshold: {CONFIG.silence_threshold_seconds}s")
+        service.logger.info(f"Pre-speech buffer: {CONFIG.pre_speech_buffer_seconds}s")
+        service.logger.info(f"Minimum new audio: {CONFIG.minimum_new_audio_seconds}s")
+        service.logger.info(f"Session expiration: {CONFIG.session_expiration_seconds}s")
 
         # Print initialization variables
-        buffer_size = int(MAX_AUDIO_BUFFER_SECONDS * SAMPLE_RATE * 2)  # Calculate buffer size in bytes
+        buffer_size = CONFIG.max_audio_buffer_bytes
         service.logger.info("Gateway initialization complete")
-        service.logger.info(f"Audio Configuration: SAMPLE_RATE={SAMPLE_RATE}, BUFFER_SIZE={buffer_size}")
-        service.logger.info(f"VAD Configuration: WEBRTC_SENSITIVITY={WEBRTC_SENSITIVITY}, SILERO_SENSITIVITY={SILERO_SENSITIVITY}")
-        service.logger.info(f"Buffer Configuration: PRE_SPEECH_BUFFER_SECONDS={PRE_SPEECH_BUFFER_SECONDS}, MINIMUM_NEW_AUDIO_SECONDS={MINIMUM_NEW_AUDIO_SECONDS}, MAX_AUDIO_BUFFER_SECONDS={MAX_AUDIO_BUFFER_SECONDS}")
-        service.logger.info(f"Audio Enhancement: ENABLED={ENABLE_AUDIO_ENHANCEMENT}, VOLUME_BOOST={AUDIO_VOLUME_BOOST_DB}dB")
+        service.logger.info(f"Audio Configuration: SAMPLE_RATE={CONFIG.sample_rate}, BUFFER_SIZE={buffer_size}")
+        service.logger.info(f"VAD Configuration: WEBRTC_SENSITIVITY={CONFIG.webrtc_sensitivity}, SILERO_SENSITIVITY={CONFIG.silero_sensitivity}")
+        service.logger.info(f"Buffer Configuration: PRE_SPEECH_BUFFER_SECONDS={CONFIG.pre_speech_buffer_seconds}, MINIMUM_NEW_AUDIO_SECONDS={CONFIG.minimum_new_audio_seconds}, MAX_AUDIO_BUFFER_SECONDS={CONFIG.max_audio_buffer_seconds}")
+        service.logger.info(f"Audio Enhancement: ENABLED={CONFIG.enable_audio_enhancement}, VOLUME_BOOST={CONFIG.audio_volume_boost_db}dB")
 
         # Start WebSocket server
         server = await websockets.serve(
             service.handle_client,
             "0.0.0.0",
-            GATEWAY_PORT,
+            CONFIG.gateway_port,
             max_size=None
         )
 
@@ -407,5 +419,11 @@ async def main():
         raise
 
 if __name__ == "__main__":
+    try:
+        # libuv-based event loop; not available on Windows, where the default loop is used
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
 
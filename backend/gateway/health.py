@@ -5,13 +5,226 @@ Provides HTTP health check endpoints and comprehensive metrics collection.
 Handles CORS setup and server lifecycle management.
 """
 
+import asyncio
+import os
 import time
 import logging
-import json
+import hashlib
+import html
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+import aiohttp
+import orjson
 from aiohttp import web
-import aiohttp_cors
 
-from config import HEALTH_PORT, MAX_QUEUE_DEPTH
+from config import CONFIG
+
+# /health bodies (metrics + timestamp) are at most this stale
+HEALTH_SNAPSHOT_INTERVAL_SECONDS = 1.0
+# Queue depth reported by /metrics and discovery is at most this stale
+QUEUE_DEPTH_CACHE_SECONDS = 0.1
+# Client-generated auth session ids (e.g. secrets.token_urlsafe(16)) longer than this are ignored
+MAX_AUTH_SESSION_ID_LENGTH = 64
+# Shared key for clients that don't send a sid
+_LEGACY_AUTH_SESSION_KEY = "auth_session:latest"
+# /auth/status holds a pending request this long for the OAuth callback before answering unauthenticated
+AUTH_STATUS_LONG_POLL_SECONDS = 25.0
+# At most this many /auth/status requests long-poll at once (each holds a pooled Redis connection);
+# beyond that they answer right away and the client polls again
+MAX_AUTH_STATUS_WAITERS = 100
+# Completed OAuth results are kept in Redis this long for the client to pick up
+AUTH_RESULT_TTL_SECONDS = 300
+# Verified JWT payloads are reused by /auth/validate for this long (bounded by the token's exp)
+JWT_CACHE_TTL_SECONDS = 60
+JWT_CACHE_MAX_ENTRIES = 10000
+
+# Success page returned from the OAuth callback, pre-encoded once and split around
+# the provider name so each callback only concatenates three byte strings
+_AUTH_SUCCESS_HTML_PREFIX, _AUTH_SUCCESS_HTML_SUFFIX = """\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Authentication Successful</title>
+    <style>
+        :root {
+            --background: oklch(0.145 0 0);
+            --foreground: oklch(0.985 0 0);
+            --card: oklch(0.145 0 0);
+            --primary: oklch(0.6 0.12 240);
+            --primary-foreground: oklch(0.985 0 0);
+            --border: oklch(0.269 0 0);
+            --radius: 0.625rem;
+        }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+            background-color: var(--background);
+            color: var(--foreground);
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            min-height: 100vh;
+            margin: 0;
+            padding: 20px;
+            box-sizing: border-box;
+        }
+        .container {
+            position: relative;
+            width: 100%;
+            max-width: 480px;
+            background-color: var(--card);
+            border: 1px solid var(--border);
+            border-radius: var(--radius);
+            padding: 48px;
+            text-align: center;
+            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
+            overflow: hidden;
+        }
+        .glow {
+            position: absolute;
+            top: 0;
+            left: 50%;
+            transform: translateX(-50%);
+            width: 200%;
+            height: 200px;
+            background: radial-gradient(circle, oklch(0.6 0.12 240 / 0.15), transparent 60%);
+            pointer-events: none;
+            z-index: 0;
+        }
+        .content {
+            position: relative;
+            z-index: 1;
+        }
+        .icon {
+            font-size: 48px;
+            line-height: 1;
+            margin-bottom: 24px;
+        }
+        h1 {
+            font-size: 24px;
+            font-weight: 600;
+            margin: 0 0 12px;
+        }
+        p {
+            color: oklch(0.708 0 0);
+            margin: 0 0 32px;
+            font-size: 16px;
+            line-height: 1.6;
+        }
+        .close-btn {
+            background-color: var(--primary);
+            color: var(--primary-foreground);
+            border: none;
+            border-radius: calc(var(--radius) - 2px);
+            padding: 12px 24px;
+            font-size: 16px;
+            font-weight: 500;
+            cursor: pointer;
+            transition: background-color 0.2s ease;
+            width: 100%;
+        }
+        .close-btn:hover {
+            background-color: oklch(0.6 0.12 240 / 0.9);
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="glow"></div>
+        <div class="content">
+            <div class="icon">🚀</div>
+            <h1>Authentication Successful</h1>
+            <p>You've successfully connected with {provider_name}. You can now close this window and return to Nova app.</p>
+            <button class="close-btn" onclick="window.close()">Close Window</button>
+        </div>
+    </div>
+    <script>
+        setTimeout(() => {
+            window.close();
+        }, 5000);
+    </script>
+</body>
+</html>
+""".encode('utf-8').split(b"{provider_name}")
+# Complete page per provider name (a handful of fixed names), built on first use
+_AUTH_SUCCESS_HTML_CACHE = {}
+
+
+def _auth_success_html(provider_name: str) -> bytes:
+    """Success page body for a provider; bytes bodies are sent with Content-Length, not chunked"""
+    body = _AUTH_SUCCESS_HTML_CACHE.get(provider_name)
+    if body is None:
+        body = _AUTH_SUCCESS_HTML_PREFIX + html.escape(provider_name).encode('utf-8') + _AUTH_SUCCESS_HTML_SUFFIX
+        _AUTH_SUCCESS_HTML_CACHE[provider_name] = body
+    return body
+
+
+def _json_response(data, status: int = 200) -> web.Response:
+    """JSON response serialized with orjson (bytes straight into the body, no str round trip)"""
+    return web.Response(body=orjson.dumps(data), status=status, content_type='application/json')
+
+
+@web.middleware
+async def _cors_middleware(request, handler):
+    """Permissive CORS (any origin, credentials allowed); preflights are answered without routing"""
+    origin = request.headers.get('Origin')
+    if origin is None:
+        return await handler(request)
+
+    if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+        headers = {
+            'Access-Control-Allow-Origin': origin,
+            'Access-Control-Allow-Credentials': 'true',
+            'Access-Control-Allow-Methods': request.headers['Access-Control-Request-Method'],
+            'Vary': 'Origin',
+        }
+        requested_headers = request.headers.get('Access-Control-Request-Headers')
+        if requested_headers:
+            headers['Access-Control-Allow-Headers'] = requested_headers
+        return web.Response(headers=headers)
+
+    response = await handler(request)
+    # Credentialed requests can't use a '*' origin, so the request origin is echoed back
+    response.headers['Access-Control-Allow-Origin'] = origin
+    response.headers['Access-Control-Allow-Credentials'] = 'true'
+    response.headers['Vary'] = 'Origin'
+    return response
+
+
+def _auth_session_key(sid) -> str:
+    """Redis key holding a completed OAuth result for polling.
+
+    Each login flow carries its own session id (`sid` in the OAuth state and on the
+    status/logout query string); clients that don't send one share the legacy key.
+    """
+    if sid and len(sid) <= MAX_AUTH_SESSION_ID_LENGTH:
+        return f"auth_session:{sid}"
+    return _LEGACY_AUTH_SESSION_KEY
+
+
+def _auth_ready_channel(auth_key: str) -> str:
+    """Pub/sub channel the OAuth callback publishes the result on"""
+    return f"{auth_key}:ready"
+
+
+def _github_primary_email(user_info, emails):
+    """Use the primary address from GitHub's /user/emails (the profile email may be private)"""
+    primary_email = next((email for email in emails if email.get('primary')), None)
+    if primary_email:
+        user_info['email'] = primary_email['email']
+
+
+def _github_name(user_info):
+    return user_info.get('name') or user_info.get('login', '')
+
+
+def _microsoft_email(user_info):
+    return user_info.get('mail') or user_info.get('userPrincipalName', '')
+
+
+def _discord_avatar(user_info):
+    avatar = user_info.get('avatar')
+    return f"https://cdn.discordapp.com/avatars/{user_info['id']}/{avatar}.png" if avatar else ''
 
 
 class HealthMonitor:
@@ -22,25 +235,81 @@ class HealthMonitor:
         self.logger = logger
         self.redis_client = redis_client
         self.gateway_service = gateway_service
-
-    async def health_check_handler(self, request):
-        """Health check endpoint"""
-        return web.json_response({
+        # Shared HTTP client for OAuth provider calls (keeps TLS connections alive between callbacks)
+        self._http: aiohttp.ClientSession | None = None
+        self._provider_configs = self._build_provider_configs()
+        # Pre-serialized /health body, refreshed in the background so probes don't re-serialize
+        self._health_snapshot = b""
+        self._health_snapshot_task = None
+        # (queue_depth, monotonic fetch time) shared by /metrics and discovery
+        self._queue_depth_cache = (0, float("-inf"))
+        # blake2b(token) -> (payload, valid_until) for /auth/validate, oldest first
+        self._jwt_cache: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        # /auth/status requests currently long-polling
+        self._auth_status_waiters = 0
+
+    def _get_http(self) -> aiohttp.ClientSession:
+        """Return the shared OAuth HTTP client, creating it on first use"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+                limit=100, limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=60
+            ))
+        return self._http
+
+    async def _close_http(self, app=None):
+        """Close the shared OAuth HTTP client (aiohttp on_cleanup hook)"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    def _refresh_health_snapshot(self):
+        """Serialize the current /health body"""
+        self._health_snapshot = orjson.dumps({
             "status": "healthy",
             "instance_id": self.instance_id,
             "timestamp": time.time(),
             "metrics": self.gateway_service.metrics
         })
 
+    async def _health_snapshot_loop(self):
+        """Re-serialize the /health body every HEALTH_SNAPSHOT_INTERVAL_SECONDS"""
+        while True:
+            await asyncio.sleep(HEALTH_SNAPSHOT_INTERVAL_SECONDS)
+            self._refresh_health_snapshot()
+
+    async def _stop_health_snapshot(self, app=None):
+        """Stop the snapshot refresh task (aiohttp on_cleanup hook)"""
+        if self._health_snapshot_task is not None:
+            self._health_snapshot_task.cancel()
+            self._health_snapshot_task = None
+
+    async def health_check_handler(self, request):
+        """Health check endpoint (serves the latest pre-serialized snapshot)"""
+        return web.Response(
+            body=self._health_snapshot,
+            content_type='application/json',
+            headers={'Cache-Control': 'no-cache'}
+        )
+
+    async def _cached_queue_depth(self) -> int:
+        """Redis stream queue depth, re-read at most every QUEUE_DEPTH_CACHE_SECONDS"""
+        now = time.monotonic()
+        queue_depth, fetched_at = self._queue_depth_cache
+        if now - fetched_at < QUEUE_DEPTH_CACHE_SECONDS:
+            return queue_depth
+        queue_depth = await self.redis_client.get_queue_depth()
+        self._queue_depth_cache = (queue_depth, now)
+        return queue_depth
+
     async def metrics_handler(self, request):
         """Metrics endpoint"""
-        # Get Redis queue depth using RedisClient
-        queue_depth = await self.redis_client.get_queue_depth()
+        # Get Redis queue depth using RedisClient (briefly cached across probes)
+        queue_depth = await self._cached_queue_depth()
 
-        return web.json_response({
+        return _json_response({
             "instance_id": self.instance_id,
             "queue_depth": queue_depth,
-            "max_queue_depth": MAX_QUEUE_DEPTH,
+            "max_queue_depth": CONFIG.max_queue_depth,
             "metrics": self.gateway_service.metrics,
             "timestamp": time.time()
         })
@@ -55,7 +324,7 @@ class HealthMonitor:
             required_fields = [provider_id_field, 'email', 'name', 'access_token']
             for field in required_fields:
                 if field not in data:
-                    return web.json_response(
+                    return _json_response(
                         {"success": False, "error": f"Missing required field: {field}"},
                         status=400
                     )
@@ -63,7 +332,7 @@ class HealthMonitor:
             # Create or update user and generate JWT token
             token = await self.gateway_service.create_or_update_user(data)
 
-            return web.json_response({
+            return _json_response({
                 "success": True,
                 "token": token,
                 "user": {
@@ -75,80 +344,68 @@ class HealthMonitor:
 
         except Exception as e:
             self.logger.error(f"{provider.title()} authentication error: {e}")
-            return web.json_response(
+            return _json_response(
                 {"success": False, "error": f"{provider.title()} authentication failed"},
                 status=500
             )
 
-    async def auth_google_handler(self, request):
-        """Google OAuth authentication endpoint"""
-        return await self.auth_oauth_handler(request, "google")
-
-    async def auth_github_handler(self, request):
-        """GitHub OAuth authentication endpoint"""
-        return await self.auth_oauth_handler(request, "github")
-
-    async def auth_microsoft_handler(self, request):
-        """Microsoft OAuth authentication endpoint"""
-        return await self.auth_oauth_handler(request, "microsoft")
-
-    async def auth_discord_handler(self, request):
-        """Discord OAuth authentication endpoint"""
-        return await self.auth_oauth_handler(request, "discord")
+    async def auth_provider_handler(self, request):
+        """OAuth authentication endpoint for any configured provider (route: /auth/oauth/{provider})"""
+        provider = request.match_info.get('provider', '')
+        if provider not in self._provider_configs:
+            return _json_response(
+                {"success": False, "error": f"Unsupported provider: {provider}"},
+                status=400
+            )
+        return await self.auth_oauth_handler(request, provider)
 
     async def auth_callback_handler(self, request):
         """OAuth callback endpoint for handling OAuth redirects"""
         try:
-            import time as time_module
-            callback_start = time_module.time()
+            # Per-stage timings are only measured when debug logging is on
+            timing = self.logger.isEnabledFor(logging.DEBUG)
+            if timing:
+                callback_start = time.monotonic()
 
             # Extract authorization code and provider from query parameters
             code = request.query.get('code')
             state = request.query.get('state', '')
-            provider = 'google'  # Default to google for backward compatibility
 
-            # Parse provider from state parameter (format: provider=github)
-            if state and '=' in state:
-                state_parts = state.split('=')
-                if len(state_parts) == 2 and state_parts[0] == 'provider':
-                    provider = state_parts[1]
+            # Parse provider and auth session id from state (format: provider=github&sid=<sid>)
+            state_params = parse_qs(state)
+            provider = state_params.get('provider', ['google'])[0]  # Default to google for backward compatibility
+            auth_key = _auth_session_key(state_params.get('sid', [None])[0])
 
             self.logger.info(f"[AUTH_CALLBACK] Received callback for provider: {provider}")
 
             if not code:
-                return web.json_response(
+                return _json_response(
                     {"success": False, "error": "Authorization code not provided"},
                     status=400
                 )
 
             # Handle different providers
-            oauth_start = time_module.time()
-            if provider == 'google':
-                user_data, provider_name = await self._handle_google_oauth(code)
-            elif provider == 'github':
-                user_data, provider_name = await self._handle_github_oauth(code)
-            elif provider == 'microsoft':
-                user_data, provider_name = await self._handle_microsoft_oauth(code)
-            elif provider == 'discord':
-                user_data, provider_name = await self._handle_discord_oauth(code)
-            else:
-                return web.json_response(
+            if timing:
+                oauth_start = time.monotonic()
+            provider_config = self._provider_configs.get(provider)
+            if provider_config is None:
+                return _json_response(
                     {"success": False, "error": f"Unsupported provider: {provider}"},
                     status=400
                 )
+            user_data, provider_name = await self._handle_oauth(code, provider_config)
 
-            oauth_end = time_module.time()
-            self.logger.info(f"[AUTH_CALLBACK] OAuth exchange took {oauth_end - oauth_start:.2f}s")
+            if timing:
+                jwt_start = time.monotonic()
+                self.logger.debug("[AUTH_CALLBACK] OAuth exchange took %.2fs", jwt_start - oauth_start)
 
             # Create or update user and generate JWT token
-            jwt_start = time_module.time()
             token = await self.gateway_service.create_or_update_user(user_data)
-            jwt_end = time_module.time()
-            self.logger.info(f"[AUTH_CALLBACK] JWT creation took {jwt_end - jwt_start:.2f}s")
+            if timing:
+                redis_start = time.monotonic()
+                self.logger.debug("[AUTH_CALLBACK] JWT creation took %.2fs", redis_start - jwt_start)
 
             # Store authentication result temporarily in Redis for polling
-            redis_start = time_module.time()
-            auth_key = f"auth_session:latest"
             auth_data = {
                 'token': token,
                 'user': {
@@ -158,141 +415,36 @@ class HealthMonitor:
                 },
                 'timestamp': int(time.time())
             }
-            await self.redis_client.redis.setex(auth_key, 300, json.dumps(auth_data).encode('utf-8'))  # Expire in 5 minutes
-            redis_end = time_module.time()
-            self.logger.info(f"[AUTH_CALLBACK] Redis storage took {redis_end - redis_start:.2f}s")
-
-            callback_end = time_module.time()
-            self.logger.info(f"[AUTH_CALLBACK] Total callback processing: {callback_end - callback_start:.2f}s")
+            auth_payload = orjson.dumps(auth_data)
+            async with self.redis_client.redis.pipeline(transaction=False) as pipe:
+                pipe.setex(auth_key, AUTH_RESULT_TTL_SECONDS, auth_payload)
+                pipe.publish(_auth_ready_channel(auth_key), auth_payload)  # Wake long-polling status requests
+                await pipe.execute()
+            if timing:
+                callback_end = time.monotonic()
+                self.logger.debug("[AUTH_CALLBACK] Redis storage took %.2fs", callback_end - redis_start)
+                self.logger.debug("[AUTH_CALLBACK] Total callback processing: %.2fs", callback_end - callback_start)
 
             # Return HTML page that shows success
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Authentication Successful</title>
-                <style>
-                    :root {{
-                        --background: oklch(0.145 0 0);
-                        --foreground: oklch(0.985 0 0);
-                        --card: oklch(0.145 0 0);
-                        --primary: oklch(0.6 0.12 240);
-                        --primary-foreground: oklch(0.985 0 0);
-                        --border: oklch(0.269 0 0);
-                        --radius: 0.625rem;
-                    }}
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-                        background-color: var(--background);
-                        color: var(--foreground);
-                        display: flex;
-                        align-items: center;
-                        justify-content: center;
-                        min-height: 100vh;
-                        margin: 0;
-                        padding: 20px;
-                        box-sizing: border-box;
-                    }}
-                    .container {{
-                        position: relative;
-                        width: 100%;
-                        max-width: 480px;
-                        background-color: var(--card);
-                        border: 1px solid var(--border);
-                        border-radius: var(--radius);
-                        padding: 48px;
-                        text-align: center;
-                        box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-                        overflow: hidden;
-                    }}
-                    .glow {{
-                        position: absolute;
-                        top: 0;
-                        left: 50%;
-                        transform: translateX(-50%);
-                        width: 200%;
-                        height: 200px;
-                        background: radial-gradient(circle, oklch(0.6 0.12 240 / 0.15), transparent 60%);
-                        pointer-events: none;
-                        z-index: 0;
-                    }}
-                    .content {{
-                        position: relative;
-                        z-index: 1;
-                    }}
-                    .icon {{
-                        font-size: 48px;
-                        line-height: 1;
-                        margin-bottom: 24px;
-                    }}
-                    h1 {{
-                        font-size: 24px;
-                        font-weight: 600;
-                        margin: 0 0 12px;
-                    }}
-                    p {{
-                        color: oklch(0.708 0 0);
-                        margin: 0 0 32px;
-                        font-size: 16px;
-                        line-height: 1.6;
-                    }}
-                    .close-btn {{
-                        background-color: var(--primary);
-                        color: var(--primary-foreground);
-                        border: none;
-                        border-radius: calc(var(--radius) - 2px);
-                        padding: 12px 24px;
-                        font-size: 16px;
-                        font-weight: 500;
-                        cursor: pointer;
-                        transition: background-color 0.2s ease;
-                        width: 100%;
-                    }}
-                    .close-btn:hover {{
-                        background-color: oklch(0.6 0.12 240 / 0.9);
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="glow"></div>
-                    <div class="content">
-                        <div class="icon">🚀</div>
-                        <h1>Authentication Successful</h1>
-                        <p>You've successfully connected with {provider_name}. You can now close this window and return to Nova app.</p>
-                        <button class="close-btn" onclick="window.close()">Close Window</button>
-                    </div>
-                </div>
-                <script>
-                    setTimeout(() => {{
-                        window.close();
-                    }}, 5000);
-                </script>
-            </body>
-            </html>
-            """
-
             return web.Response(
-                text=html_content,
+                body=_auth_success_html(provider_name),
                 content_type='text/html',
+                charset='utf-8',
                 headers={'Cache-Control': 'no-cache'}
             )
 
         except Exception as e:
             self.logger.error(f"OAuth callback error: {e}")
-            return web.json_response(
+            return _json_response(
                 {"success": False, "error": "OAuth callback failed"},
                 status=500
             )
 
     async def _handle_oauth(self, code: str, provider_config: dict):
         """Generic OAuth token exchange and user info retrieval"""
-        import aiohttp
-        import os
-
         provider_name = provider_config['name']
-        client_id = os.getenv(provider_config['client_id_env'])
-        client_secret = os.getenv(provider_config['client_secret_env'])
+        client_id = provider_config['client_id']
+        client_secret = provider_config['client_secret']
 
         if not client_id or not client_secret:
             raise ValueError(f"{provider_name} OAuth credentials not configured")
@@ -303,189 +455,225 @@ class HealthMonitor:
             'client_secret': client_secret,
             'code': code,
             'grant_type': 'authorization_code',
-            'redirect_uri': os.getenv('OAUTH_REDIRECT_URI', 'https://auth.nova-voice.com/auth/callback')
+            'redirect_uri': provider_config['redirect_uri']
         }
 
         # Add provider-specific token data
         if 'token_data_extra' in provider_config:
             token_data.update(provider_config['token_data_extra'])
 
-        async with aiohttp.ClientSession() as session:
-            # Token exchange
-            token_url = provider_config['token_url']
-            token_headers = provider_config.get('token_headers', {})
+        session = self._get_http()
 
-            self.logger.info(f"[OAUTH] Exchanging code with {provider_name}...")
-            token_start = time.time()
-            async with session.post(token_url, headers=token_headers, data=token_data) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"{provider_name} token exchange failed: {error_text}")
+        # Token exchange
+        token_url = provider_config['token_url']
+        token_headers = provider_config.get('token_headers', {})
 
-                tokens = await response.json()
-                access_token = tokens.get('access_token')
-                if not access_token:
-                    raise Exception(f"No access token received from {provider_name}")
+        self.logger.info(f"[OAUTH] Exchanging code with {provider_name}...")
+        timing = self.logger.isEnabledFor(logging.DEBUG)
+        if timing:
+            token_start = time.monotonic()
+        async with session.post(token_url, headers=token_headers, data=token_data) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"{provider_name} token exchange failed: {error_text}")
 
-                token_end = time.time()
-                self.logger.info(f"[OAUTH] Token exchange took {token_end - token_start:.2f}s")
+            tokens = await response.json()
+            access_token = tokens.get('access_token')
+            if not access_token:
+                raise Exception(f"No access token received from {provider_name}")
 
-            # Get user info
-            user_info_url = provider_config['user_info_url']
-            user_info_headers = provider_config['user_info_headers'].copy()
-            user_info_headers['Authorization'] = user_info_headers['Authorization'].format(access_token=access_token)
+            if timing:
+                self.logger.debug("[OAUTH] Token exchange took %.2fs", time.monotonic() - token_start)
 
-            self.logger.info(f"[OAUTH] Fetching user info from {provider_name}...")
-            userinfo_start = time.time()
+        # Get user info
+        user_info_url = provider_config['user_info_url']
+        # Every provider takes the access token as a bearer token
+        authorization = 'Bearer ' + access_token
+        user_info_headers = {**provider_config.get('user_info_headers', {}), 'Authorization': authorization}
+
+        async def fetch_user_info():
             async with session.get(user_info_url, headers=user_info_headers) as response:
                 if response.status != 200:
                     raise Exception(f"Failed to get user info from {provider_name}")
-                user_info = await response.json()
-
-                userinfo_end = time.time()
-                self.logger.info(f"[OAUTH] User info fetch took {userinfo_end - userinfo_start:.2f}s")
-
-            # Handle provider-specific additional requests (like GitHub emails)
-            if 'additional_requests' in provider_config:
-                for req_config in provider_config['additional_requests']:
-                    req_headers = req_config['headers'].copy()
-                    req_headers['Authorization'] = req_headers['Authorization'].format(access_token=access_token)
-
-                    async with session.get(req_config['url'], headers=req_headers) as response:
-                        if response.status == 200:
-                            additional_data = await response.json()
-                            # Apply transformation function
-                            if 'transform' in req_config:
-                                req_config['transform'](user_info, additional_data)
-
-            # Build user data using provider-specific mapping
-            user_data = {
-                'access_token': access_token
-            }
+                return await response.json()
+
+        async def fetch_additional(req_config):
+            req_headers = {**req_config.get('headers', {}), 'Authorization': authorization}
+            async with session.get(req_config['url'], headers=req_headers) as response:
+                if response.status == 200:
+                    return await response.json()
+                return None
+
+        self.logger.info(f"[OAUTH] Fetching user info from {provider_name}...")
+        if timing:
+            userinfo_start = time.monotonic()
+
+        # Provider-specific additional requests (like GitHub emails) only need the access
+        # token, so they run concurrently with the user info fetch instead of after it
+        additional_requests = provider_config.get('additional_requests', [])
+        user_info, *additional_results = await asyncio.gather(
+            fetch_user_info(),
+            *(fetch_additional(req_config) for req_config in additional_requests)
+        )
+
+        if timing:
+            self.logger.debug("[OAUTH] User info fetch took %.2fs", time.monotonic() - userinfo_start)
+
+        for req_config, additional_data in zip(additional_requests, additional_results):
+            # Apply transformation function
+            if additional_data is not None and 'transform' in req_config:
+                req_config['transform'](user_info, additional_data)
+
+        # Build user data using provider-specific mapping
+        user_data = {
+            'access_token': access_token
+        }
 
-            for field, mapping in provider_config['user_data_mapping'].items():
-                if callable(mapping):
-                    user_data[field] = mapping(user_info)
-                else:
-                    user_data[field] = user_info.get(mapping, '')
-
-            return user_data, provider_name
-
-    async def _handle_google_oauth(self, code):
-        """Handle Google OAuth token exchange and user info retrieval"""
-        return await self._handle_oauth(code, {
-            'name': 'Google',
-            'client_id_env': 'GOOGLE_CLIENT_ID',
-            'client_secret_env': 'GOOGLE_CLIENT_SECRET',
-            'token_url': 'https://oauth2.googleapis.com/token',
-            'user_info_url': 'https://www.googleapis.com/oauth2/v2/userinfo',
-            'user_info_headers': {'Authorization': 'Bearer {access_token}'},
-            'user_data_mapping': {
-                'google_id': 'id',
-                'email': 'email',
-                'name': 'name'
-            }
-        })
+        for field, mapping in provider_config['user_data_mapping'].items():
+            if callable(mapping):
+                user_data[field] = mapping(user_info)
+            else:
+                user_data[field] = user_info.get(mapping, '')
 
-    async def _handle_github_oauth(self, code):
-        """Handle GitHub OAuth token exchange and user info retrieval"""
-        def email_transform(user_info, emails):
-            primary_email = next((email for email in emails if email.get('primary')), None)
-            if primary_email:
-                user_info['email'] = primary_email['email']
-
-        return await self._handle_oauth(code, {
-            'name': 'GitHub',
-            'client_id_env': 'GITHUB_CLIENT_ID',
-            'client_secret_env': 'GITHUB_CLIENT_SECRET',
-            'token_url': 'https://github.com/login/oauth/access_token',
-            'token_headers': {'Accept': 'application/json'},
-            'user_info_url': 'https://api.github.com/user',
-            'user_info_headers': {
-                'Authorization': 'Bearer {access_token}',
-                'User-Agent': 'Nova-Voice-App'
-            },
-            'additional_requests': [{
-                'url': 'https://api.github.com/user/emails',
-                'headers': {
-                    'Authorization': 'Bearer {access_token}',
-                    'User-Agent': 'Nova-Voice-App'
-                },
-                'transform': email_transform
-            }],
-            'user_data_mapping': {
-                'github_id': 'id',
-                'email': lambda ui: ui.get('email', ''),
-                'name': lambda ui: ui.get('name') or ui.get('login', ''),
-                'avatar': lambda ui: ui.get('avatar_url', '')
-            }
-        })
+        return user_data, provider_name
 
-    async def _handle_microsoft_oauth(self, code):
-        """Handle Microsoft OAuth token exchange and user info retrieval"""
-        import os
+    def _build_provider_configs(self) -> dict:
+        """Resolve the OAuth provider settings (including env credentials) once"""
+        redirect_uri = os.getenv('OAUTH_REDIRECT_URI', 'https://auth.nova-voice.com/auth/callback')
         tenant_id = os.getenv('MICROSOFT_TENANT_ID', 'common')
 
-        return await self._handle_oauth(code, {
-            'name': 'Microsoft',
-            'client_id_env': 'MICROSOFT_CLIENT_ID',
-            'client_secret_env': 'MICROSOFT_CLIENT_SECRET',
-            'token_url': f'https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token',
-            'user_info_url': 'https://graph.microsoft.com/v1.0/me',
-            'user_info_headers': {'Authorization': 'Bearer {access_token}'},
-            'user_data_mapping': {
-                'microsoft_id': 'id',
-                'email': lambda ui: ui.get('mail') or ui.get('userPrincipalName', ''),
-                'name': lambda ui: ui.get('displayName', '')
-            }
-        })
+        configs = {
+            'google': {
+                'name': 'Google',
+                'client_id': os.getenv('GOOGLE_CLIENT_ID'),
+                'client_secret': os.getenv('GOOGLE_CLIENT_SECRET'),
+                'token_url': 'https://oauth2.googleapis.com/token',
+                'user_info_url': 'https://www.googleapis.com/oauth2/v2/userinfo',
+                'user_data_mapping': {
+                    'google_id': 'id',
+                    'email': 'email',
+                    'name': 'name'
+                }
+            },
+            'github': {
+                'name': 'GitHub',
+                'client_id': os.getenv('GITHUB_CLIENT_ID'),
+                'client_secret': os.getenv('GITHUB_CLIENT_SECRET'),
+                'token_url': 'https://github.com/login/oauth/access_token',
+                'token_headers': {'Accept': 'application/json'},
+                'user_info_url': 'https://api.github.com/user',
+                'user_info_headers': {'User-Agent': 'Nova-Voice-App'},
+                'additional_requests': [{
+                    'url': 'https://api.github.com/user/emails',
+                    'headers': {'User-Agent': 'Nova-Voice-App'},
+                    'transform': _github_primary_email
+                }],
+                'user_data_mapping': {
+                    'github_id': 'id',
+                    'email': 'email',
+                    'name': _github_name,
+                    'avatar': 'avatar_url'
+                }
+            },
+            'microsoft': {
+                'name': 'Microsoft',
+                'client_id': os.getenv('MICROSOFT_CLIENT_ID'),
+                'client_secret': os.getenv('MICROSOFT_CLIENT_SECRET'),
+                'token_url': f'https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token',
+                # Only the fields the mapping reads, so Graph returns a minimal profile in one call
+                'user_info_url': 'https://graph.microsoft.com/v1.0/me?$select=id,displayName,mail,userPrincipalName',
+                'user_data_mapping': {
+                    'microsoft_id': 'id',
+                    'email': _microsoft_email,
+                    'name': 'displayName'
+                }
+            },
+            'discord': {
+                'name': 'Discord',
+                'client_id': os.getenv('DISCORD_CLIENT_ID'),
+                'client_secret': os.getenv('DISCORD_CLIENT_SECRET'),
+                'token_url': 'https://discord.com/api/oauth2/token',
+                'user_info_url': 'https://discord.com/api/users/@me',
+                'user_data_mapping': {
+                    'discord_id': 'id',
+                    'email': 'email',
+                    'name': 'username',
+                    'avatar': _discord_avatar
+                }
+            },
+        }
 
-    async def _handle_discord_oauth(self, code):
-        """Handle Discord OAuth token exchange and user info retrieval"""
-        return await self._handle_oauth(code, {
-            'name': 'Discord',
-            'client_id_env': 'DISCORD_CLIENT_ID',
-            'client_secret_env': 'DISCORD_CLIENT_SECRET',
-            'token_url': 'https://discord.com/api/oauth2/token',
-            'user_info_url': 'https://discord.com/api/users/@me',
-            'user_info_headers': {'Authorization': 'Bearer {access_token}'},
-            'user_data_mapping': {
-                'discord_id': 'id',
-                'email': lambda ui: ui.get('email', ''),
-                'name': lambda ui: ui.get('username', ''),
-                'avatar': lambda ui: ui.get('avatar') and f"https://cdn.discordapp.com/avatars/{ui['id']}/{ui['avatar']}.png" or ''
-            }
+        for config in configs.values():
+            config['redirect_uri'] = redirect_uri
+            if not config['client_id'] or not config['client_secret']:
+                # Not fatal: the gateway runs without OAuth; callbacks for this provider are rejected
+                self.logger.info(f"{config['name']} OAuth credentials not configured")
+
+        return configs
+
+    def _auth_status_response(self, auth_data: dict) -> web.Response:
+        """Authenticated /auth/status response for a stored OAuth result"""
+        self.logger.info(f"[AUTH_STATUS] ✓ Returning authenticated status for user: {auth_data['user'].get('email', 'unknown')}")
+        return _json_response({
+            "authenticated": True,
+            "token": auth_data['token'],
+            "user": auth_data['user']
         })
 
-    async def auth_status_handler(self, request):
-        """Check if authentication was recently completed"""
+    async def _wait_for_auth_result(self, auth_key: str) -> Optional[bytes]:
+        """Long-poll for an OAuth result: returns the payload published by the callback, or None on timeout"""
+        pubsub = self.redis_client.redis.pubsub()
         try:
-            auth_key = f"auth_session:latest"
+            await pubsub.subscribe(_auth_ready_channel(auth_key))
+            # The callback may have finished between the first GET and the SUBSCRIBE
             auth_data_json = await self.redis_client.redis.get(auth_key)
+            if auth_data_json:
+                return auth_data_json
+
+            deadline = time.monotonic() + AUTH_STATUS_LONG_POLL_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is not None and message['type'] == 'message':
+                    return message['data']
+            return None
+        finally:
+            await pubsub.aclose()
+
+    async def auth_status_handler(self, request):
+        """Check if authentication was recently completed (waits up to AUTH_STATUS_LONG_POLL_SECONDS for it)"""
+        try:
+            auth_key = _auth_session_key(request.query.get('sid'))
+            # Fetch the payload and its remaining TTL in one round trip
+            async with self.redis_client.redis.pipeline(transaction=False) as pipe:
+                pipe.get(auth_key)
+                pipe.ttl(auth_key)
+                auth_data_json, ttl = await pipe.execute()
             self.logger.info(f"[AUTH_STATUS] Polling check - key exists: {auth_data_json is not None}")
 
             if auth_data_json:
-                # Decode bytes to string if needed
-                if isinstance(auth_data_json, bytes):
-                    auth_data_json = auth_data_json.decode('utf-8')
-                auth_data = json.loads(auth_data_json)
-                # Check if auth data is recent (within last 5 minutes to match Redis TTL)
-                age = int(time.time()) - auth_data['timestamp']
+                auth_data = orjson.loads(auth_data_json)  # bytes (decode_responses=False), parsed without decoding
+                # Age comes from the server-side TTL (key is written with AUTH_RESULT_TTL_SECONDS expiry)
+                age = AUTH_RESULT_TTL_SECONDS - ttl if ttl >= 0 else 0
                 self.logger.info(f"[AUTH_STATUS] Auth data age: {age} seconds")
-                if age < 300:  # 5 minutes = 300 seconds
-                    self.logger.info(f"[AUTH_STATUS] ✓ Returning authenticated status for user: {auth_data['user'].get('email', 'unknown')}")
-                    return web.json_response({
-                        "authenticated": True,
-                        "token": auth_data['token'],
-                        "user": auth_data['user']
-                    })
+                if ttl != 0:  # Still live (-1 = no expiry set)
+                    return self._auth_status_response(auth_data)
+            elif auth_key != _LEGACY_AUTH_SESSION_KEY and self._auth_status_waiters < MAX_AUTH_STATUS_WAITERS:
+                # Not completed yet: hold the request until the callback publishes the result.
+                # Only for clients with their own sid; the shared legacy key is answered right away
+                self._auth_status_waiters += 1
+                try:
+                    auth_data_json = await self._wait_for_auth_result(auth_key)
+                finally:
+                    self._auth_status_waiters -= 1
+                if auth_data_json:
+                    return self._auth_status_response(orjson.loads(auth_data_json))
 
             self.logger.info("[AUTH_STATUS] ✗ Returning unauthenticated status")
-            return web.json_response({"authenticated": False})
+            return _json_response({"authenticated": False})
 
         except Exception as e:
             self.logger.error(f"Auth status error: {e}")
-            return web.json_response(
+            return _json_response(
                 {"authenticated": False, "error": "Failed to check auth status"},
                 status=500
             )
@@ -494,49 +682,81 @@ class HealthMonitor:
         """Clear authentication session"""
         try:
             self.logger.info("Logout request received")
-            auth_key = f"auth_session:latest"
+            self._forget_token(request)
+            auth_key = _auth_session_key(request.query.get('sid'))
             result = await self.redis_client.redis.delete(auth_key)
             self.logger.info(f"Deleted {result} auth keys from Redis")
 
-            return web.json_response({"success": True})
+            return _json_response({"success": True})
 
         except Exception as e:
             self.logger.error(f"Logout error: {e}")
-            return web.json_response(
+            return _json_response(
                 {"success": False, "error": "Failed to logout"},
                 status=500
             )
 
+    def _verify_token_cached(self, token: str) -> dict:
+        """verify_token() with recently verified payloads served from a small LRU.
+
+        Entries live for JWT_CACHE_TTL_SECONDS but never past the token's own `exp`.
+        """
+        key = hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+        now = time.time()
+        cached = self._jwt_cache.get(key)
+        if cached is not None:
+            payload, valid_until = cached
+            if now < valid_until:
+                self._jwt_cache.move_to_end(key)
+                return payload
+            del self._jwt_cache[key]
+
+        payload = self.gateway_service.auth_middleware.verify_token(token)
+        valid_until = now + JWT_CACHE_TTL_SECONDS
+        if 'exp' in payload:
+            valid_until = min(valid_until, float(payload['exp']))
+        self._jwt_cache[key] = (payload, valid_until)
+        if len(self._jwt_cache) > JWT_CACHE_MAX_ENTRIES:
+            self._jwt_cache.popitem(last=False)
+        return payload
+
+    def _forget_token(self, request):
+        """Drop the request's bearer token (if any) from the verification cache"""
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            key = hashlib.blake2b(auth_header.split(' ')[1].encode('utf-8'), digest_size=16).digest()
+            self._jwt_cache.pop(key, None)
+
     async def auth_validate_handler(self, request):
         """Validate JWT token"""
         try:
             # Get Authorization header
             auth_header = request.headers.get('Authorization')
             if not auth_header or not auth_header.startswith('Bearer '):
-                return web.json_response(
+                return _json_response(
                     {"valid": False, "error": "No valid authorization header"},
                     status=401
                 )
 
             token = auth_header.split(' ')[1]
 
-            # Verify token using the gateway service's auth middleware
+            # Verify token using the gateway service's auth middleware (recent results are cached)
             try:
-                payload = self.gateway_service.auth_middleware.verify_token(token)
-                return web.json_response({
+                payload = self._verify_token_cached(token)
+                return _json_response({
                     "valid": True,
                     "user_id": payload.get('user_id'),
                     "email": payload.get('email')
                 })
             except Exception as e:
-                return web.json_response(
+                return _json_response(
                     {"valid": False, "error": str(e)},
                     status=401
                 )
 
         except Exception as e:
             self.logger.error(f"Token validation error: {e}")
-            return web.json_response(
+            return _json_response(
                 {"valid": False, "error": "Token validation failed"},
                 status=500
             )
@@ -545,11 +765,10 @@ class HealthMonitor:
         """Discovery endpoint for finding the least-loaded gateway"""
         try:
             # Get current metrics to determine load
-            queue_depth = await self.redis_client.get_queue_depth()
+            queue_depth = await self._cached_queue_depth()
             metrics = self.gateway_service.metrics
 
             # Determine gateway URL for clients
-            import os
             # For tunnel setups: backend runs locally, but clients connect to public tunnel URL
             # Default to production tunnel URL, fallback to localhost for development
             gateway_url = os.getenv('GATEWAY_URL', 'wss://ws.nova-voice.com')
@@ -562,48 +781,45 @@ class HealthMonitor:
                 except (ValueError, IndexError):
                     port = 5026
 
-            return web.json_response({
+            return _json_response({
                 "success": True,
                 "gateway": {
                     "gateway_id": self.instance_id,
                     "port": port,
                     "ws_url": gateway_url,
                     "current_load": queue_depth,
-                    "max_load": MAX_QUEUE_DEPTH
+                    "max_load": CONFIG.max_queue_depth
                 }
             })
 
         except Exception as e:
             self.logger.error(f"Discovery least-loaded error: {e}")
-            return web.json_response(
+            return _json_response(
                 {"success": False, "error": "Failed to discover gateway"},
                 status=500
             )
 
     async def start_health_server(self):
         """Start health check HTTP server"""
-        app = web.Application()
+        app = web.Application(middlewares=[_cors_middleware])
+        app.on_cleanup.append(self._close_http)
+        app.on_cleanup.append(self._stop_health_snapshot)
         app.router.add_get('/health', self.health_check_handler)
         app.router.add_get('/metrics', self.metrics_handler)
         app.router.add_get('/discovery/least-loaded', self.discovery_least_loaded_handler)
 
-        # Disable aiohttp access logging
-        logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+        # Python 3.12+: run new tasks eagerly, so handlers that finish without awaiting
+        # (e.g. /health) complete in the same loop iteration instead of being scheduled
+        eager_task_factory = getattr(asyncio, 'eager_task_factory', None)
+        if eager_task_factory is not None:
+            asyncio.get_running_loop().set_task_factory(eager_task_factory)
 
-        # Add CORS support
-        cors = aiohttp_cors.setup(app, defaults={
-            "*": aiohttp_cors.ResourceOptions(
-                allow_credentials=True,
-                expose_headers="*",
-                allow_headers="*",
-            )
-        })
-
-        for route in list(app.router.routes()):
-            cors.add(route)
-
-        runner = web.AppRunner(app)
+        # No access logger at all (rather than one filtered by level), so probes skip access-log formatting
+        runner = web.AppRunner(app, access_log=None)
         await runner.setup()
-        site = web.TCPSite(runner, '0.0.0.0', HEALTH_PORT)
+        site = web.TCPSite(runner, '0.0.0.0', CONFIG.health_port, reuse_port=CONFIG.health_reuse_port or None)
         await site.start()
-        self.logger.info(f"Health server started on port {HEALTH_PORT}")
+
+        self._refresh_health_snapshot()
+        self._health_snapshot_task = asyncio.create_task(self._health_snapshot_loop())
+        self.logger.info(f"Health server started on port {CONFIG.health_port}")
@@ -6,20 +6,41 @@ Provides a clean interface for Redis interactions separate from business logic.
 """
 
 import asyncio
-import json
-import base64
+import struct
 import time
 import uuid
-import threading
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
+import orjson
+import ormsgpack
 import redis.asyncio as redis
 
-from config import (
-    REDIS_URL, AUDIO_JOBS_STREAM, RESULTS_CHANNEL_PREFIX, SESSION_PREFIX,
-    MAX_QUEUE_DEPTH, SAMPLE_RATE, SESSION_EXPIRATION_SECONDS
-)
-from session import SpeechSession
+from config import CONFIG
+from session import SpeechSession, SESSION_HASH_FIELDS
+
+# Audio job stream fields, pre-encoded (the client uses decode_responses=False)
+_K_VERSION = b"v"
+_K_JOB_TYPE = b"job_type"
+_K_JOB_ID = b"job_id"
+_K_CLIENT_ID = b"client_id"
+_K_SEGMENT_ID = b"segment_id"
+_K_AUDIO_BYTES = b"audio_bytes"
+_K_SAMPLE_RATE = b"sample_rate"
+_K_SOURCE_LANG = b"source_lang"
+_K_TARGET_LANG = b"target_lang"
+_K_TRANSLATION_ENABLED = b"translation_enabled"
+_K_IS_FINAL = b"is_final"
+_K_TIMESTAMP = b"timestamp"
+_K_GATEWAY_INSTANCE = b"gateway_instance"
+_V_SCHEMA_VERSION = CONFIG.audio_job_schema_version.encode('utf-8')
+_V_AUDIO_SEGMENT = b"audio_segment"
+_V_SAMPLE_RATE = str(CONFIG.sample_rate).encode('utf-8')
+_V_BOOL = {True: b"True", False: b"False"}
+
+_RESULTS_CHANNEL_PREFIX = CONFIG.results_channel_prefix.encode('utf-8')
+
+# How often the audio_jobs stream is trimmed by age (see CONFIG.audio_jobs_max_age_seconds)
+_STREAM_TRIM_INTERVAL_SECONDS = 10.0
 
 
 class RedisService:
@@ -30,250 +51,308 @@ class RedisService:
         self.instance_id = instance_id
         self.logger = logger
 
-        # Per-client pubsub management for security
-        self.client_pubsubs: Dict[str, asyncio.Task] = {}
-        self.pubsub_lock = threading.Lock()
+        # Job fields that are the same for every job this gateway publishes, encoded once;
+        # publish_audio_job copies this and fills in the per-job fields
+        self._job_template: Dict[bytes, Any] = {
+            _K_VERSION: _V_SCHEMA_VERSION,
+            _K_JOB_TYPE: _V_AUDIO_SEGMENT,
+            _K_SAMPLE_RATE: _V_SAMPLE_RATE,
+            _K_GATEWAY_INSTANCE: instance_id.encode('utf-8'),
+        }
+
+        # Result delivery: one shared pubsub connection subscribed to each connected client's own
+        # channel. The dispatcher only decodes and queues; each client's queue is drained in order by
+        # its own consumer task, so a slow client never holds up results for the others
+        self.result_queues: Dict[bytes, "asyncio.Queue[Optional[Dict[str, Any]]]"] = {}
+        self._result_consumers: Dict[bytes, asyncio.Task] = {}
+        self._results_pubsub = None
+        self._results_subscribed = asyncio.Event()
 
         # Track latest segment_id sent per client
         self.latest_segment_id_sent = {}
         # Track if a job is in flight per client
         self.job_in_flight = {}
 
+        # Pending XADDs: (encoded job fields, future resolved with the stream ID)
+        self._publish_queue: "asyncio.Queue[Tuple[Dict[bytes, Any], asyncio.Future]]" = asyncio.Queue()
+        self._publish_task: Optional[asyncio.Task] = None
+
+        # audio_jobs stream length for backpressure, sampled in the background instead of an XLEN per publish
+        self._queue_depth = 0
+        self._queue_depth_task: Optional[asyncio.Task] = None
+        self._stream_trim_task: Optional[asyncio.Task] = None
+
     async def connect(self):
         """Connect to Redis"""
-        print(f"[DEBUG] Gateway connecting to Redis: {REDIS_URL}")
-        self.redis = redis.Redis.from_url(REDIS_URL, decode_responses=False)
+        self.logger.debug("Gateway connecting to Redis: %s", CONFIG.redis_url)
+        self.redis = redis.Redis.from_url(
+            CONFIG.redis_url,
+            decode_responses=False,
+            health_check_interval=CONFIG.redis_health_check_interval,
+        )
         await self.redis.ping()
-        print("[DEBUG] Gateway Redis connection successful")
+        self._results_pubsub = self.redis.pubsub()
         self.logger.info("Connected to Redis")
 
+        if self._publish_task is None:
+            self._publish_task = asyncio.create_task(self._publish_flush_loop())
+        if self._queue_depth_task is None:
+            self._queue_depth = await self.redis.xlen(CONFIG.audio_jobs_stream)
+            self._queue_depth_task = asyncio.create_task(self._queue_depth_sampler())
+        if self._stream_trim_task is None and CONFIG.audio_jobs_max_age_seconds > 0:
+            self._stream_trim_task = asyncio.create_task(self._stream_trim_loop())
+
+    @staticmethod
+    def _session_key(client_id: str) -> str:
+        # One hash per client holding the packed state and both audio buffers
+        return f"{CONFIG.session_prefix}{client_id}:state"
+
     async def load_session(self, client_id: str) -> SpeechSession:
         """Load session state from Redis"""
-        session_key = f"{SESSION_PREFIX}{client_id}"
-        session_data_raw = await self.redis.hgetall(session_key)
-
-        # Decode bytes to strings
-        session_data = {}
-        for key, value in session_data_raw.items():
-            if isinstance(key, bytes):
-                key = key.decode('utf-8')
-            if isinstance(value, bytes):
-                value = value.decode('utf-8')
-            session_data[key] = value
-
-        if session_data:
-            # Load audio buffers separately
-            audio_buffers = {}
-            audio_buffer_key = f"{SESSION_PREFIX}{client_id}:audio_buffer"
-            pre_speech_buffer_key = f"{SESSION_PREFIX}{client_id}:pre_speech_buffer"
-
-            audio_buffer_data = await self.redis.get(audio_buffer_key)
-            if audio_buffer_data:
-                audio_buffers['audio_buffer'] = audio_buffer_data
-
-            pre_speech_buffer_data = await self.redis.get(pre_speech_buffer_key)
-            if pre_speech_buffer_data:
-                audio_buffers['pre_speech_buffer'] = pre_speech_buffer_data
-
-            return SpeechSession.from_dict(session_data, audio_buffers)
-        else:
-            return SpeechSession()
+        # State blob and both audio buffers in one command
+        session_blob, audio_buffer_data, pre_speech_buffer_data = await self.redis.hmget(
+            self._session_key(client_id), SESSION_HASH_FIELDS
+        )
+
+        if session_blob:
+            try:
+                return SpeechSession.unpack(session_blob, audio_buffer_data, pre_speech_buffer_data)
+            except (struct.error, ValueError, KeyError) as e:
+                self.logger.warning(f"Discarding unreadable session state for client {client_id}: {e}")
+        return SpeechSession()
 
     async def save_session(self, client_id: str, session: SpeechSession):
         """Save session state to Redis"""
-        session_key = f"{SESSION_PREFIX}{client_id}"
-        session_data = session.to_dict()
-        # Encode strings to bytes for Redis with decode_responses=False
-        encoded_session_data = {}
-        for key, value in session_data.items():
-            if isinstance(key, str):
-                key = key.encode('utf-8')
-            if isinstance(value, str):
-                value = value.encode('utf-8')
-            encoded_session_data[key] = value
-        await self.redis.hset(session_key, mapping=encoded_session_data)
-
-        # Store audio buffers separately as binary data
-        audio_buffers = session.get_audio_buffers()
-        audio_buffer_key = f"{SESSION_PREFIX}{client_id}:audio_buffer"
-        pre_speech_buffer_key = f"{SESSION_PREFIX}{client_id}:pre_speech_buffer"
-
-        if audio_buffers['audio_buffer']:
-            await self.redis.set(audio_buffer_key, audio_buffers['audio_buffer'])
-        else:
-            await self.redis.delete(audio_buffer_key)
+        session_key = self._session_key(client_id)
 
-        if audio_buffers['pre_speech_buffer']:
-            await self.redis.set(pre_speech_buffer_key, audio_buffers['pre_speech_buffer'])
-        else:
-            await self.redis.delete(pre_speech_buffer_key)
-
-        # Set expiration to clean up old sessions
-        await self.redis.expire(session_key, SESSION_EXPIRATION_SECONDS)
-        await self.redis.expire(audio_buffer_key, SESSION_EXPIRATION_SECONDS)
-        await self.redis.expire(pre_speech_buffer_key, SESSION_EXPIRATION_SECONDS)
+        # One round-trip: all fields of the session hash, then a single EXPIRE for the lot
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(session_key, mapping=session.to_hash())
+            pipe.expire(session_key, CONFIG.session_expiration_seconds)
+            await pipe.execute()
 
     async def delete_session(self, client_id: str):
         """Delete session from Redis"""
-        session_key = f"{SESSION_PREFIX}{client_id}"
-        audio_buffer_key = f"{SESSION_PREFIX}{client_id}:audio_buffer"
-        pre_speech_buffer_key = f"{SESSION_PREFIX}{client_id}:pre_speech_buffer"
-
-        await self.redis.delete(session_key, audio_buffer_key, pre_speech_buffer_key)
+        await self.redis.delete(self._session_key(client_id))
 
     async def publish_audio_job(self, client_id: str, session: SpeechSession, is_final: bool = False):
         """Publish audio segment to Redis Stream for workers"""
         buffer_size = len(session.audio_buffer)
         if buffer_size == 0:
-            print(f"[DEBUG] [JOB_SKIP_EMPTY] Client {client_id} attempted to publish empty buffer")
+            self.logger.debug("[JOB_SKIP_EMPTY] Client %s attempted to publish empty buffer", client_id)
             return
 
-        print(f"[DEBUG] [JOB_PUBLISH_START] Client {client_id} publishing job: {buffer_size} bytes, is_final: {is_final}")
+        self.logger.debug("[JOB_PUBLISH_START] Client %s publishing job: %d bytes, is_final: %s", client_id, buffer_size, is_final)
 
-        # Check queue depth for backpressure
-        queue_depth = await self.redis.xlen(AUDIO_JOBS_STREAM)
-        if queue_depth > MAX_QUEUE_DEPTH:
-            print(f"[DEBUG] [JOB_QUEUE_FULL] Client {client_id} queue depth {queue_depth} exceeds threshold {MAX_QUEUE_DEPTH}, job not published")
-            self.logger.warning(f"Queue depth {queue_depth} exceeds threshold {MAX_QUEUE_DEPTH}")
+        # Check queue depth for backpressure (at most QUEUE_DEPTH_SAMPLE_INTERVAL_MS stale)
+        queue_depth = self._queue_depth
+        if queue_depth > CONFIG.max_queue_depth:
+            self.logger.warning("[JOB_QUEUE_FULL] Client %s queue depth %d exceeds threshold %d, job not published",
+                                client_id, queue_depth, CONFIG.max_queue_depth)
             # Could implement throttling here
             return
 
         # Create job envelope
         job_id = f"{client_id}_{uuid.uuid4().hex[:8]}"
-        audio_b64 = base64.b64encode(bytes(session.audio_buffer)).decode('utf-8')
-
-        job_data = {
-            "job_type": "audio_segment",
-            "job_id": job_id,
-            "client_id": client_id,
-            "segment_id": f"{int(time.time() * 1000)}",  # timestamp-based segment ID
-            "audio_bytes_b64": audio_b64,
-            "sample_rate": SAMPLE_RATE,
-            "source_lang": session.source_lang,
-            "target_lang": session.target_lang,
-            "translation_enabled": str(session.translation_enabled),  # Convert boolean to string for Redis
-            "is_final": str(is_final),  # Convert boolean to string for Redis
-            "timestamp": time.time(),
-            "gateway_instance": self.instance_id
-        }
+        # Stream field values are binary-safe, so raw PCM goes in as-is (no base64).
+        # Workers re-transcribe the whole utterance, so the full buffer is sent; the
+        # memoryview is handed to XADD without another copy and stays valid while the
+        # session keeps appending (it is over an immutable chunk).
+        audio_bytes = session.audio_buffer.view()
+
+        # Constant fields come from the pre-encoded template; numbers are encoded by redis-py itself
+        now = time.time()
+        encoded_job_data = self._job_template.copy()
+        encoded_job_data.update({
+            _K_JOB_ID: job_id.encode('utf-8'),
+            _K_CLIENT_ID: client_id.encode('utf-8'),
+            _K_SEGMENT_ID: int(now * 1000),  # timestamp-based segment ID
+            _K_AUDIO_BYTES: audio_bytes,
+            _K_SOURCE_LANG: session.source_lang.encode('utf-8'),
+            _K_TARGET_LANG: session.target_lang.encode('utf-8'),
+            _K_TRANSLATION_ENABLED: _V_BOOL[session.translation_enabled],  # "True"/"False" strings for Redis
+            _K_IS_FINAL: _V_BOOL[is_final],
+            _K_TIMESTAMP: now,
+        })
+
+        self.logger.debug("[JOB_DATA] Client %s job %s: lang=%s->%s, final=%s, size=%d bytes",
+                          client_id, job_id, session.source_lang, session.target_lang, is_final, buffer_size)
+
+        # Add to Redis Stream (batched with other clients' jobs by the flush loop)
+        future = asyncio.get_running_loop().create_future()
+        self._publish_queue.put_nowait((encoded_job_data, future))
+        stream_id = await future
+
+        self.logger.debug("[JOB_PUBLISHED] Client %s job %s published to Redis stream '%s' with ID %s",
+                          client_id, job_id, CONFIG.audio_jobs_stream, stream_id)
+        self.logger.info("Published audio job %s for client %s, size: %d bytes", job_id, client_id, buffer_size)
 
-        # Encode all values to bytes for Redis with decode_responses=False
-        encoded_job_data = {}
-        for key, value in job_data.items():
-            if isinstance(key, str):
-                key = key.encode('utf-8')
-            if isinstance(value, str):
-                value = value.encode('utf-8')
-            encoded_job_data[key] = value
+        return stream_id
 
-        print(f"[DEBUG] [JOB_DATA] Client {client_id} job {job_id}: lang={session.source_lang}->{session.target_lang}, final={is_final}, size={len(audio_b64)} chars b64")
+    async def _publish_flush_loop(self):
+        """Drain queued jobs and XADD them in a single pipelined round-trip"""
+        loop = asyncio.get_running_loop()
+        window = CONFIG.publish_batch_window_ms / 1000.0
 
-        # Add to Redis Stream
-        stream_id = await self.redis.xadd(AUDIO_JOBS_STREAM, encoded_job_data)
+        while True:
+            batch: List[Tuple[Dict[bytes, Any], asyncio.Future]] = [await self._publish_queue.get()]
+
+            # Take whatever is already queued, then wait up to the window for more
+            deadline = loop.time() + window
+            while len(batch) < CONFIG.publish_batch_max_jobs:
+                if not self._publish_queue.empty():
+                    batch.append(self._publish_queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._publish_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
 
-        print(f"[DEBUG] [JOB_PUBLISHED] Client {client_id} job {job_id} published to Redis stream '{AUDIO_JOBS_STREAM}' with ID {stream_id}")
-        self.logger.info(f"Published audio job {job_id} for client {client_id}, size: {buffer_size} bytes")
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for job_fields, _ in batch:
+                        # Approximate trim is amortized O(1) and bounds memory if workers stall
+                        pipe.xadd(CONFIG.audio_jobs_stream, job_fields,
+                                  maxlen=CONFIG.audio_jobs_stream_maxlen, approximate=True)
+                    results = await pipe.execute(raise_on_error=False)
+            except Exception as e:
+                self.logger.error(f"Pipelined publish of {len(batch)} jobs failed: {e}")
+                results = [e] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue  # Caller went away (e.g. client disconnected)
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _queue_depth_sampler(self):
+        """Refresh the cached audio_jobs stream length used for publish backpressure"""
+        interval = CONFIG.queue_depth_sample_interval_ms / 1000.0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self._queue_depth = await self.redis.xlen(CONFIG.audio_jobs_stream)
+            except Exception as e:
+                self.logger.warning("Queue depth sample failed: %s", e)
 
-        return stream_id
+    async def _stream_trim_loop(self):
+        """Drop audio jobs older than AUDIO_JOBS_MAX_AGE_SECONDS (MAXLEN on XADD only bounds the count)"""
+        max_age_ms = int(CONFIG.audio_jobs_max_age_seconds * 1000)
+        while True:
+            await asyncio.sleep(_STREAM_TRIM_INTERVAL_SECONDS)
+            try:
+                # Stream IDs are Redis server milliseconds, so the cutoff uses the server's clock
+                seconds, microseconds = await self.redis.time()
+                min_id = f"{seconds * 1000 + microseconds // 1000 - max_age_ms}-0"
+                trimmed = await self.redis.xtrim(CONFIG.audio_jobs_stream, minid=min_id, approximate=True)
+                if trimmed:
+                    self.logger.warning("Trimmed %d stale audio jobs from '%s'", trimmed, CONFIG.audio_jobs_stream)
+            except Exception as e:
+                self.logger.warning("Audio jobs stream trim failed: %s", e)
 
     async def subscribe_to_results(self):
-        """Subscribe to results channel and forward to clients"""
-        print(f"[DEBUG] Gateway results subscription task started - will subscribe to client channels dynamically")
+        """Dispatch results from the shared pubsub connection to the subscribed clients' queues"""
+        self.logger.debug("Gateway results dispatcher started - client channels are subscribed dynamically")
+        pubsub = self._results_pubsub
+        await pubsub.connect()
 
-        # This task doesn't need to do anything initially
-        # Client channels are subscribed to when clients connect
-        # and unsubscribed when they disconnect
         while True:
-            await asyncio.sleep(60)  # Keep task alive
+            # Only read while subscribed: SUBSCRIBE on an idle pubsub may do its own
+            # health-check read on the connection, which must not race with ours
+            if not pubsub.subscribed:
+                self._results_subscribed.clear()
+                await self._results_subscribed.wait()
+                continue
+
+            try:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Error reading from results pubsub: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message['type'] != 'message':
+                continue
+
+            result_queue = self.result_queues.get(message['channel'])
+            if result_queue is None:
+                continue  # Client disconnected; its UNSUBSCRIBE is in flight
+
+            client_id = message['channel'][len(_RESULTS_CHANNEL_PREFIX):].decode('utf-8')
+            try:
+                # Workers publish msgpack maps; a leading '{' is a JSON payload from a
+                # not-yet-upgraded worker (invalid UTF-8 surfaces as a JSONDecodeError)
+                message_data = message['data']
+                if message_data[:1] == b'{':
+                    result_data = orjson.loads(message_data)
+                else:
+                    result_data = ormsgpack.unpackb(message_data)
+                if result_data.get('client_id') == client_id:  # Double-check
+                    self.logger.debug("Received result for client %s: '%s'", client_id, result_data.get('text', ''))
+                    result_queue.put_nowait(result_data)
+            except (ormsgpack.MsgpackDecodeError, orjson.JSONDecodeError) as decode_error:
+                self.logger.warning("Result decode error for client %s: %s", client_id, decode_error)
+            except Exception as e:
+                self.logger.error("Error processing message for client %s: %s", client_id, e)
+
+    async def _forward_client_results(self, client_id: str, result_queue: asyncio.Queue,
+                                      result_forwarder: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Hand one client's results to its forwarder in arrival order (None ends the consumer)"""
+        while True:
+            result_data = await result_queue.get()
+            if result_data is None:
+                return
+            try:
+                await result_forwarder(result_data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error("Error processing message for client %s: %s", client_id, e)
 
     async def subscribe_to_client_channel(self, client_id: str, result_forwarder):
         """Subscribe to a specific client's result channel"""
-        with self.pubsub_lock:
-            if client_id in self.client_pubsubs:
-                return  # Already subscribed
-
-            async def listen_to_client():
-                pubsub = None
-                channel = f"{RESULTS_CHANNEL_PREFIX}{client_id}"
-                try:
-                    pubsub = self.redis.pubsub()
-                    await pubsub.subscribe(channel)
-                    print(f"[DEBUG] Gateway subscribed to client channel: {channel}")
-
-                    async for message in pubsub.listen():
-                        if message['type'] == 'message':
-                            try:
-                                # Workers now publish UTF-8 encoded JSON bytes
-                                message_data = message['data']
-
-                                # Decode bytes to string
-                                if isinstance(message_data, bytes):
-                                    try:
-                                        message_data = message_data.decode('utf-8')
-                                    except UnicodeDecodeError as decode_error:
-                                        print(f"[DEBUG] UTF-8 decode error for client {client_id}: {decode_error}")
-                                        continue  # Skip this corrupted message
-                                else:
-                                    print(f"[DEBUG] Unexpected message data type for client {client_id}: {type(message_data)} (expected bytes)")
-                                    continue
-
-                                # Parse JSON
-                                result_data = json.loads(message_data)
-                                if result_data.get('client_id') == client_id:  # Double-check
-                                    print(f"[DEBUG] Received result for client {client_id}: '{result_data.get('text', '')}'")
-                                    await result_forwarder(result_data)
-                            except json.JSONDecodeError as json_error:
-                                print(f"[DEBUG] JSON decode error for client {client_id}: {json_error}")
-                            except Exception as e:
-                                print(f"[DEBUG] Error processing message for client {client_id}: {e}")
-                except asyncio.CancelledError:
-                    # Normal cancellation path
-                    pass
-                except Exception as e:
-                    print(f"[DEBUG] Error in client channel subscription for {client_id}: {e}")
-                finally:
-                    # Ensure we unsubscribe and close pubsub to free resources
-                    try:
-                        if pubsub is not None:
-                            try:
-                                await pubsub.unsubscribe(channel)
-                            except Exception:
-                                pass
-                            try:
-                                await pubsub.aclose()
-                            except Exception:
-                                pass
-                    except Exception:
-                        pass
-                    with self.pubsub_lock:
-                        self.client_pubsubs.pop(client_id, None)
-
-            task = asyncio.create_task(listen_to_client())
-            self.client_pubsubs[client_id] = task
-            print(f"[DEBUG] Started listening task for client {client_id}")
+        channel = f"{CONFIG.results_channel_prefix}{client_id}".encode('utf-8')
+        # Check-and-insert has no await in between, so it is atomic on the event loop
+        if channel in self.result_queues:
+            return  # Already subscribed
+        result_queue = asyncio.Queue()
+        self.result_queues[channel] = result_queue
+        self._result_consumers[channel] = asyncio.create_task(
+            self._forward_client_results(client_id, result_queue, result_forwarder)
+        )
+
+        await self._results_pubsub.subscribe(channel)
+        self._results_subscribed.set()
+        self.logger.debug("Gateway subscribed to client channel for %s", client_id)
 
     async def unsubscribe_from_client_channel(self, client_id: str):
         """Unsubscribe from a specific client's result channel"""
-        task = None
-        with self.pubsub_lock:
-            if client_id in self.client_pubsubs:
-                task = self.client_pubsubs[client_id]
-        if task is not None:
-            task.cancel()
-            try:
-                await asyncio.wait_for(task, timeout=2.0)
-            except asyncio.CancelledError:
-                pass
-            except asyncio.TimeoutError:
-                print(f"[DEBUG] Timeout waiting for pubsub task to cancel for {client_id}")
-            finally:
-                with self.pubsub_lock:
-                    self.client_pubsubs.pop(client_id, None)
-                    print(f"[DEBUG] Unsubscribed from client channel for {client_id}")
+        channel = f"{CONFIG.results_channel_prefix}{client_id}".encode('utf-8')
+        result_queue = self.result_queues.pop(channel, None)
+        if result_queue is None:
+            return
+        consumer = self._result_consumers.pop(channel)
+        if consumer is asyncio.current_task():
+            # Called from this client's own forwarder: cancelling would abort the caller's cleanup,
+            # so let the consumer stop once the forwarder returns
+            result_queue.put_nowait(None)
+        else:
+            consumer.cancel()
+        try:
+            await self._results_pubsub.unsubscribe(channel)
+        except Exception as e:
+            self.logger.warning("Failed to unsubscribe from client channel for %s: %s", client_id, e)
+        self.logger.debug("Unsubscribed from client channel for %s", client_id)
 
     async def get_queue_depth(self) -> int:
         """Get current Redis stream queue depth"""
         try:
-            return await self.redis.xlen(AUDIO_JOBS_STREAM)
+            return await self.redis.xlen(CONFIG.audio_jobs_stream)
         except:
             return -1
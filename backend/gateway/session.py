@@ -6,12 +6,15 @@ Handles session state transitions and Redis-based session storage.
 """
 
 import time
-import base64
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
+import struct
+from collections import deque
+from typing import Any, Optional, Dict, Union
+from dataclasses import dataclass, field
 from enum import Enum
 
-from config import SESSION_PREFIX, SILENCE_THRESHOLD_SECONDS, SAMPLE_RATE, DEFAULT_SOURCE_LANGUAGE, DEFAULT_TARGET_LANGUAGE
+import numpy as np
+
+from config import CONFIG
 
 
 class SpeechState(Enum):
@@ -20,120 +23,290 @@ class SpeechState(Enum):
     SILENCE = "silence"
 
 
+# Actions reported by SpeechSession.step() (bitmask)
+STEP_SPEECH_STARTED = 1     # INACTIVE -> ACTIVE, pre-speech audio moved into the buffer
+STEP_SPEECH_RESUMED = 2     # SILENCE -> ACTIVE
+STEP_SILENCE_STARTED = 4    # No speech while ACTIVE and no silence timer running yet
+STEP_BUFFERED = 8           # Chunk appended to the utterance buffer
+STEP_MAX_BUFFER = 16        # Buffer exceeded MAX_AUDIO_BUFFER_SECONDS: send final job and end
+STEP_SILENCE_TIMEOUT = 32   # Silence lasted SILENCE_THRESHOLD_SECONDS: send final job and end
+STEP_PUBLISH = 64           # Not in a silence period: a regular job may be published
+
+# Session blob layout: version, state code, three monotonic timestamps (NaN = unset), three byte
+# counters, translation flag, then the UTF-8 source/target language codes with their lengths
+_SESSION_BLOB_VERSION = 1
+_SESSION_HEADER = struct.Struct("<BBdddqqq?BB")
+# Language codes are stored with one-byte lengths; 35 bytes fits any well-formed BCP 47 tag
+MAX_LANGUAGE_CODE_BYTES = 35
+_NAN = float("nan")
+_STATE_CODES = {SpeechState.INACTIVE: 0, SpeechState.ACTIVE: 1, SpeechState.SILENCE: 2}
+_STATES_BY_CODE = {code: state for state, code in _STATE_CODES.items()}
+
+
+def is_valid_language_code(value: Any) -> bool:
+    """True for a non-empty str whose UTF-8 form fits the session blob"""
+    return isinstance(value, str) and 0 < len(value.encode('utf-8')) <= MAX_LANGUAGE_CODE_BYTES
+
+
+# Fields of the per-client Redis session hash, in the order unpack() takes their values
+SESSION_HASH_FIELDS = (b"state", b"audio_buffer", b"pre_speech_buffer")
+
+
+class ChunkBuffer:
+    """Append-only PCM buffer kept as a list of chunks with a running byte count.
+
+    Appending never copies existing audio; bytes() joins the chunks once.
+    """
+
+    __slots__ = ("_chunks", "_len")
+
+    def __init__(self, data: bytes = b""):
+        self._chunks = deque()
+        self._len = 0
+        if data:
+            self.extend(data)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bytes__(self) -> bytes:
+        if len(self._chunks) > 1:
+            # Collapse into a single chunk so repeated reads don't re-join
+            joined = b"".join(self._chunks)
+            self._chunks.clear()
+            self._chunks.append(joined)
+        return self._chunks[0] if self._chunks else b""
+
+    def view(self, start: int = 0) -> memoryview:
+        """Zero-copy view of the buffered audio from byte offset `start`.
+
+        The view is over an immutable chunk, so later appends can't invalidate it.
+        """
+        return memoryview(bytes(self))[start:]
+
+    def extend(self, data: Union[bytes, "ChunkBuffer"]):
+        """Append audio (bytes or another ChunkBuffer) without copying what's already buffered"""
+        if isinstance(data, ChunkBuffer):
+            self._chunks.extend(data._chunks)
+            self._len += data._len
+        elif data:
+            self._chunks.append(bytes(data))
+            self._len += len(data)
+
+    def clear(self):
+        self._chunks.clear()
+        self._len = 0
+
+
+class PreSpeechRing:
+    """Fixed-capacity int16 ring holding the most recent PRE_SPEECH_BUFFER_SECONDS of audio.
+
+    The array is allocated once per session; writes are at most two slice
+    assignments and old audio is overwritten in place instead of re-sliced.
+    Lengths are reported in bytes to match the other session buffers.
+    """
+
+    __slots__ = ("_ring", "_head", "_filled")
+
+    def __init__(self, data: bytes = b"", capacity_samples: Optional[int] = None):
+        if capacity_samples is None:
+            capacity_samples = CONFIG.pre_speech_buffer_samples
+        self._ring = np.empty(capacity_samples, dtype=np.int16)
+        self._head = 0  # Next write position
+        self._filled = 0  # Number of valid samples
+        if data:
+            self.extend(data)
+
+    def __len__(self) -> int:
+        return self._filled * 2
+
+    def __bytes__(self) -> bytes:
+        if self._filled < len(self._ring):
+            # Not wrapped yet: valid samples end at the write position
+            return self._ring[self._head - self._filled:self._head].tobytes()
+        return np.concatenate((self._ring[self._head:], self._ring[:self._head])).tobytes()
+
+    def extend(self, data: bytes):
+        """Write 16-bit PCM into the ring, overwriting the oldest samples once full"""
+        capacity = len(self._ring)
+        n = len(data) // 2
+        if capacity == 0 or n == 0:
+            return
+        samples = np.frombuffer(data, dtype=np.int16, count=n)
+        if n >= capacity:
+            self._ring[:] = samples[-capacity:]
+            self._head = 0
+            self._filled = capacity
+            return
+
+        end = self._head + n
+        if end <= capacity:
+            self._ring[self._head:end] = samples
+        else:
+            split = capacity - self._head
+            self._ring[self._head:] = samples[:split]
+            self._ring[:n - split] = samples[split:]
+        self._head = end % capacity
+        self._filled = min(capacity, self._filled + n)
+
+    def clear(self):
+        self._head = 0
+        self._filled = 0
+
+
 @dataclass
 class SpeechSession:
     state: SpeechState = SpeechState.INACTIVE
-    audio_buffer: bytearray = None
-    pre_speech_buffer: bytearray = None  # Rolling buffer for audio before speech detection
+    audio_buffer: ChunkBuffer = None
+    pre_speech_buffer: PreSpeechRing = None  # Rolling buffer for audio before speech detection
     silence_start_time: Optional[float] = None
     session_start_time: Optional[float] = None
     accumulated_audio_bytes: int = 0
     last_stt_send_time: Optional[float] = None
     last_published_len: int = 0
     silence_buffer_start_len: int = 0  # Buffer length when silence started (for excluding silence from threshold calc)
-    source_lang: str = DEFAULT_SOURCE_LANGUAGE
-    target_lang: str = DEFAULT_TARGET_LANGUAGE
+    source_lang: str = CONFIG.default_source_language
+    target_lang: str = CONFIG.default_target_language
     translation_enabled: bool = True
+    # Local write-back state: unsaved changes and when the session was last written to Redis
+    dirty: bool = field(default=False, repr=False, compare=False)
+    last_flush_ts: float = field(default=0.0, repr=False, compare=False)
 
     def __post_init__(self):
         if self.audio_buffer is None:
-            self.audio_buffer = bytearray()
+            self.audio_buffer = ChunkBuffer()
         if self.pre_speech_buffer is None:
-            self.pre_speech_buffer = bytearray()
-
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dict for Redis storage (excludes audio buffers)"""
-        data = asdict(self)
-        # Remove audio buffers from dict - they'll be stored separately
-        data.pop('audio_buffer', None)
-        data.pop('pre_speech_buffer', None)
-        data['state'] = self.state.value
-        # Convert boolean to string for Redis compatibility
-        data['translation_enabled'] = str(data['translation_enabled'])
-
-        # Convert all values to strings for Redis compatibility
-        for key, value in data.items():
-            if value is None:
-                data[key] = ""
-            elif isinstance(value, (int, float)):
-                data[key] = str(value)
-            elif isinstance(value, bool):
-                data[key] = str(value)
-            elif not isinstance(value, str):
-                data[key] = str(value)
-
-        return data
-
-    def get_audio_buffers(self) -> Dict[str, bytes]:
-        """Get audio buffers as binary data for separate storage"""
+            self.pre_speech_buffer = PreSpeechRing()
+
+    def pack(self) -> bytes:
+        """Serialize session state (excluding audio buffers) into a compact binary blob"""
+        source = self.source_lang.encode('utf-8')
+        target = self.target_lang.encode('utf-8')
+        if len(source) > MAX_LANGUAGE_CODE_BYTES or len(target) > MAX_LANGUAGE_CODE_BYTES:
+            raise ValueError(f"Language code longer than {MAX_LANGUAGE_CODE_BYTES} bytes")
+        return _SESSION_HEADER.pack(
+            _SESSION_BLOB_VERSION,
+            _STATE_CODES[self.state],
+            _NAN if self.silence_start_time is None else self.silence_start_time,
+            _NAN if self.session_start_time is None else self.session_start_time,
+            _NAN if self.last_stt_send_time is None else self.last_stt_send_time,
+            self.accumulated_audio_bytes,
+            self.last_published_len,
+            self.silence_buffer_start_len,
+            self.translation_enabled,
+            len(source),
+            len(target),
+        ) + source + target
+
+    def to_hash(self) -> Dict[bytes, bytes]:
+        """Session hash mapping with bytes keys and values, ready for HSET as-is"""
+        state_field, audio_field, pre_speech_field = SESSION_HASH_FIELDS
         return {
-            'audio_buffer': bytes(self.audio_buffer),
-            'pre_speech_buffer': bytes(self.pre_speech_buffer)
+            state_field: self.pack(),
+            audio_field: bytes(self.audio_buffer),
+            pre_speech_field: bytes(self.pre_speech_buffer),
         }
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any], audio_buffers: Optional[Dict[str, bytes]] = None) -> 'SpeechSession':
-        """Create from dict loaded from Redis"""
-        # Audio buffers are now passed separately as binary data
-        if audio_buffers:
-            data['audio_buffer'] = bytearray(audio_buffers.get('audio_buffer', b''))
-            data['pre_speech_buffer'] = bytearray(audio_buffers.get('pre_speech_buffer', b''))
-        else:
-            # Fallback for backward compatibility
-            if 'audio_buffer' in data and isinstance(data['audio_buffer'], str):
-                data['audio_buffer'] = bytearray(base64.b64decode(data['audio_buffer']))
-            else:
-                data['audio_buffer'] = bytearray()
-            if 'pre_speech_buffer' in data and isinstance(data['pre_speech_buffer'], str):
-                data['pre_speech_buffer'] = bytearray(base64.b64decode(data['pre_speech_buffer']))
-            else:
-                data['pre_speech_buffer'] = bytearray()
-
-        if 'state' in data:
-            data['state'] = SpeechState(data['state'])
-
-        # Convert strings back to appropriate types
-        if 'translation_enabled' in data:
-            data['translation_enabled'] = data['translation_enabled'].lower() == 'true'
-
-        # Convert numeric strings back to numbers
-        if 'accumulated_audio_bytes' in data:
-            try:
-                data['accumulated_audio_bytes'] = int(data['accumulated_audio_bytes'])
-            except (ValueError, TypeError):
-                data['accumulated_audio_bytes'] = 0
-
-        if 'last_published_len' in data:
-            try:
-                data['last_published_len'] = int(data['last_published_len'])
-            except (ValueError, TypeError):
-                data['last_published_len'] = 0
-
-        if 'silence_buffer_start_len' in data:
-            try:
-                data['silence_buffer_start_len'] = int(data['silence_buffer_start_len'])
-            except (ValueError, TypeError):
-                data['silence_buffer_start_len'] = 0
-
-        # Convert empty strings back to None for Optional[float] fields
-        for key in ['silence_start_time', 'session_start_time', 'last_stt_send_time']:
-            if key in data and data[key] == "":
-                data[key] = None
-            elif key in data and data[key] != "":
-                try:
-                    data[key] = float(data[key])
-                except (ValueError, TypeError):
-                    data[key] = None
-
-        return cls(**data)
+    def unpack(cls, blob: bytes, audio_buffer: Optional[bytes] = None,
+               pre_speech_buffer: Optional[bytes] = None) -> 'SpeechSession':
+        """Create from a blob produced by pack() plus the separately stored audio buffers
+
+        Takes the raw HMGET values of SESSION_HASH_FIELDS directly (missing buffers are None).
+        """
+        (version, state_code, silence_start_time, session_start_time, last_stt_send_time,
+         accumulated_audio_bytes, last_published_len, silence_buffer_start_len,
+         translation_enabled, source_len, target_len) = _SESSION_HEADER.unpack_from(blob)
+        if version != _SESSION_BLOB_VERSION:
+            raise ValueError(f"Unsupported session blob version {version}")
+
+        offset = _SESSION_HEADER.size
+        source_lang = blob[offset:offset + source_len].decode('utf-8')
+        offset += source_len
+        target_lang = blob[offset:offset + target_len].decode('utf-8')
+
+        return cls(
+            state=_STATES_BY_CODE[state_code],
+            audio_buffer=ChunkBuffer(audio_buffer or b''),
+            pre_speech_buffer=PreSpeechRing(pre_speech_buffer or b''),
+            # NaN marks an unset timestamp (NaN != NaN)
+            silence_start_time=None if silence_start_time != silence_start_time else silence_start_time,
+            session_start_time=None if session_start_time != session_start_time else session_start_time,
+            accumulated_audio_bytes=accumulated_audio_bytes,
+            last_stt_send_time=None if last_stt_send_time != last_stt_send_time else last_stt_send_time,
+            last_published_len=last_published_len,
+            silence_buffer_start_len=silence_buffer_start_len,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            translation_enabled=translation_enabled,
+        )
+
+    def step(self, chunk: bytes, has_speech: bool, now: float) -> int:
+        """Advance the speech state machine and buffer accounting by one audio chunk.
+
+        Pure bookkeeping with no I/O: returns a STEP_* bitmask telling the caller
+        which publish/end actions to take.
+        """
+        action = 0
+        audio_buffer = self.audio_buffer
+
+        # Always maintain rolling pre-speech buffer for potential future speech detection
+        self.pre_speech_buffer.extend(chunk)
+
+        state = self.state
+        if has_speech:
+            if state is SpeechState.INACTIVE:
+                pre_speech = bytes(self.pre_speech_buffer)
+                audio_buffer.extend(pre_speech)
+                self.accumulated_audio_bytes += len(pre_speech)
+                self.start_speech(now)
+                # Start silence timer when recording begins
+                self.silence_start_time = now
+                action |= STEP_SPEECH_STARTED
+            elif state is SpeechState.SILENCE:
+                # Mark where silence buffer started before resuming speech
+                self.silence_buffer_start_len = len(audio_buffer)
+                self.start_speech(now)
+                # Reset silence timer when resuming from silence
+                self.silence_start_time = now
+                action |= STEP_SPEECH_RESUMED
+            elif state is SpeechState.ACTIVE:
+                # Reset silence timer when speech is detected during active recording
+                self.silence_start_time = now
+        elif state is SpeechState.ACTIVE and self.silence_start_time is None:
+            # No speech detected during active recording - entering silence period
+            self.silence_start_time = now
+            self.silence_buffer_start_len = len(audio_buffer)
+            action |= STEP_SILENCE_STARTED
+
+        # Once buffer is activated (ACTIVE state), accumulate ALL audio chunks regardless of speech detection
+        if self.state is not SpeechState.ACTIVE:
+            return action
+        audio_buffer.extend(chunk)
+        self.accumulated_audio_bytes += len(chunk)
+        action |= STEP_BUFFERED
+
+        if len(audio_buffer) > CONFIG.max_audio_buffer_bytes:
+            return action | STEP_MAX_BUFFER
+
+        if self.silence_start_time is not None and now - self.silence_start_time >= CONFIG.silence_threshold_seconds:
+            return action | STEP_SILENCE_TIMEOUT
+
+        # During silence periods, don't send any jobs (wait for either speech resume or silence timeout)
+        in_silence_period = (self.silence_start_time is not None and
+                             self.silence_buffer_start_len > 0 and
+                             len(audio_buffer) > self.silence_buffer_start_len)
+        if not in_silence_period:
+            action |= STEP_PUBLISH
+        return action
 
     def reset(self):
         """Reset session state (kept for backward compatibility)"""
         self.end_speech_session()
 
-    def start_speech(self):
+    def start_speech(self, now: Optional[float] = None):
         self.state = SpeechState.ACTIVE
-        self.session_start_time = time.time()
+        self.session_start_time = time.monotonic() if now is None else now
         self.silence_start_time = None
         self.silence_buffer_start_len = 0
         self.last_published_len = 0
@@ -141,13 +314,13 @@ class SpeechSession:
     def detect_silence(self):
         if self.state == SpeechState.ACTIVE:
             self.state = SpeechState.SILENCE
-            self.silence_start_time = time.time()
+            self.silence_start_time = time.monotonic()
 
     def is_silence_timeout(self) -> bool:
         """Check if silence has been consistent for the full threshold duration"""
         if self.silence_start_time is None:
             return False
-        return (time.time() - self.silence_start_time) >= SILENCE_THRESHOLD_SECONDS
+        return (time.monotonic() - self.silence_start_time) >= CONFIG.silence_threshold_seconds
 
     def end_speech_session(self):
         """Properly end speech session and clear all state"""
@@ -161,12 +334,16 @@ class SpeechSession:
         self.last_published_len = 0
         self.silence_buffer_start_len = 0
 
+    def unpublished_view(self) -> memoryview:
+        """Zero-copy view of the audio appended since the last published job"""
+        return self.audio_buffer.view(self.last_published_len)
+
     @property
     def buffer_seconds(self) -> float:
         """Get the current audio buffer duration in seconds"""
-        return len(self.audio_buffer) / (SAMPLE_RATE * 2)
+        return len(self.audio_buffer) * CONFIG.inv_bytes_per_second
 
     @property
     def pre_speech_buffer_seconds(self) -> float:
         """Get the current pre-speech buffer duration in seconds"""
-        return len(self.pre_speech_buffer) / (SAMPLE_RATE * 2)
+        return len(self.pre_speech_buffer) * CONFIG.inv_bytes_per_second
@@ -5,12 +5,24 @@ Contains WebRTC VAD and Silero VAD implementations with dual VAD coordination.
 Handles speech detection logic for audio chunks.
 """
 
-import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from typing import Optional
+
 import numpy as np
 import torch
 import webrtcvad
 
-from config import WEBRTC_SENSITIVITY, SILERO_SENSITIVITY, INT16_MAX_ABS_VALUE, SAMPLE_RATE
+from config import CONFIG
+
+# Silero VAD expects 512-sample windows for 16kHz audio
+SILERO_WINDOW_SAMPLES = 512
+
+# One long-lived thread per model: the WebRTC VAD instance and Silero's scratch buffer and
+# recurrent state must never be used from two threads at once
+_WEBRTC_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad-webrtc")
+_SILERO_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad-silero")
 
 
 class VoiceActivityDetector:
@@ -24,14 +36,19 @@ class VoiceActivityDetector:
         # Silero VAD components
         self.silero_vad_model = None
         self.is_silero_speech_active = False
-        self.silero_working = False
+        # The in-flight Silero check, if any (replaces the old silero_working flag)
+        self._silero_future: Optional[asyncio.Future] = None
+        # Reusable float32 scratch for the int16 -> float conversion; the tensor shares its memory
+        self._int16_scale = 1.0 / CONFIG.int16_max_abs_value
+        self._silero_scratch = np.zeros(SILERO_WINDOW_SAMPLES, dtype=np.float32)
+        self._silero_tensor = torch.from_numpy(self._silero_scratch)
 
     def initialize_models(self):
         """Initialize WebRTC and Silero VAD models"""
         try:
             # Initialize WebRTC VAD
             self.webrtc_vad_model = webrtcvad.Vad()
-            self.webrtc_vad_model.set_mode(WEBRTC_SENSITIVITY)
+            self.webrtc_vad_model.set_mode(CONFIG.webrtc_sensitivity)
         except Exception as e:
             raise RuntimeError(f"Error initializing WebRTC VAD model: {e}")
 
@@ -54,83 +71,98 @@ class VoiceActivityDetector:
         frame_length = 160  # 10ms at 16kHz
         frame_bytes = frame_length * 2  # 16-bit samples
 
-        # Process frames
-        speech_frames = 0
-        total_frames = 0
-
-        for i in range(0, len(chunk) - frame_bytes + 1, frame_bytes):
-            frame = chunk[i:i + frame_bytes]
-            if len(frame) == frame_bytes:
-                if self.webrtc_vad_model.is_speech(frame, SAMPLE_RATE):
-                    speech_frames += 1
-                    if not all_frames_must_be_true:
-                        self.is_webrtc_speech_active = True
-                        return True
-                total_frames += 1
-
-        if all_frames_must_be_true:
-            # Require majority of frames to contain speech
-            speech_detected = speech_frames > total_frames // 2
-            self.is_webrtc_speech_active = speech_detected
-            return speech_detected
-        else:
-            self.is_webrtc_speech_active = False
-            return False
+        # Process frames: webrtcvad takes any buffer, so frames are zero-copy memoryview slices.
+        # The frame loop is built from map/any/sum so it iterates in C rather than in bytecode.
+        chunk_view = memoryview(chunk)
+        total_frames = len(chunk_view) // frame_bytes
+        frame_ends = range(frame_bytes, total_frames * frame_bytes + 1, frame_bytes)
+        frames = map(chunk_view.__getitem__, map(slice, range(0, len(chunk_view), frame_bytes), frame_ends))
+        frame_results = map(self.webrtc_vad_model.is_speech, frames, repeat(CONFIG.sample_rate))
+
+        if not all_frames_must_be_true:
+            # Stops at the first voiced frame
+            self.is_webrtc_speech_active = any(frame_results)
+            return self.is_webrtc_speech_active
+
+        # Require majority of frames to contain speech
+        speech_detected = sum(frame_results) > total_frames // 2
+        self.is_webrtc_speech_active = speech_detected
+        return speech_detected
 
     def _is_silero_speech(self, chunk: bytes) -> bool:
         """Silero VAD speech detection. Input must be 16kHz, 16-bit PCM."""
         if self.silero_vad_model is None:
             return False
 
-        self.silero_working = True
-        audio_chunk = np.frombuffer(chunk, dtype=np.int16)
-        audio_chunk = audio_chunk.astype(np.float32) / INT16_MAX_ABS_VALUE
+        int16_samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2)
+        num_samples = int16_samples.size
+        expected_samples = SILERO_WINDOW_SAMPLES
+
+        # Only one Silero check runs at a time (_silero_future), so the scratch buffer can be shared
+        if self._silero_scratch.size < num_samples:
+            self._silero_scratch = np.zeros(num_samples, dtype=np.float32)
+            self._silero_tensor = torch.from_numpy(self._silero_scratch)
+        np.multiply(int16_samples, self._int16_scale, out=self._silero_scratch[:num_samples], casting='unsafe')
+        audio_tensor = self._silero_tensor
 
-        # Silero VAD expects 512 samples for 16kHz audio
-        # If we have more samples, process in chunks and take the max probability
-        expected_samples = 512
-        if len(audio_chunk) > expected_samples:
-            # Process in chunks of 512 samples
+        if num_samples > expected_samples:
+            # Process overlapping 512-sample windows and take the max probability
+            # (windows run one at a time so the model's recurrent state carries over as before)
             max_prob = 0.0
-            for i in range(0, len(audio_chunk) - expected_samples + 1, expected_samples // 2):
-                chunk_slice = audio_chunk[i:i + expected_samples]
-                if len(chunk_slice) == expected_samples:
-                    vad_prob = self.silero_vad_model(torch.from_numpy(chunk_slice), SAMPLE_RATE).item()
-                    max_prob = max(max_prob, vad_prob)
+            for i in range(0, num_samples - expected_samples + 1, expected_samples // 2):
+                vad_prob = self.silero_vad_model(audio_tensor[i:i + expected_samples], CONFIG.sample_rate).item()
+                max_prob = max(max_prob, vad_prob)
 
             vad_prob = max_prob
-        elif len(audio_chunk) == expected_samples:
-            vad_prob = self.silero_vad_model(torch.from_numpy(audio_chunk), SAMPLE_RATE).item()
         else:
             # Pad with zeros if too short
-            padded_chunk = np.zeros(expected_samples, dtype=np.float32)
-            padded_chunk[:len(audio_chunk)] = audio_chunk
-            vad_prob = self.silero_vad_model(torch.from_numpy(padded_chunk), SAMPLE_RATE).item()
+            self._silero_scratch[num_samples:expected_samples] = 0.0
+            vad_prob = self.silero_vad_model(audio_tensor[:expected_samples], CONFIG.sample_rate).item()
 
-        is_silero_speech_active = vad_prob > (1 - SILERO_SENSITIVITY)
+        is_silero_speech_active = vad_prob > (1 - CONFIG.silero_sensitivity)
 
         self.is_silero_speech_active = is_silero_speech_active
-        self.silero_working = False
         return is_silero_speech_active
 
-    def _check_voice_activity(self, data: bytes):
+    async def _check_voice_activity(self, data: bytes) -> bool:
         """Check voice activity using dual VAD system"""
+        loop = asyncio.get_running_loop()
+
         # First quick performing check for voice activity using WebRTC
-        self._is_webrtc_speech(data)
+        if not await loop.run_in_executor(_WEBRTC_EXECUTOR, self._is_webrtc_speech, data):
+            return False
 
-        if self.is_webrtc_speech_active:
-            if not self.silero_working:
-                self.silero_working = True
-                # Run the intensive check in a separate thread
-                threading.Thread(target=self._is_silero_speech, args=(data,)).start()
+        silero_future = self._silero_future
+        if silero_future is None or silero_future.done():
+            # Run the intensive check on the Silero thread; at most one is in flight
+            silero_future = loop.run_in_executor(_SILERO_EXECUTOR, self._is_silero_speech, data)
+            self._silero_future = silero_future
+            # Shielded so a cancelled client task can't cancel a check other streams rely on
+            return await asyncio.shield(silero_future)
+
+        # Another stream's check is still running: go with the latest Silero verdict
+        return self.is_silero_speech_active
+
+    def _is_below_energy_floor(self, chunk: bytes) -> bool:
+        """Cheap RMS gate for obviously silent chunks (skips both VAD models)"""
+        floor = CONFIG.vad_silence_rms_floor
+        if floor <= 0:
+            return False
+        samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2).astype(np.float32)
+        if samples.size == 0:
+            return True
+        # Compare mean square against floor^2 to avoid the sqrt
+        return float(np.dot(samples, samples)) < floor * floor * samples.size
 
-    def detect_speech_activity(self, audio_chunk: bytes) -> bool:
+    async def detect_speech_activity(self, audio_chunk: bytes) -> bool:
         """Dual VAD: detect if audio chunk contains speech using WebRTC + Silero"""
         if len(audio_chunk) == 0:
             return False
 
-        # Check voice activity using dual VAD system
-        self._check_voice_activity(audio_chunk)
+        if self._is_below_energy_floor(audio_chunk):
+            # Same outcome WebRTC would report for silence, without the per-frame calls
+            self.is_webrtc_speech_active = False
+            return False
 
-        # Return True only if BOTH VAD systems agree
-        return self.is_webrtc_speech_active and self.is_silero_speech_active
+        # Check voice activity using dual VAD system: True only if BOTH VAD systems agree
+        return await self._check_voice_activity(audio_chunk)
@@ -5,16 +5,16 @@ Manages WebSocket client connections, message parsing, and communication.
 Handles audio streaming, language settings, and status messages.
 """
 
-import json
 import logging
 import asyncio
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import orjson
 import websockets
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK, WebSocketException
 
-from session import SpeechSession
-from config import DEFAULT_SOURCE_LANGUAGE, DEFAULT_TARGET_LANGUAGE
+from session import SpeechSession, is_valid_language_code
+from config import CONFIG
 
 
 class WebSocketHandler:
@@ -25,6 +25,8 @@ class WebSocketHandler:
         self.redis_client = redis_client
         self.audio_processor = audio_processor
         self.logger = logging.getLogger(f"GATEWAY-{gateway_service.instance_id}")
+        # Partial results carry only newly decoded text; this is each client's text so far per segment_id
+        self._partial_texts: Dict[str, Tuple[int, str]] = {}
 
     async def handle_client(self, websocket):
         """Handle individual client connection"""
@@ -32,9 +34,8 @@ class WebSocketHandler:
         client_id = f"client_{uuid.uuid4().hex[:8]}"
 
         # Initialize per-client state
-        with self.gateway_service.client_lock:
-            self.gateway_service.connected_clients[client_id] = websocket
-            self.gateway_service.metrics["clients_connected"] += 1
+        self.gateway_service.connected_clients[client_id] = websocket
+        self.gateway_service.metrics["clients_connected"] += 1
         # Initialize per-client flow control
         self.redis_client.job_in_flight[client_id] = False
         self.redis_client.latest_segment_id_sent[client_id] = -1
@@ -74,13 +75,13 @@ class WebSocketHandler:
         status_msg = {
             "type": "status",
             "client_id": client_id,
-            "source_language": DEFAULT_SOURCE_LANGUAGE,
-            "target_language": DEFAULT_TARGET_LANGUAGE,
+            "source_language": CONFIG.default_source_language,
+            "target_language": CONFIG.default_target_language,
             "translation_enabled": True
         }
         self.logger.debug(f"[INITIAL_STATUS] Sending initial status to client {client_id}: {status_msg}")
         try:
-            await websocket.send(json.dumps(status_msg))
+            await websocket.send(orjson.dumps(status_msg).decode('utf-8'))
             self.logger.debug(f"[INITIAL_STATUS_SENT] Initial status sent to client {client_id}")
         except ConnectionClosedError:
             self.logger.info(f"Client {client_id} disconnected during initial status send")
@@ -102,15 +103,16 @@ class WebSocketHandler:
         try:
             # Parse audio message: [4 bytes metadata length][metadata JSON][audio data]
             metadata_length = int.from_bytes(message[:4], byteorder='little', signed=False)
-            metadata_json = message[4:4+metadata_length].decode('utf-8')
-            metadata = json.loads(metadata_json)
+            # orjson parses the UTF-8 bytes directly (no intermediate str)
+            metadata = orjson.loads(message[4:4+metadata_length])
             sample_rate = int(metadata['sampleRate'])
             audio_chunk = message[4+metadata_length:]
 
-            self.logger.debug(f"[AUDIO_RECEIVED] Client {client_id} sent audio chunk: {len(audio_chunk)} bytes at {sample_rate}Hz, total message: {len(message)} bytes")
+            self.logger.debug("[AUDIO_RECEIVED] Client %s sent audio chunk: %d bytes at %dHz, total message: %d bytes",
+                              client_id, len(audio_chunk), sample_rate, len(message))
 
             if not audio_chunk:
-                self.logger.debug(f"[AUDIO_EMPTY] Client {client_id} sent empty audio chunk, skipping")
+                self.logger.debug("[AUDIO_EMPTY] Client %s sent empty audio chunk, skipping", client_id)
                 return
 
             # Apply enhanced audio processing (resampling + quality improvements)
@@ -119,7 +121,7 @@ class WebSocketHandler:
             loop = asyncio.get_event_loop()
             processed_audio = await loop.run_in_executor(None, self.audio_processor.process_audio_chunk, audio_chunk, sample_rate)
 
-            self.logger.debug(f"[AUDIO_PROCESSED] Client {client_id} audio enhanced: {len(audio_chunk)} -> {len(processed_audio)} bytes")
+            self.logger.debug("[AUDIO_PROCESSED] Client %s audio enhanced: %d -> %d bytes", client_id, len(audio_chunk), len(processed_audio))
 
             # Process audio chunk
             speech_ended = await self.gateway_service.process_audio_chunk(client_id, processed_audio)
@@ -133,7 +135,7 @@ class WebSocketHandler:
     async def _handle_text_message(self, message, client_id, websocket):
         """Handle text message from client"""
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
             msg_type = data.get("type", "")
             self.logger.debug(f"[TEXT_MESSAGE] Client {client_id} sent text message: type={msg_type}")
 
@@ -144,25 +146,30 @@ class WebSocketHandler:
             elif msg_type == "start_over":
                 await self._handle_start_over(client_id)
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             pass
 
     async def _handle_set_languages(self, data, client_id, websocket):
         """Handle language settings change"""
         # Load session and update language settings
-        session = await self.redis_client.load_session(client_id)
+        session = await self.gateway_service.load_session(client_id)
         old_source = session.source_lang
         old_target = session.target_lang
         new_source = data.get("source_language", session.source_lang)
         new_target = data.get("target_language", session.target_lang)
 
+        # Reject anything the session can't store, so a bad value never reaches the cached session
+        if not (is_valid_language_code(new_source) and is_valid_language_code(new_target)):
+            self.logger.warning(f"[GATEWAY-{self.gateway_service.instance_id}] Ignoring invalid language codes from {client_id}")
+            return
+
         # Only update and send status if languages actually changed
         if new_source != old_source or new_target != old_target:
             session.source_lang = new_source
             session.target_lang = new_target
             session.translation_enabled = (session.source_lang != session.target_lang)
             self.logger.debug(f"[LANGUAGE_UPDATE_DETAILS] Client {client_id} language change: {old_source}->{old_target} -> {session.source_lang}->{session.target_lang}, translation_enabled: {session.translation_enabled}")
-            await self.redis_client.save_session(client_id, session)
+            await self.gateway_service.save_session(client_id, session)
 
             self.logger.info(f"[GATEWAY-{self.gateway_service.instance_id}] Language updated for {client_id}: {session.source_lang} -> {session.target_lang}")
 
@@ -172,14 +179,14 @@ class WebSocketHandler:
 
     async def _handle_get_status(self, client_id, websocket):
         """Handle status request"""
-        session = await self.redis_client.load_session(client_id)
+        session = await self.gateway_service.load_session(client_id)
         await self._send_status_update(websocket, client_id, session)
 
     async def _handle_start_over(self, client_id):
         """Handle start over command"""
         self.logger.info(f"Client {client_id} sent start_over")
         # Clear current buffers and reset speech session WITHOUT sending any final job
-        session = await self.redis_client.load_session(client_id)
+        session = await self.gateway_service.load_session(client_id)
         had_buffer = len(session.audio_buffer) > 0
         had_pre_speech = len(session.pre_speech_buffer) > 0
         job_was_in_flight = self.redis_client.job_in_flight.get(client_id, False)
@@ -187,7 +194,7 @@ class WebSocketHandler:
         self.logger.debug(f"[START_OVER_RESET] Client {client_id} resetting session - buffer: {len(session.audio_buffer)} bytes, pre-speech: {len(session.pre_speech_buffer)} bytes, job in flight: {job_was_in_flight}")
 
         session.end_speech_session()
-        await self.redis_client.save_session(client_id, session)
+        await self.gateway_service.save_session(client_id, session)
         # Mark job as not in flight
         self.redis_client.job_in_flight[client_id] = False
 
@@ -198,10 +205,10 @@ class WebSocketHandler:
         """Send utterance end signal to client"""
         self.logger.info(f"Speech ended for client {client_id}")
         try:
-            await websocket.send(json.dumps({
+            await websocket.send(orjson.dumps({
                 "type": "utterance_end",
                 "client_id": client_id
-            }))
+            }).decode('utf-8'))
             self.logger.debug(f"Utterance_end sent to client {client_id}")
         except ConnectionClosedError:
             self.logger.info(f"Client {client_id} disconnected during utterance_end send")
@@ -210,6 +217,28 @@ class WebSocketHandler:
             self.logger.error(f"Error sending utterance_end to client {client_id}: {e}")
             raise
 
+    async def _send_partial_result(self, client_id, segment_id, result_data):
+        """Append a partial transcription to the segment's text so far and send it as a realtime update"""
+        websocket = self.gateway_service.connected_clients.get(client_id)
+        if not websocket:
+            return
+        partial_segment_id, text = self._partial_texts.get(client_id, (segment_id, ""))
+        if partial_segment_id != segment_id:
+            text = ""
+        text = f"{text} {result_data.get('text', '')}".strip()
+        self._partial_texts[client_id] = (segment_id, text)
+        try:
+            await websocket.send(orjson.dumps({
+                "type": "realtime",
+                "text": text,
+                "translation": "",
+                "segment_id": result_data.get("segment_id", ""),
+                "processing_time": 0.0
+            }).decode('utf-8'))
+        except (ConnectionClosedError, WebSocketException) as e:
+            # Disconnect cleanup happens when the job's full result is forwarded
+            self.logger.debug(f"Could not send partial result to client {client_id}: {e}")
+
     async def _send_status_update(self, websocket, client_id, session):
         """Send status update to client"""
         status_msg = {
@@ -221,7 +250,7 @@ class WebSocketHandler:
         }
         self.logger.debug(f"[LANGUAGE_UPDATE_STATUS] Sending updated status to client {client_id}: {status_msg}")
         try:
-            await websocket.send(json.dumps(status_msg))
+            await websocket.send(orjson.dumps(status_msg).decode('utf-8'))
             self.logger.debug(f"[LANGUAGE_UPDATE_STATUS_SENT] Status sent successfully to client {client_id}")
         except ConnectionClosedError:
             self.logger.info(f"Client {client_id} disconnected during set_langs status send")
@@ -242,8 +271,15 @@ class WebSocketHandler:
         if not client_id:
             return
 
+        if result_data.get("status") == "partial":
+            # Text streamed while the job is still being transcribed (only sent when translation is off):
+            # show it, but leave segment ordering and job unlocking to the job's full result
+            if segment_id > self.redis_client.latest_segment_id_sent.get(client_id, -1):
+                await self._send_partial_result(client_id, segment_id, result_data)
+            return
+
         # Load session to determine translation gating
-        session = await self.redis_client.load_session(client_id)
+        session = await self.gateway_service.load_session(client_id)
         translation_enabled = bool(session.translation_enabled)
         is_translation_result = bool((result_data.get("translation") or "").strip())
 
@@ -254,7 +290,7 @@ class WebSocketHandler:
         should_unlock_job = (not translation_enabled) or is_translation_result
 
         last_sent = self.redis_client.latest_segment_id_sent.get(client_id, -1)
-        
+
         # Forward result if:
         # - Translation disabled: Forward all new STT results (single layer)
         # - Translation enabled: Forward ONLY translation results (double layer, skip STT-only)
@@ -280,9 +316,9 @@ class WebSocketHandler:
             # Only update last_sent for new segments or when we get the final result for a segment
             if segment_id > last_sent:
                 self.redis_client.latest_segment_id_sent[client_id] = segment_id
+                self._partial_texts.pop(client_id, None)
 
-            with self.gateway_service.client_lock:
-                websocket = self.gateway_service.connected_clients.get(client_id)
+            websocket = self.gateway_service.connected_clients.get(client_id)
             send_result_task = None
             utterance_end_task = None
             if websocket:
@@ -296,7 +332,7 @@ class WebSocketHandler:
                     }
                     result_text = (message['translation'] or message['text'])
                     self.logger.info(f"Sending \"{result_text}\" to client_id {client_id}")
-                    send_result_task = asyncio.create_task(websocket.send(json.dumps(message)))
+                    send_result_task = asyncio.create_task(websocket.send(orjson.dumps(message).decode('utf-8')))
                     self.gateway_service.metrics["results_forwarded"] += 1
                     self.logger.debug(f"Successfully forwarded result to client {client_id}")
 
@@ -319,10 +355,9 @@ class WebSocketHandler:
                         self.logger.info(f"Final {result_type} result received for client {client_id}, sending utterance_end")
                 except ConnectionClosedError:
                     self.logger.info(f"Client {client_id} disconnected during result forwarding")
-                    with self.gateway_service.client_lock:
-                        self.gateway_service.connected_clients.pop(client_id, None)
-                        self.gateway_service.metrics["clients_connected"] -= 1
-                    await self.redis_client.delete_session(client_id)
+                    self.gateway_service.connected_clients.pop(client_id, None)
+                    self.gateway_service.metrics["clients_connected"] -= 1
+                    await self.gateway_service.delete_session(client_id)
                     await self.redis_client.unsubscribe_from_client_channel(client_id)
                 except WebSocketException as e:
                     self.logger.warning(f"WebSocket error forwarding to client {client_id}: {e}")
@@ -345,18 +380,12 @@ class WebSocketHandler:
             # Only send next job if we've unlocked the current job
             if should_unlock_job and len(session.audio_buffer) > session.last_published_len:
                 send_job_task = asyncio.create_task(self.gateway_service.publish_job_if_needed(client_id, session, is_final=False))
-                # Avoid rewriting entire session blob; update only the changed field
-                try:
-                    # Encode strings to bytes for Redis
-                    key = f"session:{client_id}".encode('utf-8')
-                    value = str(session.last_published_len).encode('utf-8')
-                    await self.redis_client.redis.hset(key, mapping={b"last_published_len": value})
-                except Exception:
-                    # Fall back silently; next full save will correct state
-                    pass
             tasks = [t for t in [send_result_task, send_job_task, utterance_end_task] if t is not None]
             if tasks:
                 await asyncio.gather(*tasks)
+            if send_job_task is not None:
+                # Publishing advanced last_published_len on the cached session; let the debounced save persist it
+                await self.gateway_service.save_session_debounced(client_id, session)
         else:
             self.logger.debug(f"Ignoring out-of-order segment {segment_id} for client {client_id} (last sent: {last_sent})")
 
@@ -385,13 +414,13 @@ class WebSocketHandler:
         except Exception as e:
             self.logger.error(f"[GATEWAY-{self.gateway_service.instance_id}] Error closing websocket/transport for client {client_id}: {e}")
         try:
-            with self.gateway_service.client_lock:
-                self.gateway_service.connected_clients.pop(client_id, None)
-                self.gateway_service.metrics["clients_connected"] -= 1
-            # Clean up session and unsubscribe from result channel
-            await self.redis_client.delete_session(client_id)
+            self.gateway_service.connected_clients.pop(client_id, None)
+            self._partial_texts.pop(client_id, None)
+            self.gateway_service.metrics["clients_connected"] -= 1
+            # Clean up session (Redis and local cache) and unsubscribe from result channel
+            await self.gateway_service.delete_session(client_id)
             await self.redis_client.unsubscribe_from_client_channel(client_id)
             self.logger.info(f"[GATEWAY-{self.gateway_service.instance_id}] Client {client_id} disconnected")
-            self.logger.info(f"After disconnect: connected_clients={len(self.gateway_service.connected_clients)}, client_pubsubs={len(self.redis_client.client_pubsubs)}")
+            self.logger.info(f"After disconnect: connected_clients={len(self.gateway_service.connected_clients)}, result_consumers={len(self.redis_client.result_queues)}")
         except Exception as e:
             self.logger.error(f"[GATEWAY-{self.gateway_service.instance_id}] Error during cleanup for client {client_id}: {e}")
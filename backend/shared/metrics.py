@@ -32,6 +32,8 @@ class WorkerMetrics:
 
         # Track last memory check time
         self.last_memory_check = time.time()
+        # Process handle is created once and reused for every memory sample
+        self._process = psutil.Process()
 
     def update_memory_usage(self):
         """Update current memory usage metric"""
@@ -39,8 +41,7 @@ class WorkerMetrics:
         # Only check memory every 30 seconds to avoid overhead
         if current_time - self.last_memory_check >= 30:
             try:
-                process = psutil.Process()
-                memory_mb = process.memory_info().rss / 1024 / 1024
+                memory_mb = self._process.memory_info().rss / 1024 / 1024
                 self.metrics["memory_mb"] = round(memory_mb, 2)
                 self.last_memory_check = current_time
             except Exception as e:
@@ -4,21 +4,34 @@ redis_consumer.py - Shared Redis Stream consumer for worker services
 Provides a standardized way for workers to consume jobs from Redis Streams
 using consumer groups. Handles connection management, message processing,
 and error handling.
+
+On startup a consumer first re-reads its own pending entries (PEL) left over
+from a previous run, then switches to new messages. A background XAUTOCLAIM
+loop takes over messages left pending by consumers that have died.
 """
 
 import asyncio
 import logging
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Callable, Optional, Iterable, List
 import redis.asyncio as redis
 from redis.exceptions import ConnectionError
 
+# Pending entries idle longer than this are assumed to belong to a dead consumer
+RECLAIM_MIN_IDLE_MS = 60000
+RECLAIM_INTERVAL_SECONDS = 30
+RECLAIM_BATCH_SIZE = 50
+PEL_DRAIN_BATCH_SIZE = 100
+# New messages fetched per XREADGROUP; their XACK/XDEL go out in one pipeline
+READ_BATCH_SIZE = 16
+
 
 class RedisStreamConsumer:
     """Consumes jobs from Redis Streams using consumer groups"""
 
     def __init__(self, redis_url: str, stream_name: str, consumer_group: str,
                  consumer_id: str, logger: logging.Logger,
-                 message_processor: Callable[[str, Dict[str, Any]], None]):
+                 message_processor: Callable[[str, Dict[str, Any]], None],
+                 binary_fields: Iterable[str] = (), max_concurrency: int = 1):
         """
         Initialize Redis stream consumer
 
@@ -29,6 +42,8 @@ class RedisStreamConsumer:
             consumer_id: Unique consumer ID within the group
             logger: Logger instance
             message_processor: Async function to process each message (message_id, message_data)
+            binary_fields: Field names whose values are passed through as raw bytes (e.g. PCM audio)
+            max_concurrency: Messages processed at once; messages with the same client_id keep stream order
         """
         self.redis_url = redis_url
         self.stream_name = stream_name
@@ -36,7 +51,12 @@ class RedisStreamConsumer:
         self.consumer_id = consumer_id
         self.logger = logger
         self.message_processor = message_processor
+        self.binary_fields = frozenset(binary_fields)
+        self._binary_keys = frozenset(field.encode('utf-8') for field in self.binary_fields)
+        self.max_concurrency = max(1, max_concurrency)
+        self._concurrency_limit = asyncio.Semaphore(self.max_concurrency)
         self.redis: Optional[redis.Redis] = None
+        self._reclaim_task: Optional[asyncio.Task] = None
 
     async def connect(self):
         """Connect to Redis"""
@@ -50,47 +70,149 @@ class RedisStreamConsumer:
             self.consumer_group,
             self.consumer_id,
             {self.stream_name: ">"},
-            count=1,
+            count=READ_BATCH_SIZE,
             block=1000
         )
 
-    async def _process_stream_message(self, message_id: str, message_data: Dict[str, Any]):
-        """Process a single message from the stream"""
+    async def _ack_and_delete(self, message_ids: List[bytes]):
+        """Acknowledge messages and remove them from the stream in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(self.stream_name, self.consumer_group, *message_ids)
+        pipe.xdel(self.stream_name, *message_ids)
+        await pipe.execute()
+
+    async def _process_stream_message(self, message_id: str, message_data: Dict[str, Any],
+                                      final_attempt: bool = False) -> bool:
+        """Process a single message from the stream
+
+        Returns True when the message is finished with and should be ACKed.
+        A failed message stays pending so XAUTOCLAIM can retry it, unless this
+        was already a retry (final_attempt), in which case it is dropped.
+        """
+        if not message_data:
+            # Entry was trimmed or deleted from the stream while still pending
+            return True
+
         try:
-            # Decode bytes to strings for message_data (Redis with decode_responses=False)
-            decoded_message_data = {}
-            for key, value in message_data.items():
-                if isinstance(key, bytes):
-                    key = key.decode('utf-8')
-                if isinstance(value, bytes):
-                    value = value.decode('utf-8')
-                decoded_message_data[key] = value
+            # Decode bytes to strings for message_data (Redis with decode_responses=False);
+            # binary fields are matched on their raw key so they skip decoding entirely
+            binary_keys = self._binary_keys
+            decoded_message_data = {
+                key.decode('utf-8'): value if key in binary_keys else value.decode('utf-8')
+                for key, value in message_data.items()
+            }
 
             # Extract job info for logging
             job_id = decoded_message_data.get("job_id", "unknown")
             client_id = decoded_message_data.get("client_id", "unknown")
-            self.logger.debug(f"Received job message {message_id}: job_id={job_id}, client_id={client_id}")
+            self.logger.debug("Received job message %s: job_id=%s, client_id=%s", message_id, job_id, client_id)
 
             # Process the message
             await self.message_processor(message_id, decoded_message_data)
-
-            # Acknowledge and delete message
-            await self.redis.xack(self.stream_name, self.consumer_group, message_id)
-            await self.redis.xdel(self.stream_name, message_id)
+            return True
 
         except Exception as e:
             job_id = decoded_message_data.get("job_id", "unknown") if 'decoded_message_data' in locals() else "unknown"
             self.logger.error(f"Error processing job {job_id}: {e}")
+            if final_attempt:
+                self.logger.error(f"Dropping job {job_id} ({message_id}) after repeated failure")
+            return final_attempt
+
+    async def _process_in_order(self, message_list, final_attempt: bool = False) -> List[bytes]:
+        """Process messages one after another; returns the IDs of the finished ones"""
+        finished = []
+        for message_id, message_data in message_list:
+            async with self._concurrency_limit:
+                if await self._process_stream_message(message_id, message_data, final_attempt):
+                    finished.append(message_id)
+        return finished
+
+    async def _process_batch(self, message_list, final_attempt: bool = False):
+        """Process a batch of messages, then ACK and delete the finished ones together"""
+        if self.max_concurrency == 1 or len(message_list) == 1:
+            finished = await self._process_in_order(message_list, final_attempt)
+        else:
+            # Jobs for one client must keep their stream order: each client's messages run
+            # in sequence while different clients run side by side (up to max_concurrency)
+            by_client: Dict[Any, list] = {}
+            for message in message_list:
+                by_client.setdefault(message[1].get(b"client_id"), []).append(message)
+            results = await asyncio.gather(*(
+                self._process_in_order(client_messages, final_attempt) for client_messages in by_client.values()
+            ))
+            finished = [message_id for client_finished in results for message_id in client_finished]
+        if finished:
+            await self._ack_and_delete(finished)
+
+    async def _drain_pel(self):
+        """Re-process this consumer's own pending entries left over from a previous run"""
+        last_id = "0"
+        drained = 0
+        while True:
+            messages = await self.redis.xreadgroup(
+                self.consumer_group,
+                self.consumer_id,
+                {self.stream_name: last_id},
+                count=PEL_DRAIN_BATCH_SIZE
+            )
+            if not messages or not messages[0][1]:
+                break
+
+            message_list = messages[0][1]
+            await self._process_batch(message_list, final_attempt=True)
+            drained += len(message_list)
+            # Every entry is ACKed above, but advance anyway so nothing can be read twice
+            last_id = message_list[-1][0]
+
+        if drained:
+            self.logger.info(f"Recovered {drained} pending messages from {self.stream_name}")
+
+    async def _reclaim_loop(self):
+        """Periodically claim messages left pending by dead consumers"""
+        while True:
+            await asyncio.sleep(RECLAIM_INTERVAL_SECONDS)
+            try:
+                start_id = "0-0"
+                while True:
+                    result = await self.redis.xautoclaim(
+                        self.stream_name,
+                        self.consumer_group,
+                        self.consumer_id,
+                        min_idle_time=RECLAIM_MIN_IDLE_MS,
+                        start_id=start_id,
+                        count=RECLAIM_BATCH_SIZE
+                    )
+                    start_id = result[0]
+                    claimed = [(message_id, message_data) for message_id, message_data in result[1]
+                               if message_id is not None]
+                    if claimed:
+                        self.logger.warning(f"Reclaimed {len(claimed)} idle messages from {self.stream_name}")
+                        await self._process_batch(claimed, final_attempt=True)
+                    if start_id in (b"0-0", "0-0"):
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error reclaiming pending messages: {e}")
 
     async def consume_jobs(self):
         """Consume jobs from Redis Stream using consumer groups"""
+        # Phase 1: finish whatever this consumer had in flight before it restarted
+        try:
+            await self._drain_pel()
+        except Exception as e:
+            self.logger.error(f"Error recovering pending messages: {e}")
+
+        if self._reclaim_task is None or self._reclaim_task.done():
+            self._reclaim_task = asyncio.create_task(self._reclaim_loop())
+
+        # Phase 2: new messages only
         while True:
             try:
                 messages = await self._read_stream_messages()
 
                 for stream_name, message_list in messages:
-                    for message_id, message_data in message_list:
-                        await self._process_stream_message(message_id, message_data)
+                    await self._process_batch(message_list)
 
             except ConnectionError as e:
                 self.logger.error(f"Redis connection error: {e}")
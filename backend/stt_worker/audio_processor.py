@@ -6,15 +6,79 @@ and result formatting.
 """
 
 import time
+import threading
 import numpy as np
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import Segment, get_ctranslate2_storage, get_suppressed_tokens
 
 from config import (
-    BEAM_SIZE, INITIAL_PROMPT, SUPPRESS_TOKENS, BEST_OF, VAD_FILTER
+    BEAM_SIZE, INITIAL_PROMPT, SUPPRESS_TOKENS, BEST_OF, VAD_FILTER, SAMPLE_RATE, INV_BYTES_PER_SECOND
 )
 
+try:
+    # Optional JIT: fuses the int16 -> float32 cast and the scale into one vectorized loop
+    from numba import njit
+except ImportError:
+    njit = None
+
+# int16 PCM -> float32 in [-1, 1)
+INT16_TO_FLOAT32_SCALE = np.float32(1.0 / 32768.0)
+
+# Batched decoding covers a single 30 s encoder window per clip; longer clips go through transcribe()
+BATCH_MAX_AUDIO_SECONDS = 30.0
+# faster-whisper's transcribe() defaults, applied the same way to batched results
+NO_SPEECH_THRESHOLD = 0.6
+LOG_PROB_THRESHOLD = -1.0
+MAX_INITIAL_TIMESTAMP_SECONDS = 1.0
+
+# Each thread's conversion buffer starts at one 30 s Whisper window, so gateway-sized jobs
+# (a few seconds up to MAX_AUDIO_BUFFER_SECONDS) never have to grow it
+SCRATCH_MIN_SAMPLES = int(BATCH_MAX_AUDIO_SECONDS * SAMPLE_RATE)
+
+# Called from the transcription thread with each segment as soon as Whisper decodes it
+SegmentCallback = Callable[[Segment], None]
+
+
+if njit is not None:
+    @njit(fastmath=True, nogil=True)
+    def _pcm16_to_float32(src, dst, scale):
+        for i in range(src.size):
+            dst[i] = np.float32(src[i]) * scale
+else:
+    def _pcm16_to_float32(src, dst, scale):
+        np.multiply(src, scale, out=dst, casting='unsafe')
+
+
+def _segment_token_slices(tokens: List[int], timestamp_begin: int) -> Optional[List[List[int]]]:
+    """
+    Split one decoded 30 s window into segments the way transcribe() does
+
+    Returns None when the window ends mid-segment: transcribe() would drop that tail and
+    decode it again from the last timestamp in another window, which a single batched
+    generate() call cannot do.
+    """
+    single_timestamp_ending = len(tokens) >= 2 and tokens[-2] < timestamp_begin <= tokens[-1]
+    consecutive_timestamps = [i for i in range(1, len(tokens))
+                              if tokens[i] >= timestamp_begin and tokens[i - 1] >= timestamp_begin]
+    if not consecutive_timestamps:
+        return [tokens]
+    if not single_timestamp_ending:
+        return None
+
+    segments = []
+    last_slice = 0
+    for current_slice in consecutive_timestamps + [len(tokens)]:
+        segment_tokens = tokens[last_slice:current_slice]
+        # transcribe() skips zero-length segments
+        if segment_tokens[0] != segment_tokens[-1]:
+            segments.append(segment_tokens)
+        last_slice = current_slice
+    return segments
+
 
 class AudioProcessor:
     """Handles audio transcription using Faster-Whisper"""
@@ -22,8 +86,160 @@ class AudioProcessor:
     def __init__(self, model: WhisperModel, logger: logging.Logger):
         self.model = model
         self.logger = logger
+        # Per-thread reusable float32 buffer for the PCM conversion (grown on demand)
+        self._scratch = threading.local()
+        # INITIAL_PROMPT tokenized once, exactly as faster-whisper would; passing the token ids
+        # instead of the string saves re-encoding it on every transcribe() call
+        self._prompt_tokens: Optional[List[int]] = (
+            model.hf_tokenizer.encode(" " + INITIAL_PROMPT.strip(), add_special_tokens=False).ids
+            if INITIAL_PROMPT else None
+        )
+        # Tokenizers per language for batched decoding (cheap wrappers around the model's HF tokenizer)
+        self._tokenizers: Dict[str, Tokenizer] = {}
+        # Compile the conversion kernel now (read-only input, like np.frombuffer) rather than on the first job
+        _pcm16_to_float32(np.frombuffer(b"\0\0", dtype=np.int16), np.empty(1, dtype=np.float32), INT16_TO_FLOAT32_SCALE)
+
+    def _to_float32(self, audio_array: np.ndarray) -> np.ndarray:
+        """Scale int16 samples into this thread's reusable float32 buffer in a single pass"""
+        n = audio_array.size
+        buf = getattr(self._scratch, "buf", None)
+        if buf is None or buf.size < n:
+            buf = np.empty(max(n, SCRATCH_MIN_SAMPLES), dtype=np.float32)
+            self._scratch.buf = buf
+        out = buf[:n]
+        _pcm16_to_float32(audio_array, out, INT16_TO_FLOAT32_SCALE)
+        return out
+
+    def _get_tokenizer(self, language: Optional[str]) -> Tokenizer:
+        """Return the (cached) transcribe tokenizer for a language"""
+        tokenizer = self._tokenizers.get(language)
+        if tokenizer is None:
+            tokenizer = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual,
+                                  task="transcribe", language=language)
+            self._tokenizers[language] = tokenizer
+        return tokenizer
+
+    def transcribe_batch(self, audio_list: List[bytes], languages: List[str],
+                         on_segment_callbacks: Optional[List[Optional[SegmentCallback]]] = None) -> List[Dict[str, Any]]:
+        """
+        Transcribe several audio clips with one batched encoder and decoder call
+
+        Only used when ENABLE_BATCHING is on. The batched path drives CTranslate2 directly and
+        reproduces transcribe()'s single-window decoding; clips it cannot match exactly are
+        transcribed one by one instead.
+
+        Args:
+            audio_list: Raw audio bytes (16-bit PCM) per job
+            languages: Language code per job (auto-detect if empty)
+            on_segment_callbacks: Optional per-job segment callbacks; only called when a job is
+                transcribed on its own, since a batched call finishes every segment at once
+
+        Returns:
+            One result dict per job, in the same order as audio_list
+        """
+        durations = [len(audio_data) * INV_BYTES_PER_SECOND for audio_data in audio_list]
+        callbacks = on_segment_callbacks or [None] * len(audio_list)
+
+        # The VAD filter and multi-window clips need transcribe()'s full segment loop
+        if len(audio_list) == 1 or VAD_FILTER or max(durations) > BATCH_MAX_AUDIO_SECONDS:
+            return self._transcribe_each(audio_list, languages, callbacks)
+
+        try:
+            return self._transcribe_batch(audio_list, languages, durations, callbacks)
+        except Exception as e:
+            self.logger.error(f"Batched transcription of {len(audio_list)} jobs failed, transcribing one by one: {e}")
+            return self._transcribe_each(audio_list, languages, callbacks)
+
+    def _transcribe_each(self, audio_list: List[bytes], languages: List[str],
+                         callbacks: List[Optional[SegmentCallback]]) -> List[Dict[str, Any]]:
+        return [self.transcribe_audio(audio_data, language, on_segment=on_segment)
+                for audio_data, language, on_segment in zip(audio_list, languages, callbacks)]
+
+    def _transcribe_batch(self, audio_list: List[bytes], languages: List[str], durations: List[float],
+                          callbacks: List[Optional[SegmentCallback]]) -> List[Dict[str, Any]]:
+        start_time = time.time()
+        whisper = self.model.model
+        feature_extractor = self.model.feature_extractor
+        nb_max_frames = feature_extractor.nb_max_frames
+
+        # Log-mel features per clip, zero-padded to the encoder's 30 s window as transcribe() does
+        features = []
+        for audio_data in audio_list:
+            audio_float = self._to_float32(np.frombuffer(audio_data, dtype=np.int16))
+            mel = feature_extractor(audio_float)
+            content_frames = mel.shape[-1] - nb_max_frames
+            features.append(pad_or_trim(mel[:, :content_frames], nb_max_frames))
+
+        to_cpu = whisper.device == "cuda" and len(whisper.device_index) > 1
+        encoder_output = whisper.encode(get_ctranslate2_storage(np.stack(features)), to_cpu=to_cpu)
+
+        # Jobs without a source language take the top detected language of their own clip
+        languages = list(languages)
+        language_probabilities = [1.0] * len(languages)
+        if not whisper.is_multilingual:
+            languages = ["en"] * len(languages)
+        elif not all(languages):
+            detected = whisper.detect_language(encoder_output)
+            for i, language in enumerate(languages):
+                if not language:
+                    language_token, language_probabilities[i] = detected[i][0]
+                    languages[i] = language_token[2:-2]
+
+        tokenizers = [self._get_tokenizer(language) for language in languages]
+        # Every prompt has the same length (SOT, language, task), as batched generate() requires
+        prompts = [self.model.get_prompt(tokenizer, self._prompt_tokens or []) for tokenizer in tokenizers]
+
+        results = whisper.generate(
+            encoder_output,
+            prompts,
+            beam_size=BEAM_SIZE,
+            patience=1,
+            length_penalty=1,
+            repetition_penalty=1,
+            no_repeat_ngram_size=0,
+            max_length=self.model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            # The suppressed ids are special tokens shared by every language, so any tokenizer gives the same list
+            suppress_tokens=get_suppressed_tokens(tokenizers[0], SUPPRESS_TOKENS),
+            max_initial_timestamp_index=int(round(MAX_INITIAL_TIMESTAMP_SECONDS / self.model.time_precision)),
+        )
+
+        # Every job in the batch shares the batch's wall time
+        processing_time = time.time() - start_time
+        batch_results = []
+        for result, tokenizer, language, language_probability, audio_data, audio_duration, on_segment in zip(
+                results, tokenizers, languages, language_probabilities, audio_list, durations, callbacks):
+            tokens = result.sequences_ids[0]
+            avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+
+            # Silence: transcribe() drops a window with a high no-speech probability unless the text is confident
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob <= LOG_PROB_THRESHOLD:
+                parts = []
+            else:
+                segment_tokens = _segment_token_slices(tokens, tokenizer.timestamp_begin)
+                if segment_tokens is None:
+                    # Needs a second window: let transcribe() handle this clip (language already known)
+                    batch_results.append(self.transcribe_audio(audio_data, language, on_segment=on_segment))
+                    continue
+                parts = [text for text in map(tokenizer.decode, segment_tokens) if text.strip()]
+
+            transcription = " ".join(parts).strip()
+            batch_results.append({
+                "text": transcription,
+                "language": language,
+                "language_probability": language_probability,
+                "processing_time": processing_time,
+                "audio_duration": audio_duration,
+                "segments": len(parts)
+            })
+
+        self.logger.info(f"Batch of {len(audio_list)} transcriptions completed in {processing_time:.2f}s")
+        return batch_results
 
-    def transcribe_audio(self, audio_data: bytes, language: str = "", use_vad_filter: Optional[bool] = None) -> Dict[str, Any]:
+    def transcribe_audio(self, audio_data: bytes, language: str = "", use_vad_filter: Optional[bool] = None,
+                         on_segment: Optional[SegmentCallback] = None) -> Dict[str, Any]:
         """
         Transcribe audio data to text
 
@@ -31,6 +247,7 @@ class AudioProcessor:
             audio_data: Raw audio bytes (16-bit PCM)
             language: Language code (optional, auto-detect if empty)
             use_vad_filter: Whether to use VAD filtering (uses config default if None)
+            on_segment: Optional callback invoked with each segment as it is decoded
 
         Returns:
             Dict containing transcription results and metadata
@@ -38,12 +255,13 @@ class AudioProcessor:
         try:
             start_time = time.time()
 
-            # Calculate audio duration (16kHz, int16 format = 2 bytes per sample)
-            audio_duration = len(audio_data) / (2 * 16000)
+            # Calculate audio duration (int16 format = 2 bytes per sample)
+            audio_duration = len(audio_data) * INV_BYTES_PER_SECOND
 
-            # Convert bytes to numpy array
+            # Convert bytes to numpy array; the float32 view is only valid until this
+            # thread's next call, which is fine since the segments are consumed below
             audio_array = np.frombuffer(audio_data, dtype=np.int16)
-            audio_float = audio_array.astype(np.float32) / 32768.0
+            audio_float = self._to_float32(audio_array)
 
             # Use VAD filter from config if not specified
             vad_filter = use_vad_filter if use_vad_filter is not None else VAD_FILTER
@@ -53,16 +271,20 @@ class AudioProcessor:
                 audio_float,
                 language=language if language else None,
                 beam_size=BEAM_SIZE,
-                initial_prompt=INITIAL_PROMPT,
+                initial_prompt=self._prompt_tokens,
                 suppress_tokens=SUPPRESS_TOKENS,
                 best_of=BEST_OF,
                 temperature=0,
                 vad_filter=vad_filter
             )
 
-            # Convert generator to list to get segments count
-            segments_list = list(segments)
-            transcription = " ".join(segment.text for segment in segments_list).strip()
+            # Segments are decoded lazily; hand each one on as it arrives instead of waiting for them all
+            parts = []
+            for segment in segments:
+                parts.append(segment.text)
+                if on_segment is not None:
+                    on_segment(segment)
+            transcription = " ".join(parts).strip()
             processing_time = time.time() - start_time
 
             result = {
@@ -71,7 +293,7 @@ class AudioProcessor:
                 "language_probability": info.language_probability,
                 "processing_time": processing_time,
                 "audio_duration": audio_duration,
-                "segments": len(segments_list)
+                "segments": len(parts)
             }
 
             self.logger.info(f"Transcription completed in {processing_time:.2f}s")
@@ -80,7 +302,7 @@ class AudioProcessor:
         except Exception as e:
             self.logger.error(f"Error transcribing audio: {e}")
             # Calculate audio duration even in error case
-            audio_duration = len(audio_data) / (2 * 16000)
+            audio_duration = len(audio_data) * INV_BYTES_PER_SECOND
             return {
                 "text": "",
                 "error": str(e),
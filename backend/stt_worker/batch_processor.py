@@ -0,0 +1,110 @@
+"""
+batch_processor.py - Micro-batching of transcription requests for STT Worker
+
+Collects audio jobs that arrive within a short window into a single batched
+Faster-Whisper call, so concurrent clients share one encoder/decoder pass.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from config import MAX_BATCH_SIZE, BATCH_TIMEOUT_MS, NUM_WORKERS
+from audio_processor import AudioProcessor, SegmentCallback
+
+# (audio bytes, language, segment callback, result future)
+QueuedJob = Tuple[bytes, str, Optional[SegmentCallback], asyncio.Future]
+
+
+class BatchAudioProcessor:
+    """Queues transcription requests and runs them through AudioProcessor.transcribe_batch"""
+
+    def __init__(self, audio_processor: AudioProcessor, executor: ThreadPoolExecutor, logger: logging.Logger):
+        self.audio_processor = audio_processor
+        self.executor = executor
+        self.logger = logger
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._batch_task: Optional[asyncio.Task] = None
+        # Running batches, referenced here so the event loop can't garbage-collect them mid-flight
+        self._batch_runs: Set[asyncio.Task] = set()
+        # One batch in flight per model worker; jobs arriving meanwhile queue up for the next batch
+        self._free_workers = asyncio.Semaphore(NUM_WORKERS)
+
+    async def transcribe(self, audio_data: bytes, language: str = "",
+                         on_segment: Optional[SegmentCallback] = None) -> Dict[str, Any]:
+        """Queue audio for the next batch and wait for its transcription result"""
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_task = asyncio.create_task(self._batch_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio_data, language, on_segment, future))
+        return await future
+
+    async def _batch_loop(self):
+        """Drain queued jobs into batches of up to MAX_BATCH_SIZE"""
+        loop = asyncio.get_running_loop()
+        window = BATCH_TIMEOUT_MS / 1000.0
+        batch: List[QueuedJob] = []
+        holding_worker = False
+
+        try:
+            while True:
+                await self._free_workers.acquire()
+                holding_worker = True
+                batch = [await self._queue.get()]
+
+                # Take whatever is already queued, then wait up to the window for more
+                deadline = loop.time() + window
+                while len(batch) < MAX_BATCH_SIZE:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # _run_batch releases the worker slot
+                task = asyncio.create_task(self._run_batch(batch))
+                self._batch_runs.add(task)
+                task.add_done_callback(self._batch_runs.discard)
+                batch = []
+                holding_worker = False
+        except Exception as e:
+            self.logger.error(f"Transcription batch loop stopped: {e}")
+        finally:
+            if holding_worker:
+                self._free_workers.release()
+            # Nothing will pick these jobs up any more; fail them instead of leaving callers waiting.
+            # The next transcribe() call starts a fresh loop.
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Transcription batch loop stopped"))
+
+    async def _run_batch(self, batch: List[QueuedJob]):
+        """Transcribe one batch in the executor and hand each job its own result"""
+        try:
+            audio_list = [audio_data for audio_data, _, _, _ in batch]
+            languages = [language for _, language, _, _ in batch]
+            callbacks = [on_segment for _, _, on_segment, _ in batch]
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.audio_processor.transcribe_batch, audio_list, languages, callbacks
+            )
+        except Exception as e:
+            self.logger.error(f"Transcription batch of {len(batch)} jobs failed: {e}")
+            results = [e] * len(batch)
+        finally:
+            self._free_workers.release()
+
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -21,9 +21,16 @@ TRANSCRIPTIONS_STREAM = os.getenv("TRANSCRIPTIONS_STREAM", "transcriptions")
 # === Model Configuration ===
 MODEL_SIZE = os.getenv("MODEL_SIZE", "large-v3")
 DEVICE = os.getenv("DEVICE", "cuda")
-COMPUTE_TYPE = os.getenv("COMPUTE_TYPE", "int8_float16" if DEVICE == "cuda" else "int8")
+# "auto" lets CTranslate2 pick the fastest precision the device actually supports
+COMPUTE_TYPE = os.getenv("COMPUTE_TYPE", "auto")
 DOWNLOAD_ROOT = os.getenv("DOWNLOAD_ROOT")
 
+# === Audio Format ===
+# 16-bit mono PCM as sent by the gateway (same SAMPLE_RATE setting); Faster-Whisper expects 16kHz
+SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "16000"))
+BYTES_PER_SECOND = 2 * SAMPLE_RATE
+INV_BYTES_PER_SECOND = 1.0 / BYTES_PER_SECOND  # Multiply byte counts by this to get seconds
+
 # === Transcription Parameters ===
 BEAM_SIZE = int(os.getenv("BEAM_SIZE", "1"))
 INITIAL_PROMPT = os.getenv("INITIAL_PROMPT")
@@ -33,6 +40,15 @@ BEST_OF = int(os.getenv("BEST_OF", "1"))
 
 # === Worker Configuration ===
 PENDING_ACK_TTL = int(os.getenv("PENDING_ACK_TTL", "300"))  # 5 minutes
+# Model workers (CTranslate2 inter-op replicas); this many jobs from different clients transcribe at once
+NUM_WORKERS = int(os.getenv("NUM_WORKERS", "1"))
+# CTranslate2 threads per model worker on CPU (0 = half the logical cores split across NUM_WORKERS)
+CPU_THREADS = int(os.getenv("CPU_THREADS", "0"))
+# Opt-in: jobs queued within BATCH_TIMEOUT_MS of each other are transcribed in one batched model call.
+# Off by default, so each model worker transcribes one job at a time through faster-whisper's transcribe()
+ENABLE_BATCHING = os.getenv("ENABLE_BATCHING", "false").lower() == "true"
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+BATCH_TIMEOUT_MS = float(os.getenv("BATCH_TIMEOUT_MS", "20"))
 
 # === Health Check Configuration ===
 HEALTH_PORT = int(os.getenv("HEALTH_PORT_STT", "8081"))
@@ -56,6 +72,28 @@ def validate_configuration():
     if DEVICE not in valid_devices:
         issues.append(f"Invalid DEVICE: {DEVICE}. Must be one of: {', '.join(valid_devices)}")
 
+    # Validate compute type
+    valid_compute_types = ["auto", "int8", "int8_float16", "int8_bfloat16", "int8_float32", "int16",
+                           "float16", "bfloat16", "float32"]
+    if COMPUTE_TYPE not in valid_compute_types:
+        issues.append(f"Invalid COMPUTE_TYPE: {COMPUTE_TYPE}. Must be one of: {', '.join(valid_compute_types)}")
+
+    # Validate parallelism
+    if NUM_WORKERS < 1:
+        issues.append(f"Invalid NUM_WORKERS: {NUM_WORKERS}. Must be >= 1")
+    if CPU_THREADS < 0:
+        issues.append(f"Invalid CPU_THREADS: {CPU_THREADS}. Must be >= 0")
+
+    # Validate batching
+    if MAX_BATCH_SIZE < 1:
+        issues.append(f"Invalid MAX_BATCH_SIZE: {MAX_BATCH_SIZE}. Must be >= 1")
+    if BATCH_TIMEOUT_MS < 0:
+        issues.append(f"Invalid BATCH_TIMEOUT_MS: {BATCH_TIMEOUT_MS}. Must be >= 0")
+
+    # Validate sample rate
+    if SAMPLE_RATE != 16000:
+        issues.append(f"Invalid SAMPLE_RATE: {SAMPLE_RATE}. Faster-Whisper requires 16000 Hz audio")
+
     # Validate beam size
     if BEAM_SIZE < 1:
         issues.append(f"Invalid BEAM_SIZE: {BEAM_SIZE}. Must be >= 1")
@@ -76,8 +114,14 @@ def print_configuration():
     print(f"Model Size: {MODEL_SIZE}")
     print(f"Device: {DEVICE}")
     print(f"Compute Type: {COMPUTE_TYPE}")
+    print(f"Sample Rate: {SAMPLE_RATE}")
     print(f"Beam Size: {BEAM_SIZE}")
     print(f"VAD Filter: {VAD_FILTER}")
     print(f"Best Of: {BEST_OF}")
+    print(f"Num Workers: {NUM_WORKERS}")
+    print(f"CPU Threads: {CPU_THREADS or 'auto'}")
+    print(f"Batching: {'enabled' if ENABLE_BATCHING else 'disabled'}")
+    print(f"Max Batch Size: {MAX_BATCH_SIZE}")
+    print(f"Batch Timeout: {BATCH_TIMEOUT_MS}ms")
     print(f"Health Port: {HEALTH_PORT}")
     print("===============================")
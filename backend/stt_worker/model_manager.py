@@ -5,17 +5,22 @@ Handles Faster-Whisper model loading, initialization, and management.
 Provides methods for model validation and warm-up.
 """
 
+import os
 import time
 import numpy as np
 import logging
+import ctranslate2
 from faster_whisper import WhisperModel
 from typing import Optional, Tuple, List
 
 from config import (
     MODEL_SIZE, DEVICE, COMPUTE_TYPE, DOWNLOAD_ROOT,
-    BEAM_SIZE, BEST_OF
+    BEAM_SIZE, BEST_OF, NUM_WORKERS, CPU_THREADS, SAMPLE_RATE
 )
 
+# Tried in order when COMPUTE_TYPE=auto on CUDA; bf16 support means an Ampere or newer GPU
+BF16_COMPUTE_TYPES = ("int8_bfloat16", "bfloat16")
+
 
 class STTModelManager:
     """Manages the Faster-Whisper model lifecycle"""
@@ -23,21 +28,40 @@ class STTModelManager:
     def __init__(self, logger: logging.Logger):
         self.logger = logger
         self.model: Optional[WhisperModel] = None
+        # One second of low-level noise for warm-up, generated once as float32 and scaled in place
+        # (seeded, so every warm-up, including after a reload, decodes the same input)
+        self._warmup_audio = np.random.default_rng(0).standard_normal(SAMPLE_RATE, dtype=np.float32)
+        self._warmup_audio *= np.float32(0.01)
 
     def load_model(self) -> WhisperModel:
         """Load the Faster-Whisper model"""
         start_time = time.time()
 
         try:
-            self.logger.info(f"Loading Faster-Whisper model: {MODEL_SIZE} on {DEVICE}")
-
-            self.model = WhisperModel(
-                model_size_or_path=MODEL_SIZE,
-                device=DEVICE,
-                compute_type=COMPUTE_TYPE,
-                device_index=0,
-                download_root=DOWNLOAD_ROOT,
-            )
+            cpu_threads = self._cpu_threads()
+            self.logger.info(f"Loading Faster-Whisper model: {MODEL_SIZE} on {DEVICE} "
+                             f"(num_workers={NUM_WORKERS}, cpu_threads={cpu_threads or 'default'})")
+
+            for compute_type in self._compute_type_candidates():
+                try:
+                    self.model = WhisperModel(
+                        model_size_or_path=MODEL_SIZE,
+                        device=DEVICE,
+                        compute_type=compute_type,
+                        device_index=0,
+                        download_root=DOWNLOAD_ROOT,
+                        cpu_threads=cpu_threads,
+                        num_workers=NUM_WORKERS,
+                    )
+                    break
+                except ValueError as e:
+                    # Raised by CTranslate2 for a compute type the device can't run
+                    if compute_type == COMPUTE_TYPE:
+                        raise
+                    self.logger.warning(f"Compute type {compute_type} failed ({e}), falling back")
+
+            # With COMPUTE_TYPE=auto (or an unsupported type) CTranslate2 picks the precision itself
+            self.logger.info(f"Model compute type: {self.get_compute_type()} (requested: {COMPUTE_TYPE})")
 
             # Warm up the model with validation
             self.logger.info("Warming up model...")
@@ -51,23 +75,50 @@ class STTModelManager:
             self.logger.error(f"Error loading model: {e}")
             raise
 
+    @staticmethod
+    def _cpu_threads() -> int:
+        """Threads per model worker; 0 keeps CTranslate2's default (only CPU inference uses them)"""
+        if CPU_THREADS > 0:
+            return CPU_THREADS
+        if DEVICE != "cpu":
+            return 0
+        # Roughly the physical cores, shared between the model workers
+        return max(1, (os.cpu_count() or 2) // 2 // NUM_WORKERS)
+
+    def _compute_type_candidates(self) -> List[str]:
+        """Compute types to try in order; the configured value is always last"""
+        if COMPUTE_TYPE != "auto" or DEVICE != "cuda":
+            return [COMPUTE_TYPE]
+        try:
+            supported = ctranslate2.get_supported_compute_types("cuda", 0)
+        except Exception as e:
+            self.logger.warning(f"Could not query supported CUDA compute types: {e}")
+            return [COMPUTE_TYPE]
+
+        candidates = [compute_type for compute_type in BF16_COMPUTE_TYPES if compute_type in supported]
+        self.logger.info(f"Supported CUDA compute types: {', '.join(sorted(supported))}; trying {candidates + [COMPUTE_TYPE]}")
+        return candidates + [COMPUTE_TYPE]
+
     def _warm_up_model(self):
         """Warm up the model with dummy audio to ensure it's ready"""
-        dummy_audio = np.random.randn(16000).astype(np.float32) * 0.01
-        segments, info = self.model.transcribe(dummy_audio,
+        segments, info = self.model.transcribe(self._warmup_audio,
                                                language="en",
                                                beam_size=BEAM_SIZE,
                                                temperature=0,
                                                best_of=BEST_OF)
 
-        # Convert generator to list to get segments count
-        segments_list = list(segments)
-        transcription = " ".join(segment.text for segment in segments_list)
+        # Decode every segment (that is the warm-up), keeping only a count and the first text for the log
+        count = 0
+        first_text = ""
+        for segment in segments:
+            count += 1
+            if count == 1:
+                first_text = segment.text
 
         # Validate warm-up worked - just ensure model can process audio
         # Random noise may produce no transcription, which is normal
-        self.logger.debug(f"Warm-up completed: {len(segments_list)} segments, '{transcription[:50]}...'")
-        if len(segments_list) == 0 and not transcription.strip():
+        self.logger.debug("Warm-up completed: %d segments, '%s...'", count, first_text[:50])
+        if count == 0:
             self.logger.warning("Model warm-up produced no segments/transcription from random noise - this is usually normal")
         else:
             self.logger.debug("Model warm-up successful")
@@ -76,6 +127,10 @@ class STTModelManager:
         """Check if the model is loaded and ready"""
         return self.model is not None
 
+    def get_compute_type(self) -> str:
+        """Compute type CTranslate2 actually selected for the loaded model"""
+        return getattr(self.model.model, "compute_type", COMPUTE_TYPE) if self.model else COMPUTE_TYPE
+
     def get_model_info(self) -> dict:
         """Get information about the loaded model"""
         if not self.model:
@@ -85,5 +140,6 @@ class STTModelManager:
             "loaded": True,
             "model_size": MODEL_SIZE,
             "device": DEVICE,
-            "compute_type": COMPUTE_TYPE
+            "compute_type": self.get_compute_type(),
+            "requested_compute_type": COMPUTE_TYPE
         }
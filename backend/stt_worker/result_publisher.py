@@ -5,10 +5,10 @@ Handles publishing transcription results to Redis pub/sub channels
 and forwarding transcriptions to translation workers when needed.
 """
 
-import json
 import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import ormsgpack
 import redis.asyncio as redis
 
 from config import RESULTS_CHANNEL_PREFIX, TRANSCRIPTIONS_STREAM
@@ -23,39 +23,73 @@ class ResultPublisher:
 
     async def publish_result(self, result: Dict[str, Any]):
         """Publish result to Redis pub/sub channel"""
-        channel = f"{RESULTS_CHANNEL_PREFIX}{result['client_id']}"
-        self.logger.info(f"Publishing result: audio_duration={result.get('audio_duration', 'MISSING')}, processing_time={result.get('processing_time', 'MISSING')}, status={result.get('status', 'MISSING')}, text_len={len(result.get('text', ''))}")
-        # Publish as UTF-8 encoded bytes for consistent handling
-        await self.redis.publish(channel, json.dumps(result).encode('utf-8'))
+        await self.redis.publish(*self._result_message(result))
 
     async def publish_transcription_for_translation(self, result: Dict[str, Any]):
         """When translation is enabled, publish transcription to shared stream for translation workers."""
         try:
-            if result.get("status") != "ok":
-                return
-            text = (result.get("text") or "").strip()
-            if not text:
-                return
-            if not self._parse_bool(result.get("translation_enabled", False)):
+            payload = self._translation_payload(result)
+            if payload is None:
                 return
-
-            # Prepare mapping (strings preferred for Redis Stream entries)
-            payload = {
-                "job_id": str(result.get("job_id", "")),
-                "client_id": str(result.get("client_id", "")),
-                "segment_id": str(result.get("segment_id", "")),
-                "text": text,
-                "source_lang": str(result.get("source_lang", "en")),
-                "target_lang": str(result.get("target_lang", "vi")),
-                "is_final": "true" if self._parse_bool(result.get("is_final", False)) else "false",
-                "timestamp": str(result.get("timestamp", time.time())),
-                "audio_duration": result.get("audio_duration", 0.0)
-            }
             await self.redis.xadd(TRANSCRIPTIONS_STREAM, payload)
-            self.logger.info(f"Published transcription to stream '{TRANSCRIPTIONS_STREAM}' for client {payload['client_id']}")
+            self.logger.debug("Published transcription to stream '%s' for client %s", TRANSCRIPTIONS_STREAM, payload['client_id'])
         except Exception as e:
             self.logger.error(f"Error publishing transcription for translation: {e}")
 
+    async def publish_all(self, result: Dict[str, Any]):
+        """Publish the result and, when translation is enabled, forward it for translation in one round-trip"""
+        payload = self._translation_payload(result)
+        if payload is None:
+            await self.publish_result(result)
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.publish(*self._result_message(result))
+            pipe.xadd(TRANSCRIPTIONS_STREAM, payload)
+            publish_reply, xadd_reply = await pipe.execute(raise_on_error=False)
+
+        # Same failure handling as the separate calls: a failed publish propagates, a failed forward is logged
+        if isinstance(publish_reply, Exception):
+            raise publish_reply
+        if isinstance(xadd_reply, Exception):
+            self.logger.error(f"Error publishing transcription for translation: {xadd_reply}")
+        else:
+            self.logger.debug("Published transcription to stream '%s' for client %s", TRANSCRIPTIONS_STREAM, payload['client_id'])
+
+    def _result_message(self, result: Dict[str, Any]):
+        """Channel and msgpack body for a result"""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Publishing result: audio_duration=%s, processing_time=%s, status=%s, text_len=%d",
+                              result.get('audio_duration', 'MISSING'), result.get('processing_time', 'MISSING'),
+                              result.get('status', 'MISSING'), len(result.get('text', '')))
+        channel = f"{RESULTS_CHANNEL_PREFIX}{result['client_id']}"
+        # Publish as msgpack: smaller than JSON and the gateway decodes it without a text pass.
+        # Timings and probabilities can be numpy scalars, which ormsgpack packs natively with this option
+        return channel, ormsgpack.packb(result, option=ormsgpack.OPT_SERIALIZE_NUMPY)
+
+    def _translation_payload(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Transcriptions stream entry for a result, or None if it shouldn't be translated"""
+        if result.get("status") != "ok":
+            return None
+        text = (result.get("text") or "").strip()
+        if not text:
+            return None
+        if not self._parse_bool(result.get("translation_enabled", False)):
+            return None
+
+        # Prepare mapping (strings preferred for Redis Stream entries)
+        return {
+            "job_id": str(result.get("job_id", "")),
+            "client_id": str(result.get("client_id", "")),
+            "segment_id": str(result.get("segment_id", "")),
+            "text": text,
+            "source_lang": str(result.get("source_lang", "en")),
+            "target_lang": str(result.get("target_lang", "vi")),
+            "is_final": "true" if self._parse_bool(result.get("is_final", False)) else "false",
+            "timestamp": str(result.get("timestamp", time.time())),
+            "audio_duration": result.get("audio_duration", 0.0)
+        }
+
     @staticmethod
     def _parse_bool(value: Any) -> bool:
         """Parse boolean from various string formats"""
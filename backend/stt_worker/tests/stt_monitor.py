@@ -13,12 +13,15 @@ Usage: python stt_monitor.py
 """
 
 import asyncio
-import json
+import orjson
+import ormsgpack
 import os
+import sys
 import time
 import logging
-from typing import Dict, List
-from collections import defaultdict
+import math
+from typing import Deque, Dict
+from collections import defaultdict, deque
 import redis.asyncio as redis
 from redis.exceptions import ConnectionError
 import statistics
@@ -27,16 +30,53 @@ import statistics
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 RESULTS_CHANNEL_PREFIX = os.getenv("RESULTS_CHANNEL_PREFIX", "results:")
 MONITOR_UPDATE_INTERVAL = 5.0  # Update stats every 5 seconds
+PERCENTILE_WINDOW = 10000  # Percentiles are computed over this many most recent jobs
+PER_KEY_WINDOW = 5000  # Recent processing times kept per worker / per client
+
+
+class RunningStats:
+    """Streaming count/mean/variance/min/max in O(1) per sample (Welford's algorithm)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
 
 class STTMonitor:
     def __init__(self):
         self.redis = None
         self.logger = logging.getLogger("STT-Monitor")
 
-        # Processing time tracking
-        self.processing_times: List[float] = []
-        self.worker_times: Dict[str, List[float]] = defaultdict(list)
-        self.client_times: Dict[str, List[float]] = defaultdict(list)
+        # Processing time tracking: all-time stats are streamed, percentiles use a bounded recent window
+        self.processing_stats = RunningStats()
+        self.processing_times: Deque[float] = deque(maxlen=PERCENTILE_WINDOW)
+        # Per-worker/client windows are bounded too, so memory doesn't grow with uptime;
+        # job counts are tracked separately to stay all-time
+        self.worker_times: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=PER_KEY_WINDOW))
+        self.client_times: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=PER_KEY_WINDOW))
+        self.worker_job_counts: Dict[str, int] = defaultdict(int)
+        # worker_id -> "STT" / "TRANS" / "UNKWN", classified once per worker
+        self._worker_type_cache: Dict[str, str] = {}
+
+        # Full-screen redraws only on a terminal; piped/journald output gets one JSON line per refresh
+        self._is_tty = sys.stdout.isatty()
 
         # Real-time stats
         self.total_jobs = 0
@@ -48,6 +88,14 @@ class STTMonitor:
         self.session_start_time = time.time()
         self.session_jobs = 0
 
+    def _worker_type(self, worker_id: str) -> str:
+        """Classify a worker by its ID prefix (cached per worker)"""
+        worker_type = self._worker_type_cache.get(worker_id)
+        if worker_type is None:
+            worker_type = "STT" if worker_id.startswith('stt-') else "TRANS" if worker_id.startswith('translation-') else "UNKWN"
+            self._worker_type_cache[worker_id] = worker_type
+        return worker_type
+
     async def connect_redis(self):
         """Connect to Redis"""
         try:
@@ -88,7 +136,17 @@ class STTMonitor:
     async def process_result(self, data: bytes):
         """Process a single result message"""
         try:
-            result = json.loads(data.decode('utf-8'))
+            # Workers publish msgpack; a leading '{' is JSON from a not-yet-upgraded worker.
+            # Both decoders take the bytes as-is, with no UTF-8 decode pass
+            if data[:1] == b'{':
+                result = orjson.loads(data)
+            else:
+                result = ormsgpack.unpackb(data)
+
+            # Streamed partial text is followed by the job's full result, which is what gets counted
+            status = result.get('status', 'unknown')
+            if status == 'partial':
+                return
 
             # Extract relevant data
             processing_time = result.get('processing_time', 0.0)
@@ -97,11 +155,11 @@ class STTMonitor:
                 audio_duration = float(audio_duration_str) if audio_duration_str is not None else 0.0
             except (ValueError, TypeError):
                 audio_duration = 0.0
-            status = result.get('status', 'unknown')
             worker_id = result.get('worker_id', 'unknown')
             client_id = result.get('client_id', 'unknown')
             job_id = result.get('job_id', 'unknown')
             text_length = len(result.get('text', ''))
+            worker_type = self._worker_type(worker_id)
 
             # Debug logging
             self.logger.info(f"Monitor received result: audio_duration={audio_duration}, processing_time={processing_time}, status={status}, text_len={text_length}")
@@ -116,18 +174,18 @@ class STTMonitor:
 
             if status == 'ok' and processing_time > 0:
                 self.successful_jobs += 1
+                self.processing_stats.add(processing_time)
                 self.processing_times.append(processing_time)
                 self.worker_times[worker_id].append(processing_time)
+                self.worker_job_counts[worker_id] += 1
                 self.client_times[client_id].append(processing_time)
 
                 # Real-time display for this chunk
-                worker_type = "STT" if worker_id.startswith('stt-') else "TRANS" if worker_id.startswith('translation-') else "UNKWN"
                 duration_display = f"{audio_duration:.4f}s" if audio_duration < 0.01 else f"{audio_duration:.2f}s"
                 print(f"✓ [{worker_type}] Input: {duration_display} audio, Output: {processing_time:.2f}s processing ({text_length} chars) - {worker_id}")
 
             elif status == 'error':
                 self.failed_jobs += 1
-                worker_type = "STT" if worker_id.startswith('stt-') else "TRANS" if worker_id.startswith('translation-') else "UNKWN"
                 print(f"✗ [{worker_type}] Input: {audio_duration:.2f}s audio, Failed after {processing_time:.2f}s processing - {worker_id}")
 
         except Exception as e:
@@ -143,14 +201,9 @@ class STTMonitor:
 
         self._last_display_time = current_time
 
-        if not self.processing_times:
+        if not self.processing_stats.count:
             return
 
-        # Calculate statistics
-        avg_time = statistics.mean(self.processing_times) if self.processing_times else 0
-        min_time = min(self.processing_times) if self.processing_times else 0
-        max_time = max(self.processing_times) if self.processing_times else 0
-
         # Calculate throughput
         uptime = current_time - self.start_time
         jobs_per_second = self.successful_jobs / uptime if uptime > 0 else 0
@@ -164,12 +217,28 @@ class STTMonitor:
         else:
             session_throughput = 0
 
+        success_rate = (self.successful_jobs / self.total_jobs * 100) if self.total_jobs > 0 else 0
+
+        if not self._is_tty:
+            print(orjson.dumps({
+                "total_jobs": self.total_jobs,
+                "successful_jobs": self.successful_jobs,
+                "failed_jobs": self.failed_jobs,
+                "success_rate": round(success_rate, 1),
+                "uptime": round(uptime, 1),
+                "jobs_per_second": round(jobs_per_second, 2),
+                "current_jobs_per_second": round(session_throughput, 2),
+                "avg_time": round(self.processing_stats.mean, 3),
+                "min_time": round(self.processing_stats.min, 3),
+                "max_time": round(self.processing_stats.max, 3)
+            }).decode('utf-8'), flush=True)
+            return
+
         # Clear screen and display stats
         print("\033[2J\033[H", end="")  # Clear screen and move cursor to top
         print("="*80)
         print("STT WORKER MONITOR - Performance Statistics")
         print("="*80)
-        success_rate = (self.successful_jobs / self.total_jobs * 100) if self.total_jobs > 0 else 0
 
         print(f"Total Jobs Processed: {self.total_jobs}")
         print(f"Successful Jobs: {self.successful_jobs}")
@@ -181,15 +250,15 @@ class STTMonitor:
 
         # Processing Time Statistics
         print("PROCESSING TIME STATISTICS:")
-        print(f"Average: {avg_time:.3f}s")
-        print(f"Minimum: {min_time:.3f}s")
-        print(f"Maximum: {max_time:.3f}s")
+        print(f"Average: {self.processing_stats.mean:.3f}s")
+        print(f"Std Dev: {self.processing_stats.stdev:.3f}s")
+        print(f"Minimum: {self.processing_stats.min:.3f}s")
+        print(f"Maximum: {self.processing_stats.max:.3f}s")
 
-        # Calculate percentiles
+        # Calculate percentiles (one sort of the recent window for all three)
         if len(self.processing_times) >= 10:
-            p50 = statistics.median(self.processing_times)
-            p95 = statistics.quantiles(self.processing_times, n=20)[18]  # 95th percentile
-            p99 = statistics.quantiles(self.processing_times, n=100)[98]  # 99th percentile
+            percentiles = statistics.quantiles(self.processing_times, n=100)
+            p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
             print(f"P50 (Median): {p50:.3f}s")
             print(f"P95: {p95:.3f}s")
             print(f"P99: {p99:.3f}s")
@@ -207,9 +276,10 @@ class STTMonitor:
         translation_workers = {}
 
         for worker_id, times in self.worker_times.items():
-            if worker_id.startswith('stt-'):
+            worker_type = self._worker_type(worker_id)
+            if worker_type == "STT":
                 stt_workers[worker_id] = times
-            elif worker_id.startswith('translation-'):
+            elif worker_type == "TRANS":
                 translation_workers[worker_id] = times
 
         # STT Worker Statistics
@@ -219,7 +289,7 @@ class STTMonitor:
                 stt_avg = statistics.mean(stt_times)
                 stt_min = min(stt_times)
                 stt_max = max(stt_times)
-                stt_count = len(stt_times)
+                stt_count = sum(self.worker_job_counts[worker_id] for worker_id in stt_workers)
                 stt_throughput = stt_count / uptime if uptime > 0 else 0
 
                 print("STT WORKERS:")
@@ -237,7 +307,7 @@ class STTMonitor:
                 trans_avg = statistics.mean(trans_times)
                 trans_min = min(trans_times)
                 trans_max = max(trans_times)
-                trans_count = len(trans_times)
+                trans_count = sum(self.worker_job_counts[worker_id] for worker_id in translation_workers)
                 trans_throughput = trans_count / uptime if uptime > 0 else 0
 
                 print("TRANSLATION WORKERS:")
@@ -254,11 +324,11 @@ class STTMonitor:
             worker_stats = []
             for worker_id, times in self.worker_times.items():
                 if times:
-                    worker_type = "STT" if worker_id.startswith('stt-') else "TRANS" if worker_id.startswith('translation-') else "OTHER"
+                    worker_type = self._worker_type(worker_id)
                     worker_stats.append({
                         'worker_id': worker_id,
                         'worker_type': worker_type,
-                        'count': len(times),
+                        'count': self.worker_job_counts[worker_id],
                         'avg_time': statistics.mean(times),
                         'min_time': min(times),
                         'max_time': max(times)
@@ -289,6 +359,13 @@ def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
+    try:
+        # libuv-based event loop; not available on Windows, where the default loop is used
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     monitor = STTMonitor()
     asyncio.run(monitor.run())
 
@@ -10,19 +10,21 @@ Adds audio enhancement features:
 
 import asyncio
 import json
-import base64
 import time
 import os
 import sys
-import io
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import orjson
+import ormsgpack
 import redis.asyncio as redis
 from redis.exceptions import ConnectionError
 import numpy as np
+import torch
+import torchaudio
 from pydub import AudioSegment
-from pydub.effects import normalize, compress_dynamic_range
 
 # === Configuration ===
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -34,13 +36,26 @@ TEST_AUDIOS_DIR = "test_audios"
 # Audio enhancement settings
 ENABLE_NORMALIZATION = True  # Boost audio to optimal levels
 ENABLE_COMPRESSION = True    # Dynamic range compression
+NORMALIZE_HEADROOM_DB = 0.1
+COMPRESS_THRESHOLD_DB = -20.0
+COMPRESS_RATIO = 4.0
+COMPRESS_ATTACK_MS = 5.0
+COMPRESS_RELEASE_MS = 50.0
 TARGET_SAMPLE_RATE = 16000   # Whisper's native sample rate
 TARGET_CHANNELS = 1          # Mono
 MIN_DURATION_MS = 100        # Skip files shorter than this
+SUBMIT_BATCH_SIZE = 500      # Jobs per pipelined XADD round-trip
+RESULT_WORKERS = 4           # Coroutines decoding and recording results
+RESULT_QUEUE_SIZE = 1024     # Received results waiting for a worker
 
 SUPPORTED_FORMATS = {'.wav', '.mp3', '.m4a', '.ogg', '.flac', '.opus', '.webm'}
 
 
+def _init_loader_process():
+    """One torch thread per loader process, since every core already runs its own process"""
+    torch.set_num_threads(1)
+
+
 class STTTester:
     def __init__(self, audio_dir: str = TEST_AUDIOS_DIR):
         self.audio_dir = Path(audio_dir)
@@ -49,11 +64,13 @@ class STTTester:
         self.client_id = TEST_CLIENT_ID
         self.results = []
         self.pending_jobs = {}
+        self._result_queue: asyncio.Queue = asyncio.Queue(maxsize=RESULT_QUEUE_SIZE)
         
     async def connect_redis(self):
         """Connect to Redis"""
         print(f"Connecting to Redis: {REDIS_URL}")
-        self.redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+        # Binary-safe connection: audio goes out as raw PCM and results come back as msgpack bytes
+        self.redis = redis.Redis.from_url(REDIS_URL, decode_responses=False)
         await self.redis.ping()
         print("Connected to Redis\n")
         
@@ -68,45 +85,79 @@ class STTTester:
         
     async def listen_for_results(self):
         """Listen for transcription results"""
+        # The receiver only reads the socket; decoding and bookkeeping happen in the workers
+        workers = [asyncio.create_task(self._result_worker()) for _ in range(RESULT_WORKERS)]
         try:
-            async for message in self.pubsub.listen():
-                if message["type"] == "message":
-                    result = json.loads(message["data"])
-                    job_id = result.get("job_id")
-                    
-                    if job_id in self.pending_jobs:
-                        submit_time = self.pending_jobs[job_id]["submit_time"]
-                        total_time = time.time() - submit_time
-                        
-                        result_data = {
-                            "job_id": job_id,
-                            "filename": self.pending_jobs[job_id]["filename"],
-                            "original_size_kb": self.pending_jobs[job_id]["original_size_kb"],
-                            "processed_size_kb": self.pending_jobs[job_id]["processed_size_kb"],
-                            "duration_s": self.pending_jobs[job_id]["duration_s"],
-                            "text": result.get("text", ""),
-                            "language": result.get("language", ""),
-                            "language_probability": result.get("language_probability", 0.0),
-                            "segments": result.get("segments", 0),
-                            "processing_time": result.get("processing_time", 0.0),
-                            "total_time": total_time,
-                            "worker_id": result.get("worker_id", "unknown"),
-                            "status": result.get("status", "unknown"),
-                            "error": result.get("error", None)
-                        }
-                        
-                        self.results.append(result_data)
-                        del self.pending_jobs[job_id]
-                        
-                        status = "OK" if result_data["status"] == "ok" else "FAIL"
-                        text_preview = result_data['text'][:80] if result_data['text'] else "[EMPTY]"
-                        print(f"[{status}] {result_data['filename']} ({result_data['duration_s']:.1f}s): {text_preview}")
-                        print(f"      Processing: {result_data['processing_time']:.2f}s | Total: {total_time:.2f}s | Lang: {result_data['language']}\n")
-                        
+            await self._receive_results()
         except asyncio.CancelledError:
             pass
+        finally:
+            for worker in workers:
+                worker.cancel()
+                
+    async def _receive_results(self):
+        """Hand each result message to the worker queue (blocks when the queue is full)"""
+        get_message = self.pubsub.get_message
+        queue = self._result_queue
+        while True:
+            message = await get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                continue
+            # Drain whatever else is already buffered before yielding to the workers
+            while message is not None:
+                if message["type"] == "message":
+                    await queue.put(message["data"])
+                message = await get_message(ignore_subscribe_messages=True, timeout=0)
+            await asyncio.sleep(0)
+                
+    async def _result_worker(self):
+        """Drain the result queue"""
+        while True:
+            data = await self._result_queue.get()
+            try:
+                self._handle_result(data)
+            except Exception as e:
+                print(f"Error handling result: {e}")
+                
+    def _handle_result(self, data: bytes):
+        """Decode a result and match it to its pending job. There is no await in here, so
+        pending_jobs updates can't interleave between workers"""
+        # Workers publish msgpack; a leading '{' is JSON from a not-yet-upgraded worker.
+        # Both decoders read the bytes directly
+        result = orjson.loads(data) if data[:1] == b'{' else ormsgpack.unpackb(data)
+        job_id = result.get("job_id")
+        
+        if job_id in self.pending_jobs:
+            submit_time = self.pending_jobs[job_id]["submit_time"]
+            total_time = time.time() - submit_time
+            
+            result_data = {
+                "job_id": job_id,
+                "filename": self.pending_jobs[job_id]["filename"],
+                "original_size_kb": self.pending_jobs[job_id]["original_size_kb"],
+                "processed_size_kb": self.pending_jobs[job_id]["processed_size_kb"],
+                "duration_s": self.pending_jobs[job_id]["duration_s"],
+                "text": result.get("text", ""),
+                "language": result.get("language", ""),
+                "language_probability": result.get("language_probability", 0.0),
+                "segments": result.get("segments", 0),
+                "processing_time": result.get("processing_time", 0.0),
+                "total_time": total_time,
+                "worker_id": result.get("worker_id", "unknown"),
+                "status": result.get("status", "unknown"),
+                "error": result.get("error", None)
+            }
+            
+            self.results.append(result_data)
+            del self.pending_jobs[job_id]
+            
+            status = "OK" if result_data["status"] == "ok" else "FAIL"
+            text_preview = result_data['text'][:80] if result_data['text'] else "[EMPTY]"
+            print(f"[{status}] {result_data['filename']} ({result_data['duration_s']:.1f}s): {text_preview}")
+            print(f"      Processing: {result_data['processing_time']:.2f}s | Total: {total_time:.2f}s | Lang: {result_data['language']}\n")
     
-    def enhance_audio(self, audio_segment: AudioSegment, filename: str) -> AudioSegment:
+    @staticmethod
+    def enhance_audio(audio_segment: AudioSegment, filename: str, log: List[str]) -> AudioSegment:
         """
         Enhance audio for better transcription:
         - Convert to mono
@@ -114,7 +165,7 @@ class STTTester:
         - Normalize volume
         - Apply compression
         """
-        print(f"  Enhancing: {filename}")
+        log.append(f"  Enhancing: {filename}")
         
         # Get original stats
         orig_duration = len(audio_segment) / 1000.0
@@ -122,7 +173,7 @@ class STTTester:
         orig_rate = audio_segment.frame_rate
         orig_rms = audio_segment.rms
         
-        print(f"    Original: {orig_duration:.2f}s, {orig_channels}ch, {orig_rate}Hz, RMS={orig_rms}")
+        log.append(f"    Original: {orig_duration:.2f}s, {orig_channels}ch, {orig_rate}Hz, RMS={orig_rms}")
         
         # Convert to mono
         if audio_segment.channels > 1:
@@ -130,29 +181,79 @@ class STTTester:
             
         # Resample to target rate
         if audio_segment.frame_rate != TARGET_SAMPLE_RATE:
-            audio_segment = audio_segment.set_frame_rate(TARGET_SAMPLE_RATE)
+            audio_segment = STTTester.resample_audio(audio_segment, TARGET_SAMPLE_RATE)
             
-        # Normalize volume (boost to optimal level)
-        if ENABLE_NORMALIZATION:
-            audio_segment = normalize(audio_segment, headroom=0.1)
-            
-        # Apply dynamic range compression (makes quiet parts louder)
-        if ENABLE_COMPRESSION:
-            audio_segment = compress_dynamic_range(
-                audio_segment,
-                threshold=-20.0,
-                ratio=4.0,
-                attack=5.0,
-                release=50.0
-            )
+        # Normalize volume (boost to optimal level) and apply dynamic range compression
+        # (makes quiet parts louder) in one NumPy pass
+        if ENABLE_NORMALIZATION or ENABLE_COMPRESSION:
+            audio_segment = audio_segment.set_sample_width(2)
+            samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16)
+            enhanced = STTTester.enhance_samples(samples, audio_segment.frame_rate)
+            audio_segment = AudioSegment(enhanced.tobytes(), frame_rate=audio_segment.frame_rate,
+                                         sample_width=2, channels=1)
             
         new_rms = audio_segment.rms
-        print(f"    Enhanced: {len(audio_segment)/1000.0:.2f}s, 1ch, {TARGET_SAMPLE_RATE}Hz, RMS={new_rms} (boost: {new_rms/orig_rms:.1f}x)")
+        log.append(f"    Enhanced: {len(audio_segment)/1000.0:.2f}s, 1ch, {TARGET_SAMPLE_RATE}Hz, RMS={new_rms} (boost: {new_rms/orig_rms:.1f}x)")
         
         return audio_segment
             
-    def load_and_analyze_audio(self, file_path: Path) -> Dict[str, Any]:
-        """Load audio file and analyze its properties"""
+    @staticmethod
+    def enhance_samples(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Peak-normalize and compress int16 samples with vectorized NumPy, replacing
+        pydub's normalize() and compress_dynamic_range() (which loop in Python)
+        """
+        audio = samples.astype(np.float32)
+        peak = float(np.abs(audio).max()) if audio.size else 0.0
+        if peak == 0.0:
+            return samples
+
+        if ENABLE_NORMALIZATION:
+            audio *= 32768.0 * 10 ** (-NORMALIZE_HEADROOM_DB / 20) / peak
+
+        if ENABLE_COMPRESSION:
+            # RMS level per attack-length frame, in dBFS
+            frame = max(1, int(sample_rate * COMPRESS_ATTACK_MS / 1000))
+            n_frames = -(-audio.size // frame)
+            frames = np.zeros(n_frames * frame, dtype=np.float32)
+            frames[:audio.size] = audio
+            rms = np.sqrt(np.mean(np.square(frames.reshape(n_frames, frame)), axis=1))
+            level_db = 20 * np.log10(np.maximum(rms, 1e-9) / 32768.0)
+
+            # Gain reduction above the threshold; on release it decays exponentially rather than
+            # dropping at once. Running max in the log domain: r[i] = max_j r[j] * exp(-k * (i - j))
+            reduction_db = np.maximum(0.0, level_db - COMPRESS_THRESHOLD_DB) * (1 - 1 / COMPRESS_RATIO)
+            k = frame / (sample_rate * COMPRESS_RELEASE_MS / 1000)
+            decay = k * np.arange(n_frames)
+            with np.errstate(divide='ignore'):
+                reduction_db = np.exp(np.maximum.accumulate(np.log(reduction_db) + decay) - decay)
+
+            # Per-sample gain, interpolated between frame centres
+            frame_centres = np.arange(n_frames) * frame + frame / 2
+            audio *= np.interp(np.arange(audio.size), frame_centres, 10 ** (-reduction_db / 20)).astype(np.float32)
+
+        return np.clip(np.round(audio), -32768, 32767).astype(np.int16)
+
+    @staticmethod
+    def resample_audio(audio_segment: AudioSegment, target_rate: int) -> AudioSegment:
+        """
+        Resample mono audio with torchaudio's windowed-sinc (polyphase) resampler,
+        which is faster and cleaner than pydub's audioop-based set_frame_rate
+        """
+        audio_segment = audio_segment.set_sample_width(2)
+        samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16)
+        waveform = torch.from_numpy(samples.astype(np.float32)).unsqueeze(0)
+        resampled = torchaudio.functional.resample(waveform, audio_segment.frame_rate, target_rate)
+        pcm = resampled.squeeze(0).numpy().round().clip(-32768, 32767).astype(np.int16)
+        return AudioSegment(pcm.tobytes(), frame_rate=target_rate, sample_width=2, channels=1)
+            
+    @staticmethod
+    def load_and_analyze_audio(file_path: Path) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """
+        Load audio file and analyze its properties. Runs in a worker process, so
+        progress lines are returned with the result and printed by the caller
+        """
+        log = []
         try:
             # Load audio based on format
             if file_path.suffix.lower() == '.mp3':
@@ -173,16 +274,15 @@ class STTTester:
             
             # Skip very short files
             if duration_ms < MIN_DURATION_MS:
-                print(f"  SKIP: {file_path.name} - too short ({duration_s:.2f}s)")
-                return None
+                log.append(f"  SKIP: {file_path.name} - too short ({duration_s:.2f}s)")
+                return None, log
                 
             # Enhance audio
-            enhanced_audio = self.enhance_audio(audio, file_path.name)
+            enhanced_audio = STTTester.enhance_audio(audio, file_path.name, log)
             
-            # Export to WAV format in memory (best for Whisper)
-            buffer = io.BytesIO()
-            enhanced_audio.export(buffer, format="wav")
-            audio_bytes = buffer.getvalue()
+            # Raw 16-bit mono PCM frames, as the gateway sends them (the worker reads
+            # audio_bytes straight into an int16 array, so no WAV container)
+            audio_bytes = enhanced_audio.set_sample_width(2).raw_data
             
             return {
                 "path": file_path,
@@ -193,11 +293,11 @@ class STTTester:
                 "audio_bytes": audio_bytes,
                 "sample_rate": TARGET_SAMPLE_RATE,
                 "channels": TARGET_CHANNELS
-            }
+            }, log
             
         except Exception as e:
-            print(f"  ERROR loading {file_path.name}: {e}")
-            return None
+            log.append(f"  ERROR loading {file_path.name}: {e}")
+            return None, log
             
     def load_audio_files(self) -> List[Dict[str, Any]]:
         """Load and preprocess all audio files"""
@@ -210,10 +310,15 @@ class STTTester:
         print("-" * 80)
         
         audio_files = []
-        
-        for file_path in sorted(self.audio_dir.iterdir()):
-            if file_path.suffix.lower() in SUPPORTED_FORMATS:
-                audio_data = self.load_and_analyze_audio(file_path)
+        file_paths = [file_path for file_path in sorted(self.audio_dir.iterdir())
+                      if file_path.suffix.lower() in SUPPORTED_FORMATS]
+        
+        # Decoding and enhancement are CPU-bound and independent per file: one process per core.
+        # map() keeps directory order, so files are listed and submitted as before
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_loader_process) as executor:
+            for audio_data, log in executor.map(STTTester.load_and_analyze_audio, file_paths):
+                for line in log:
+                    print(line)
                 if audio_data:
                     audio_files.append(audio_data)
                     
@@ -222,19 +327,18 @@ class STTTester:
         
         return audio_files
         
-    async def submit_audio_job(self, audio_file: Dict[str, Any], job_index: int) -> str:
-        """Submit processed audio to STT worker"""
-        # Encode audio
-        audio_b64 = base64.b64encode(audio_file["audio_bytes"]).decode('utf-8')
-            
-        # Create job
+    def _queue_job(self, pipe, audio_file: Dict[str, Any], job_index: int) -> str:
+        """Queue a processed audio job on a Redis pipeline and track it as pending"""
+        # Create job (schema v2: raw PCM in audio_bytes, no base64)
         job_id = f"test-job-{job_index}-{int(time.time() * 1000)}"
         
         job_data = {
+            "v": "2",
             "job_id": job_id,
             "client_id": self.client_id,
             "segment_id": f"segment-{job_index}",
-            "audio_bytes_b64": audio_b64,
+            "audio_bytes": audio_file["audio_bytes"],
+            "sample_rate": str(audio_file["sample_rate"]),
             "source_lang": "en",
             "target_lang": "vi",
             "translation_enabled": "false",
@@ -251,11 +355,18 @@ class STTTester:
             "submit_time": time.time()
         }
         
-        # Submit to Redis Stream
-        await self.redis.xadd(AUDIO_JOBS_STREAM, job_data)
+        # Submit to Redis Stream (sent when the pipeline executes)
+        pipe.xadd(AUDIO_JOBS_STREAM, job_data)
         
         return job_id
         
+    async def submit_audio_job(self, audio_file: Dict[str, Any], job_index: int) -> str:
+        """Submit processed audio to STT worker"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            job_id = self._queue_job(pipe, audio_file, job_index)
+            await pipe.execute()
+        return job_id
+        
     async def run_test(self, timeout: int = 300):
         """Run the transcription test"""
         print("="*80)
@@ -295,10 +406,15 @@ class STTTester:
         
         start_time = time.time()
         
-        for i, audio_file in enumerate(audio_files):
-            job_id = await self.submit_audio_job(audio_file, i)
-            print(f"Submitted: {audio_file['filename']} ({audio_file['duration_s']:.1f}s)")
-            await asyncio.sleep(0.05)
+        # One pipelined round-trip per SUBMIT_BATCH_SIZE jobs instead of one XADD (and a sleep) per job
+        for batch_start in range(0, len(audio_files), SUBMIT_BATCH_SIZE):
+            batch = audio_files[batch_start:batch_start + SUBMIT_BATCH_SIZE]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for i, audio_file in enumerate(batch, batch_start):
+                    self._queue_job(pipe, audio_file, i)
+                await pipe.execute()
+            for audio_file in batch:
+                print(f"Submitted: {audio_file['filename']} ({audio_file['duration_s']:.1f}s)")
             
         print(f"\nAll jobs submitted. Waiting for results...\n")
         
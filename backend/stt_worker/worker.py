@@ -8,21 +8,30 @@ Redis consumption, result publishing, health monitoring, and metrics collection.
 import asyncio
 import time
 import logging
-from typing import Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 
 import redis.asyncio as redis
 from redis.exceptions import ConnectionError
 from dotenv import load_dotenv
 
+try:
+    # SIMD (AVX2/AVX-512) base64 codec, drop-in compatible with the stdlib module
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 # Load environment variables from .env file
 load_dotenv()
 
 from config import (
     REDIS_URL, AUDIO_JOBS_STREAM, CONSUMER_GROUP, WORKER_ID,
-    HEALTH_PORT, validate_configuration, print_configuration
+    HEALTH_PORT, NUM_WORKERS, ENABLE_BATCHING, MAX_BATCH_SIZE, validate_configuration, print_configuration
 )
 from model_manager import STTModelManager
-from audio_processor import AudioProcessor
+from audio_processor import AudioProcessor, SegmentCallback
+from batch_processor import BatchAudioProcessor
 from result_publisher import ResultPublisher
 import sys
 import os
@@ -46,9 +55,12 @@ class STTWorker:
         self.model_manager = STTModelManager(self.logger)
         self.redis: redis.Redis = None
         self.audio_processor: AudioProcessor = None
+        self.batch_processor: BatchAudioProcessor = None
         self.result_publisher: ResultPublisher = None
         self.redis_consumer: RedisStreamConsumer = None
         self.health_server: HealthServer = None
+        # Transcription runs off the event loop, up to NUM_WORKERS jobs (or batches) at once, one per model worker
+        self.transcribe_executor = ThreadPoolExecutor(max_workers=NUM_WORKERS, thread_name_prefix="transcribe")
 
         # Configuration validation
         issues = validate_configuration()
@@ -82,6 +94,8 @@ class STTWorker:
 
         # Initialize processors
         self.audio_processor = AudioProcessor(model, self.logger)
+        if ENABLE_BATCHING:
+            self.batch_processor = BatchAudioProcessor(self.audio_processor, self.transcribe_executor, self.logger)
         self.result_publisher = ResultPublisher(self.redis, self.logger)
 
         # Initialize Redis consumer
@@ -91,7 +105,10 @@ class STTWorker:
             consumer_group=CONSUMER_GROUP,
             consumer_id=self.worker_id,
             logger=self.logger,
-            message_processor=self._process_audio_job
+            message_processor=self._process_audio_job,
+            binary_fields=("audio_bytes",),
+            # One job per model worker, or enough to fill a batch on each when batching is enabled
+            max_concurrency=NUM_WORKERS * MAX_BATCH_SIZE if ENABLE_BATCHING else NUM_WORKERS
         )
 
         # Initialize health server
@@ -112,24 +129,44 @@ class STTWorker:
 
             self.logger.info(f"Processing job {job_id} for client {client_id}")
 
-            # Decode audio data
-            audio_b64 = job_data.get("audio_bytes_b64", "")
-            if not audio_b64:
+            # Extract audio data: v2 jobs carry raw PCM, v1 jobs carry base64
+            if job_data.get("v") == "2":
+                audio_data = job_data.get("audio_bytes", b"")
+            else:
+                audio_b64 = job_data.get("audio_bytes_b64", "")
+                audio_data = base64.b64decode(audio_b64) if audio_b64 else b""
+            if not audio_data:
                 raise ValueError("No audio data provided")
 
-            import base64
-            audio_data = base64.b64decode(audio_b64)
-
             # Extract parameters
             source_lang = job_data.get("source_lang", "en")
             target_lang = job_data.get("target_lang", "vi")
             translation_enabled = self._parse_bool(job_data.get("translation_enabled", True))
             is_final = self._parse_bool(job_data.get("is_final", False))
 
-            # Transcribe audio
-            transcription_result = self.audio_processor.transcribe_audio(
-                audio_data, language=source_lang
-            )
+            # Without translation the client sees STT text directly, so stream it segment by segment.
+            # Partials have their own status and no job_id: anything waiting on a job only sees its full result
+            on_segment = None
+            if not translation_enabled:
+                on_segment = self._partial_result_callback({
+                    "status": "partial",
+                    "client_id": client_id,
+                    "segment_id": job_data.get("segment_id", ""),
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "translation_enabled": translation_enabled,
+                    "is_final": False,
+                    "worker_id": self.worker_id
+                })
+
+            # Transcribe audio off the event loop (batched with other clients' jobs if enabled)
+            if self.batch_processor is not None:
+                transcription_result = await self.batch_processor.transcribe(audio_data, source_lang, on_segment)
+            else:
+                transcription_result = await asyncio.get_running_loop().run_in_executor(
+                    self.transcribe_executor, self.audio_processor.transcribe_audio,
+                    audio_data, source_lang, None, on_segment
+                )
 
             # Build result
             result = {
@@ -152,9 +189,8 @@ class STTWorker:
             else:
                 self.metrics.record_job_success(transcription_result["processing_time"])
 
-            # Publish results
-            await self.result_publisher.publish_result(result)
-            await self.result_publisher.publish_transcription_for_translation(result)
+            # Publish results (and forward for translation) in one round-trip
+            await self.result_publisher.publish_all(result)
 
         except Exception as e:
             self.logger.error(f"Error processing job {job_data.get('job_id', 'unknown')}: {e}")
@@ -172,6 +208,39 @@ class STTWorker:
             }
             await self.result_publisher.publish_result(error_result)
 
+    def _partial_result_callback(self, partial_result: Dict[str, Any]) -> SegmentCallback:
+        """Build a segment callback that publishes each newly decoded segment's text as a partial result
+
+        At most one publish per job is in flight; segments decoded meanwhile go out together in the
+        next one. Whatever is still unsent when the job finishes is covered by its full result.
+        """
+        loop = asyncio.get_running_loop()
+        lock = threading.Lock()
+        pending: List[str] = []
+        in_flight = False
+
+        def on_published(future):
+            nonlocal in_flight
+            if not future.cancelled() and future.exception() is not None:
+                self.logger.warning(f"Failed to publish partial result for client {partial_result['client_id']}: {future.exception()}")
+            with lock:
+                in_flight = False
+
+        def on_segment(segment):
+            # Runs on the transcription thread; the publish itself is scheduled on the event loop
+            nonlocal in_flight
+            with lock:
+                pending.append(segment.text)
+                if in_flight:
+                    return
+                in_flight = True
+                result = {**partial_result, "text": " ".join(pending).strip(), "timestamp": time.time()}
+                pending.clear()
+            future = asyncio.run_coroutine_threadsafe(self.result_publisher.publish_result(result), loop)
+            future.add_done_callback(on_published)
+
+        return on_segment
+
     def _get_health_data(self) -> Dict[str, Any]:
         """Get health check data"""
         return {
@@ -233,4 +302,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        # libuv-based event loop; not available on Windows, where the default loop is used
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
@@ -4,9 +4,9 @@ result_publisher.py - Result publishing for Translation Worker
 Handles publishing translation results to Redis pub/sub channels.
 """
 
-import json
 import logging
 from typing import Dict, Any
+import ormsgpack
 import redis.asyncio as redis
 
 from config import RESULTS_CHANNEL_PREFIX
@@ -23,14 +23,14 @@ class ResultPublisher:
         """Publish result to Redis pub/sub channel"""
         channel = f"{RESULTS_CHANNEL_PREFIX}{result['client_id']}"
 
-        # Ensure all values are JSON serializable
+        # Ensure all values are msgpack serializable
         serializable_result = self._make_json_serializable(result)
 
         self.logger.info(f"Publishing translation result: client={result.get('client_id')}, text_len={len(result.get('translation', ''))}")
-        await self.redis.publish(channel, json.dumps(serializable_result).encode('utf-8'))
+        await self.redis.publish(channel, ormsgpack.packb(serializable_result))
 
     def _make_json_serializable(self, obj: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert any non-JSON serializable values to strings"""
+        """Convert any values msgpack can't serialize to strings"""
         result = {}
         for key, value in obj.items():
             if isinstance(value, (int, float, str, bool, type(None))):